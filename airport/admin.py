@@ -1,13 +1,43 @@
 from django.contrib import admin
-from .models import Airport, Route, Crew, AirplaneType, Airplane, Flight, Order, Ticket
+from .models import (
+    Airport,
+    Route,
+    Crew,
+    AirplaneType,
+    Airplane,
+    Flight,
+    Order,
+    Ticket,
+    SeatHold,
+)
 
 
 # Register your models here.
 admin.site.register(Airport)
-admin.site.register(Route)
+
+
+@admin.register(Route)
+class RouteAdmin(admin.ModelAdmin):
+    list_select_related = ("source", "destination")
+
+
 admin.site.register(Crew)
 admin.site.register(AirplaneType)
 admin.site.register(Airplane)
-admin.site.register(Flight)
+
+
+# __str__ of flights and tickets walks route -> airports
+@admin.register(Flight)
+class FlightAdmin(admin.ModelAdmin):
+    list_select_related = ("route__source", "route__destination")
+
+
 admin.site.register(Order)
-admin.site.register(Ticket)
+
+
+@admin.register(Ticket)
+class TicketAdmin(admin.ModelAdmin):
+    list_select_related = ("flight__route__source", "flight__route__destination")
+
+
+admin.site.register(SeatHold)
@@ -0,0 +1,154 @@
+"""Async variants of the hot flight read endpoints.
+
+DRF views are synchronous, so these are plain Django async views that
+reuse the DRF pieces which never touch the database (JWT validation,
+filters, cursors, serializers) and run every query through the async
+ORM. Under an ASGI server a request waiting on the database does not
+hold a worker thread for the rest of its life.
+"""
+
+import functools
+
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from airport.pagination import FlightPagination
+from airport.serializers import (
+    FlightDetailSerializer,
+    FlightListSerializer,
+    FlightSeatMapSerializer,
+)
+from airport.views import FlightViewSet
+from airport_service.metrics import timed
+from customer.authentication import CachedJWTAuthentication
+
+jwt_authentication = CachedJWTAuthentication()
+
+
+async def authenticate(request):
+    """``JWTAuthentication.authenticate`` with a cache miss read by ``aget()``"""
+    header = jwt_authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = jwt_authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    token = jwt_authentication.get_validated_token(raw_token)
+    return await jwt_authentication.aget_user(token)
+
+
+def get_throttles():
+    return [throttle() for throttle in api_settings.DEFAULT_THROTTLE_CLASSES]
+
+
+def check_throttles(request):
+    waits = [
+        throttle.wait()
+        for throttle in get_throttles()
+        if not throttle.allow_request(request, None)
+    ]
+    if waits:
+        raise exceptions.Throttled(max((wait for wait in waits if wait), default=None))
+
+
+def render(data, status_code=status.HTTP_200_OK, headers=None):
+    with timed("serialize"):
+        content = JSONRenderer().render(data)
+    return HttpResponse(
+        content,
+        status=status_code,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def async_api_view(handler):
+    """Authentication, throttling and error rendering like a read-only DRF view"""
+
+    @functools.wraps(handler)
+    async def view(request, *args, **kwargs):
+        if request.method != "GET":
+            return render(
+                {"detail": f'Method "{request.method}" not allowed.'},
+                status.HTTP_405_METHOD_NOT_ALLOWED,
+                {"Allow": "GET"},
+            )
+        request = Request(request)
+        try:
+            user = await authenticate(request)
+            if user is None:
+                raise exceptions.NotAuthenticated()
+            request.user = user
+            check_throttles(request)
+            data = await handler(request, *args, **kwargs)
+            return data if isinstance(data, HttpResponse) else render(data)
+        except exceptions.APIException as exc:
+            headers = {}
+            if isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+                headers["Retry-After"] = str(int(exc.wait))
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                headers["WWW-Authenticate"] = jwt_authentication.authenticate_header(
+                    request
+                )
+            data = exc.detail
+            if not isinstance(data, (list, dict)):
+                data = {"detail": data}
+            return render(data, exc.status_code, headers)
+        except Http404 as exc:
+            return render({"detail": str(exc)}, status.HTTP_404_NOT_FOUND)
+
+    return view
+
+
+def flight_view(request, action):
+    """A ``FlightViewSet`` to build the queries and fieldsets of the request"""
+    return FlightViewSet(request=request, action=action, kwargs={})
+
+
+def flight_queryset(request, action):
+    """``FlightViewSet.get_queryset()``, which only builds the query"""
+    return flight_view(request, action).get_queryset()
+
+
+@async_api_view
+async def flight_list(request):
+    """Same output and query parameters as ``GET /flights/``"""
+    view = flight_view(request, "list")
+    reader = view.get_fast_list_reader()
+    paginator = FlightPagination()
+    if reader is None:
+        # ?expand= renders through the serializer, from the prefetched page
+        page = await paginator.apaginate_queryset(view.get_queryset(), request)
+        serializer = FlightListSerializer(page, many=True, context={"request": request})
+        data = view.apply_sparse_fields(serializer).data
+        return paginator.get_paginated_response(data).data
+    rows = reader.rows(view.get_queryset())
+    page = await paginator.apaginate_queryset(rows, request)
+    with timed("serialize"):
+        data = await reader.ato_representation(page)
+    return paginator.get_paginated_response(data).data
+
+
+@async_api_view
+async def flight_detail(request, pk):
+    view = flight_view(request, "retrieve")
+    flight = await aget_object_or_404(view.get_queryset(), pk=pk)
+    serializer = FlightDetailSerializer(flight, context={"request": request})
+    return view.apply_sparse_fields(serializer).data
+
+
+@async_api_view
+async def flight_seat_map(request, pk):
+    encoding = request.query_params.get("encoding", "base64")
+    if encoding not in ("base64", "rle"):
+        return render(
+            {"encoding": "Must be one of: base64, rle"}, status.HTTP_400_BAD_REQUEST
+        )
+    flight = await aget_object_or_404(flight_queryset(request, "seat_map"), pk=pk)
+    return FlightSeatMapSerializer(
+        flight, context={"request": request, "encoding": encoding}
+    ).data
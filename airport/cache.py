@@ -0,0 +1,100 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from airport_service.cache import LRUCache
+
+response_cache = LRUCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES, ttl=settings.RESPONSE_CACHE_TTL
+)
+
+
+def _version_key(model):
+    return f"model-version:{model._meta.label_lower}"
+
+
+def model_versions(models):
+    """Current version of each model, as stored in the Django cache.
+
+    Versions expire after ``RESPONSE_CACHE_TTL``, like the cached
+    responses: with a per-process cache a worker never sees the bumps of
+    the others, and its ETags would otherwise stay valid forever.
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A fresh timestamp never repeats a version lost to eviction
+            cache.add(key, time.time_ns(), timeout=settings.RESPONSE_CACHE_TTL)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def bump_model_version(model):
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=settings.RESPONSE_CACHE_TTL)
+
+
+def plain_data(data):
+    """``data`` without the serializer ``ReturnDict``/``ReturnList`` keep"""
+    if isinstance(data, dict):
+        return {key: plain_data(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [plain_data(value) for value in data]
+    return data
+
+
+class CachedResponseMixin:
+    """Serves list/retrieve from an in-process LRU with strong ETags.
+
+    Entries are keyed by the request path and the versions of
+    ``cache_models``; any save or delete of those models bumps their
+    version (see ``airport.signals``), so stale entries are never hit
+    again and age out of the LRU. Entries and versions also expire after
+    ``RESPONSE_CACHE_TTL``, which bounds how stale a worker can be when
+    the Django cache is not shared between workers. ``If-None-Match`` is
+    answered with 304 without querying the database.
+    """
+
+    cache_models = ()
+
+    def _etag(self, request):
+        models = self.cache_models or (self.queryset.model,)
+        fingerprint = "|".join(
+            (
+                request.build_absolute_uri(),
+                request.accepted_renderer.format,
+                repr(model_versions(models)),
+            )
+        )
+        return '"%s"' % hashlib.sha256(fingerprint.encode()).hexdigest()[:32]
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        etag = self._etag(request)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = response_cache.get(etag)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                response_cache.set(etag, plain_data(response.data))
+            else:
+                response = Response(data)
+        response["ETag"] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
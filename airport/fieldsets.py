@@ -0,0 +1,151 @@
+import copy
+
+from django.core.exceptions import FieldDoesNotExist
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import ValidationError
+
+SPARSE_ACTIONS = ("list", "retrieve")
+
+FIELDS_PARAMETER = OpenApiParameter(
+    "fields",
+    type=str,
+    description="Only these fields of each item (ex. ?fields=id,departure_time)",
+    required=False,
+)
+
+EXPAND_PARAMETER = OpenApiParameter(
+    "expand",
+    type=str,
+    description="Render these relations as nested objects (ex. ?expand=route)",
+    required=False,
+)
+
+
+def split_param(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class SparseFieldsMixin:
+    """``?fields=`` renders only the named fields, and queries only for them.
+
+    ``field_queries`` maps a serializer field to what it costs the
+    queryset: ``select_related`` and ``prefetch_related`` lookups,
+    ``annotate`` expressions and ``only`` columns (by default the field
+    itself when it is a model column). ``queryset`` is the bare query the
+    requested fields are added to; without ``?fields=`` every field is.
+
+    ``?expand=`` swaps fields for the serializers in ``expandable_fields``,
+    which must be covered by the same ``field_queries``.
+    """
+
+    field_queries = {}
+    expandable_fields = {}
+
+    @classmethod
+    def queryset_for_fields(cls, fields=None):
+        """``queryset`` with the joins, prefetches and annotations of ``fields``"""
+        queryset = cls.queryset.all()
+        queries = [
+            cls.field_queries[field]
+            for field in (cls.field_queries if fields is None else fields)
+            if field in cls.field_queries
+        ]
+        # select_related() without lookups would follow every non-null FK
+        for query in queries:
+            if "select_related" in query:
+                queryset = queryset.select_related(*query["select_related"])
+            if "prefetch_related" in query:
+                queryset = queryset.prefetch_related(*query["prefetch_related"])
+            if "annotate" in query:
+                queryset = queryset.annotate(**query["annotate"])
+        return queryset
+
+    def _only(self, fields):
+        """Columns of ``fields``, plus those the pagination orders by"""
+        model = self.queryset.model
+        columns = []
+        for field in fields:
+            query = self.field_queries.get(field, {})
+            if "only" in query:
+                columns.extend(query["only"])
+                continue
+            try:
+                model_field = model._meta.get_field(field)
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.many_to_many:
+                columns.append(field)
+        if self.action == "list":
+            ordering = getattr(self.pagination_class, "ordering", ())
+            if isinstance(ordering, str):
+                ordering = (ordering,)
+            columns.extend(order.lstrip("-") for order in ordering)
+        return columns
+
+    def _serializer_fields(self):
+        serializer_class = self.get_serializer_class()
+        return list(serializer_class().fields)
+
+    def get_sparse_fields(self):
+        """Fields named by ``?fields=`` in serializer order, None for all"""
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = None
+            value = self.request.query_params.get("fields")
+            if self.action in SPARSE_ACTIONS and value:
+                requested = set(split_param(value))
+                available = self._serializer_fields()
+                unknown = sorted(requested.difference(available))
+                if unknown:
+                    raise ValidationError(
+                        {"fields": f"Unknown fields: {', '.join(unknown)}"}
+                    )
+                self._sparse_fields = [
+                    field for field in available if field in requested
+                ]
+        return self._sparse_fields
+
+    def get_expanded_fields(self):
+        """Fields named by ``?expand=`` that are rendered"""
+        if not hasattr(self, "_expanded_fields"):
+            self._expanded_fields = []
+            value = self.request.query_params.get("expand")
+            if self.action in SPARSE_ACTIONS and value:
+                requested = split_param(value)
+                unknown = sorted(set(requested).difference(self.expandable_fields))
+                if unknown:
+                    raise ValidationError(
+                        {"expand": f"Cannot expand: {', '.join(unknown)}"}
+                    )
+                fields = self.get_sparse_fields() or self._serializer_fields()
+                self._expanded_fields = [
+                    field for field in fields if field in requested
+                ]
+        return self._expanded_fields
+
+    def get_queryset(self):
+        fields = self.get_sparse_fields()
+        queryset = self.queryset_for_fields(fields)
+        if fields is not None:
+            queryset = queryset.only(*self._only(fields))
+        return queryset
+
+    def apply_sparse_fields(self, serializer):
+        """Drops the fields left out of ``?fields=`` and expands ``?expand=``"""
+        if self.action not in SPARSE_ACTIONS:
+            return serializer
+        fields = self.get_sparse_fields()
+        item = getattr(serializer, "child", serializer)
+        if fields is not None:
+            for field in set(item.fields).difference(fields):
+                item.fields.pop(field)
+        for field in self.get_expanded_fields():
+            item.fields[field] = copy.deepcopy(self.expandable_fields[field])
+        return serializer
+
+    def get_serializer(self, *args, **kwargs):
+        return self.apply_sparse_fields(super().get_serializer(*args, **kwargs))
+
+    def get_fast_list_reader(self):
+        if self.get_expanded_fields():
+            return None
+        return self.fast_list_class(self.get_sparse_fields())
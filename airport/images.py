@@ -0,0 +1,150 @@
+"""Downscaled variants of uploaded airplane type images.
+
+Uploads are stored as-is and the variants are rendered after commit by a
+process pool, so Pillow never runs on the request thread. ``render_variants``
+only uses Pillow and the file system so it can run in a spawned worker
+without Django set up; ``Image.thumbnail`` lets JPEG decode at a reduced
+scale (``draft``), so large photos are never decoded at full size.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from PIL import Image, ImageOps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def variants_directory(name):
+    return os.path.join(os.path.dirname(name), "variants")
+
+
+def render_variants(source_path, media_root, directory, stem):
+    """Write every variant of ``source_path``, returning ``{format: {width: name}}``
+
+    Widths larger than the original are skipped; an image narrower than
+    the smallest width gets a single variant at its own width. Names end
+    in a hash of the content, so a variant URL never changes meaning.
+    """
+    with Image.open(source_path) as image:
+        widths = [width for width in VARIANT_WIDTHS if width <= image.width]
+        widths = widths or [image.width]
+        # One reduced decode for the largest variant, smaller ones from it
+        image.thumbnail((widths[-1], image.height), Image.LANCZOS)
+        image = ImageOps.exif_transpose(image).convert("RGB")
+
+    os.makedirs(os.path.join(media_root, directory), exist_ok=True)
+    variants = {extension: {} for extension in VARIANT_FORMATS}
+    for width in reversed(widths):
+        if image.width > width:
+            image = image.resize(
+                (width, max(1, round(image.height * width / image.width))),
+                Image.LANCZOS,
+            )
+        for extension, (image_format, options) in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            image.save(buffer, image_format, **options)
+            content = buffer.getvalue()
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            name = os.path.join(directory, f"{stem}-{width}w-{digest}.{extension}")
+            with open(os.path.join(media_root, name), "wb") as variant:
+                variant.write(content)
+            variants[extension][str(width)] = name
+    return variants
+
+
+def image_too_large(image):
+    """Checks the header dimensions of an uploaded (not yet decoded) image"""
+    width, height = image.size
+    return width * height > settings.IMAGE_MAX_PIXELS
+
+
+def variant_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a threaded server would copy its locks and sockets
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS,
+                mp_context=get_context("spawn"),
+            )
+        return _pool
+
+
+def save_variants(pk, source, variants):
+    """Store ``variants`` unless the image was replaced meanwhile"""
+    # Not at module level: pool workers import this module without Django set up
+    from airport.cache import bump_model_version
+
+    airplane_types = apps.get_model("airport", "AirplaneType").objects
+    previous = (
+        airplane_types.filter(pk=pk).values_list("image_variants", flat=True).first()
+    )
+    updated = airplane_types.filter(pk=pk, image=source).update(
+        image_variants={"source": source, **variants}
+    )
+    if updated:
+        bump_model_version(airplane_types.model)
+        stale, kept = previous or {}, variant_names(variants)
+    else:
+        stale, kept = variants, set()
+    delete_variants(stale, kept)
+
+
+def delete_variants(variants, kept=frozenset()):
+    for name in variant_names(variants) - kept:
+        default_storage.delete(name)
+
+
+def variant_names(variants):
+    return {
+        name
+        for extension, names in variants.items()
+        if extension in VARIANT_FORMATS
+        for name in names.values()
+    }
+
+
+def _variants_done(pk, source, future):
+    try:
+        save_variants(pk, source, future.result())
+    except Exception:
+        logger.exception("Image variants of airplane type %s failed", pk)
+    finally:
+        # Runs on the pool's result thread, which has its own connection
+        connection.close()
+
+
+def schedule_variants(pk, source):
+    """Render the variants of ``source`` off the request thread"""
+    stem = os.path.splitext(os.path.basename(source))[0]
+    arguments = (
+        default_storage.path(source),
+        str(settings.MEDIA_ROOT),
+        variants_directory(source),
+        stem,
+    )
+    if settings.IMAGE_VARIANTS_SYNC:
+        save_variants(pk, source, render_variants(*arguments))
+        return
+    future = variant_pool().submit(render_variants, *arguments)
+    future.add_done_callback(lambda done: _variants_done(pk, source, done))
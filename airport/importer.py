@@ -0,0 +1,653 @@
+"""Batched importer for schedule data from fixtures, NDJSON or CSV.
+
+Records have the Django fixture shape ``{"model", "pk", "fields"}``. A
+foreign key (or many-to-many item) may be given as a pk, as a natural
+key list, or, for single-field natural keys, as the bare value:
+``"route": ["Boryspil International Airport", "Orly"]``.
+
+Natural keys are resolved in memory. Rows are written with batched
+``bulk_create``; tickets with one ``executemany`` INSERT per batch (or
+``COPY`` on Postgres). Seats are checked
+against per-flight seat maps instead of ``Ticket.full_clean()``, and
+flight seat counters and bitmaps are updated once at the end. Airplane
+and crew double bookings are found with one sweep over the imported and
+existing flights of the imported schedule's time span (``airport.intervals``).
+Order summaries of the imported tickets, and of the tickets whose flight
+data the import changed, are rewritten at the end.
+"""
+
+import csv
+import io
+import json
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from airport.cache import bump_model_version
+from airport.intervals import overlapping_pairs
+from airport.itineraries import route_graph
+from airport.models import Flight, OrderTicketSummary, Ticket
+from airport.seat_map import SeatMap
+
+# Importable models in dependency order, with the fields that identify a row
+NATURAL_KEYS = {
+    "customer.user": ("email",),
+    "airport.airport": ("name",),
+    "airport.airplanetype": ("name",),
+    "airport.airplane": ("name",),
+    "airport.crew": ("first_name", "last_name"),
+    "airport.route": ("source", "destination"),
+    "airport.flight": ("airplane", "departure_time"),
+    "airport.order": ("customer", "created_at"),
+    "airport.ticket": ("flight", "row", "seat"),
+}
+AIRPLANE = "airport.airplane"
+FLIGHT = "airport.flight"
+TICKET = "airport.ticket"
+# Maintained by the importer, never read from the input
+COMPUTED_FIELDS = {"airport.flight": {"tickets_sold", "seat_bitmap"}}
+CATALOG_MODELS = (
+    "airport.airport",
+    "airport.airplanetype",
+    "airport.airplane",
+    "airport.crew",
+    "airport.route",
+)
+
+
+class RecordError(Exception):
+    pass
+
+
+class ImportFailed(Exception):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid records")
+        self.errors = errors
+
+
+def iter_json_array(stream, chunk_size=1 << 16):
+    """Objects of a top-level JSON array, decoded without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in "[, \t\r\n":
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            yield record
+        buffer = buffer[position:]
+        if not chunk:
+            if buffer.strip():
+                raise RecordError("Truncated or invalid JSON input")
+            return
+
+
+def iter_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _csv_reference(value):
+    """CSV cell of a relation: a pk, or a natural key joined by "|" """
+    if value.isdigit():
+        return int(value)
+    return value.split("|") if "|" in value else value
+
+
+def iter_csv(stream, label):
+    """Rows of a CSV file of ``label`` objects; ``id``/``pk`` columns are the pk.
+
+    Many-to-many cells hold references separated by ";".
+    """
+    model = apps.get_model(label)
+    for row in csv.DictReader(stream):
+        pk = row.pop("pk", None) or row.pop("id", None)
+        fields = {}
+        for name, value in row.items():
+            field = model._meta.get_field(name)
+            if field.many_to_many:
+                fields[name] = [
+                    _csv_reference(item) for item in value.split(";") if item
+                ]
+            elif value == "" and field.null:
+                fields[name] = None
+            elif field.is_relation:
+                fields[name] = _csv_reference(value)
+            else:
+                fields[name] = value
+        yield {"model": label, "pk": int(pk) if pk else None, "fields": fields}
+
+
+def read_records(stream, input_format, label=None):
+    if input_format == "json":
+        return iter_json_array(stream)
+    if input_format == "ndjson":
+        return iter_ndjson(stream)
+    return iter_csv(stream, label)
+
+
+def _hashable(value):
+    return tuple(map(_hashable, value)) if isinstance(value, list) else value
+
+
+def _to_python(field, value):
+    value = field.to_python(value)
+    if isinstance(value, datetime) and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _ticket_columns():
+    quote = connection.ops.quote_name
+    columns = ", ".join(map(quote, ("row", "seat", "flight_id", "order_id")))
+    return f"{quote(Ticket._meta.db_table)} ({columns})"
+
+
+@contextmanager
+def imported_timestamps(fields):
+    """Stops ``auto_now``/``auto_now_add`` from replacing imported values"""
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class ScheduleImporter:
+    """Imports records in one transaction; any invalid record rolls it all back"""
+
+    def __init__(self, upsert=False, batch_size=5000, use_copy=False, max_errors=50):
+        if use_copy and upsert:
+            raise ValueError("COPY can only insert, it cannot be combined with upsert")
+        self.upsert = upsert
+        self.batch_size = batch_size
+        self.use_copy = use_copy and connection.vendor == "postgresql"
+        self.max_errors = max_errors
+        self.errors = []
+        self.created = Counter()
+        self.updated = Counter()
+        self.skipped = Counter()
+        self._pending = defaultdict(list)
+        self._pending_keys = defaultdict(set)
+        self._keys = {}
+        self._pks = {}
+        self._resolved = defaultdict(dict)
+        self._explicit_pks = set()
+        self._seat_maps = {}
+        self._imported_seats = {}
+        self._dirty_flights = set()
+        # pk -> record number of every flight written
+        self._imported_flights = {}
+        # label -> pks of existing rows the import overwrote
+        self._updated_pks = defaultdict(set)
+
+    def run(self, records):
+        with transaction.atomic():
+            for number, record in enumerate(records, 1):
+                self.add(number, record)
+            for label in NATURAL_KEYS:
+                self.flush(label)
+            self._check_bookings()
+            if self.errors:
+                raise ImportFailed(self.errors)
+            self._save_seat_maps()
+            self._refresh_summaries()
+            self._reset_sequences()
+            transaction.on_commit(self._invalidate_caches)
+        return self
+
+    def _error(self, number, label, message):
+        self.errors.append(f"record {number} ({label}): {message}")
+        if len(self.errors) >= self.max_errors:
+            raise ImportFailed(self.errors)
+
+    # Natural keys
+
+    def _load_keys(self, label):
+        if label not in self._keys:
+            model = apps.get_model(label)
+            attnames = [
+                model._meta.get_field(name).attname for name in NATURAL_KEYS[label]
+            ]
+            self._keys[label] = {}
+            self._pks[label] = set()
+            for *key, pk in model._default_manager.values_list(*attnames, "pk"):
+                self._keys[label][tuple(key)] = pk
+                self._pks[label].add(pk)
+        return self._keys[label]
+
+    def _key_of(self, label, obj):
+        model = apps.get_model(label)
+        return tuple(
+            getattr(obj, model._meta.get_field(name).attname)
+            for name in NATURAL_KEYS[label]
+        )
+
+    def resolve(self, model, value):
+        """pk of the object referenced by a pk, natural key or bare key value"""
+        if value is None or isinstance(value, int):
+            return value
+        label = model._meta.label_lower
+        if label not in NATURAL_KEYS:
+            raise RecordError(f"{label} can only be referenced by pk")
+        reference = _hashable(value)
+        pk = self._resolved[label].get(reference)
+        if pk is None:
+            pk = self._resolved[label][reference] = self._resolve_key(model, value)
+        return pk
+
+    def _resolve_key(self, model, value):
+        label = model._meta.label_lower
+        parts = value if isinstance(value, list) else [value]
+        names = NATURAL_KEYS[label]
+        if len(parts) != len(names):
+            raise RecordError(f"{label} natural key is {list(names)}, got {value!r}")
+        key = []
+        for name, part in zip(names, parts):
+            field = model._meta.get_field(name)
+            if field.is_relation:
+                key.append(self.resolve(field.related_model, part))
+            else:
+                key.append(_to_python(field, part))
+        key = tuple(key)
+
+        if key in self._pending_keys[label]:
+            self.flush(label)
+        pk = self._load_keys(label).get(key)
+        if pk is None:
+            raise RecordError(f"{label} {value!r} does not exist")
+        return pk
+
+    # Records
+
+    def add(self, number, record):
+        label = str(record.get("model", "")).lower()
+        if label not in NATURAL_KEYS:
+            self.skipped[label] += 1
+            return
+        try:
+            obj, m2m = self._build(label, record)
+            if label == TICKET:
+                if obj.flight_id is None:
+                    raise RecordError("ticket without a flight")
+                obj.pk = None
+            else:
+                self._match_existing(label, obj)
+            if (
+                label == FLIGHT
+                and None not in (obj.departure_time, obj.arrival_time)
+                and obj.arrival_time - obj.departure_time > Flight.max_duration()
+            ):
+                raise RecordError(
+                    Flight.TOO_LONG_MESSAGE.format(hours=settings.MAX_FLIGHT_HOURS)
+                )
+        except (RecordError, ValidationError, FieldDoesNotExist, ValueError) as exc:
+            message = exc.messages if isinstance(exc, ValidationError) else exc
+            self._error(number, label, message)
+            return
+
+        self._pending[label].append((number, obj, m2m))
+        if len(self._pending[label]) >= self.batch_size:
+            self.flush(label)
+
+    def _build(self, label, record):
+        model = apps.get_model(label)
+        values, m2m = {}, {}
+        computed = COMPUTED_FIELDS.get(label, ())
+        for name, value in record.get("fields", {}).items():
+            field = model._meta.get_field(name)
+            if name in computed:
+                continue
+            if field.many_to_many:
+                m2m[field] = [self.resolve(field.related_model, item) for item in value]
+            elif field.is_relation:
+                values[field.attname] = self.resolve(field.related_model, value)
+            else:
+                values[field.attname] = _to_python(field, value)
+        obj = model(**values)
+        if record.get("pk") is not None:
+            obj.pk = model._meta.pk.to_python(record["pk"])
+        if label != TICKET:
+            # Relations are resolved above; stored file paths are not uploads
+            obj.clean_fields(
+                exclude=[
+                    field.name
+                    for field in model._meta.fields
+                    if field.is_relation or isinstance(field, models.FileField)
+                ]
+            )
+        return obj, m2m
+
+    def _match_existing(self, label, obj):
+        """Take the pk of the row with the same natural key, if there is one"""
+        keys = self._load_keys(label)
+        key = self._key_of(label, obj)
+        # e.g. orders without created_at: nothing to match, always inserted
+        if None not in key:
+            if key in self._pending_keys[label]:
+                raise RecordError(f"duplicate of an earlier record {key!r}")
+            existing = keys.get(key)
+            if existing is not None:
+                if obj.pk is not None and obj.pk != existing:
+                    raise RecordError(f"{key!r} already exists with pk {existing}")
+                obj.pk = existing
+            self._pending_keys[label].add(key)
+        if obj.pk is not None and obj.pk in self._pks[label] and not self.upsert:
+            raise RecordError(f"pk {obj.pk} already exists (use --upsert)")
+
+    # Writes
+
+    def flush(self, label):
+        """Write the pending rows of ``label`` after those of the models before it"""
+        for parent in NATURAL_KEYS:
+            if parent == label:
+                break
+            if self._pending[parent]:
+                self.flush(parent)
+        pending, self._pending[label] = self._pending[label], []
+        if not pending:
+            return
+        if label == TICKET:
+            self._write_tickets(pending)
+        else:
+            self._write(label, pending)
+
+    def _write(self, label, pending):
+        model = apps.get_model(label)
+        objs = [obj for _, obj, _ in pending]
+        existing_pks = self._pks[label]
+        overwritten = [obj.pk for obj in objs if obj.pk in existing_pks]
+        updated = len(overwritten)
+        self._updated_pks[label].update(overwritten)
+        auto_now = [
+            field
+            for field in model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+            or getattr(field, "auto_now_add", False)
+        ]
+        now = timezone.now()
+        for obj in objs:
+            for field in auto_now:
+                if getattr(obj, field.attname) is None:
+                    setattr(obj, field.attname, now)
+
+        with_pk = [obj for obj in objs if obj.pk is not None]
+        without_pk = [obj for obj in objs if obj.pk is None]
+        if with_pk:
+            options = {}
+            if self.upsert:
+                options = {
+                    "update_conflicts": True,
+                    "unique_fields": [model._meta.pk.name],
+                    "update_fields": [
+                        field.name
+                        for field in model._meta.concrete_fields
+                        if not field.primary_key
+                        and field.name not in COMPUTED_FIELDS.get(label, ())
+                    ],
+                }
+        with imported_timestamps(auto_now):
+            if with_pk:
+                model._default_manager.bulk_create(with_pk, **options)
+            if without_pk:
+                model._default_manager.bulk_create(without_pk)
+        if with_pk:
+            self._explicit_pks.add(label)
+        if overwritten and label in (AIRPLANE, FLIGHT):
+            self._rebuild_seat_maps(label, overwritten)
+
+        many_to_many = defaultdict(list)
+        for number, obj, m2m in pending:
+            if label == FLIGHT:
+                self._imported_flights[obj.pk] = number
+            self._keys[label][self._key_of(label, obj)] = obj.pk
+            existing_pks.add(obj.pk)
+            for field, ids in m2m.items():
+                many_to_many[field].append((obj.pk, ids))
+        self._pending_keys[label].clear()
+        for field, rows in many_to_many.items():
+            through = field.remote_field.through
+            source = field.m2m_field_name() + "_id"
+            target = field.m2m_reverse_field_name() + "_id"
+            through._default_manager.filter(
+                **{f"{source}__in": [pk for pk, _ in rows]}
+            ).delete()
+            through._default_manager.bulk_create(
+                [
+                    through(**{source: pk, target: target_id})
+                    for pk, ids in rows
+                    for target_id in ids
+                ],
+                ignore_conflicts=True,
+            )
+
+        self.created[label] += len(objs) - updated
+        self.updated[label] += updated
+
+    # Bookings
+
+    def _booked_intervals(self):
+        """Intervals of the imported flights' airplanes and crew.
+
+        Every flight of those resources in the air during the imported
+        span, as ``(resource, departure, arrival, flight pk)``.
+        """
+        imported = list(self._imported_flights)
+        airplanes, crew = set(), set()
+        start = end = None
+        for offset in range(0, len(imported), self.batch_size):
+            pks = imported[offset : offset + self.batch_size]
+            for airplane, departure, arrival in Flight.objects.filter(
+                pk__in=pks
+            ).values_list("airplane_id", "departure_time", "arrival_time"):
+                if airplane is not None:
+                    airplanes.add(airplane)
+                start = departure if start is None else min(start, departure)
+                end = arrival if end is None else max(end, arrival)
+            crew.update(
+                Flight.crew.through.objects.filter(flight_id__in=pks).values_list(
+                    "crew_id", flat=True
+                )
+            )
+
+        flights = Flight.objects.filter(departure_time__lt=end, arrival_time__gt=start)
+        for airplane, departure, arrival, pk in flights.filter(
+            airplane_id__in=airplanes
+        ).values_list("airplane_id", "departure_time", "arrival_time", "pk"):
+            yield ("airplane", airplane), departure, arrival, pk
+        for member, departure, arrival, pk in Flight.crew.through.objects.filter(
+            crew_id__in=crew, flight__in=flights
+        ).values_list(
+            "crew_id", "flight__departure_time", "flight__arrival_time", "flight_id"
+        ):
+            yield ("crew member", member), departure, arrival, pk
+
+    def _check_bookings(self):
+        if not self._imported_flights:
+            return
+        for (resource, resource_pk), earlier, later in overlapping_pairs(
+            self._booked_intervals()
+        ):
+            # Report on the imported flight of the pair, the later one if both
+            number = self._imported_flights.get(later[2])
+            other = earlier
+            if number is None:
+                number, other = self._imported_flights.get(earlier[2]), later
+            if number is None:
+                continue
+            self._error(
+                number,
+                FLIGHT,
+                f"{resource} {resource_pk} is already booked for flight {other[2]}"
+                f" from {other[0]:%Y-%m-%d %H:%M} to {other[1]:%Y-%m-%d %H:%M}",
+            )
+
+    def _load_seat_maps(self, flight_ids):
+        missing = [pk for pk in flight_ids if pk not in self._seat_maps]
+        flights = Flight.objects.filter(pk__in=missing).values_list(
+            "pk", "airplane__rows", "airplane__seats_in_row", "seat_bitmap"
+        )
+        for pk, rows, seats_in_row, bitmap in flights:
+            if rows is not None:
+                self._seat_maps[pk] = SeatMap(rows, seats_in_row, bitmap)
+                self._imported_seats[pk] = SeatMap(rows, seats_in_row)
+
+    def _rebuild_seat_maps(self, label, pks):
+        """Repack flights an upsert may have moved to another seat geometry"""
+        lookup = "flight__airplane_id__in" if label == AIRPLANE else "flight_id__in"
+        flights = (
+            Ticket.objects.filter(**{lookup: pks})
+            .order_by()
+            .values_list("flight_id", flat=True)
+            .distinct()
+        )
+        for flight in Flight.rebuild_seats(flights):
+            # Reloaded with the new geometry by the next ticket batch
+            self._seat_maps.pop(flight.pk, None)
+            self._imported_seats.pop(flight.pk, None)
+            self._dirty_flights.discard(flight.pk)
+
+    def _write_tickets(self, pending):
+        self._load_seat_maps({obj.flight_id for _, obj, _ in pending})
+        tickets = []
+        updated = 0
+        for number, ticket, _ in pending:
+            seat_map = self._seat_maps.get(ticket.flight_id)
+            if seat_map is None:
+                self._error(number, TICKET, "flight missing or without an airplane")
+                continue
+            if not seat_map.contains(ticket.row, ticket.seat):
+                self._error(
+                    number,
+                    TICKET,
+                    f"row {ticket.row}, seat {ticket.seat} is outside "
+                    f"{seat_map.rows}x{seat_map.seats_in_row}",
+                )
+                continue
+            imported = self._imported_seats[ticket.flight_id]
+            if imported.is_taken(ticket.row, ticket.seat):
+                self._error(number, TICKET, "seat appears twice in the input")
+                continue
+            imported.take(ticket.row, ticket.seat)
+            if seat_map.is_taken(ticket.row, ticket.seat):
+                if not self.upsert:
+                    self._error(number, TICKET, "seat already taken (use --upsert)")
+                    continue
+                updated += 1
+            else:
+                seat_map.take(ticket.row, ticket.seat)
+                self._dirty_flights.add(ticket.flight_id)
+            tickets.append(ticket)
+
+        if self.errors or not tickets:
+            return
+        if self.upsert:
+            Ticket.objects.bulk_create(
+                tickets,
+                update_conflicts=True,
+                unique_fields=["flight", "row", "seat"],
+                update_fields=["order"],
+            )
+        elif self.use_copy:
+            self._copy_tickets(tickets)
+        else:
+            self._insert_tickets(tickets)
+        self.created[TICKET] += len(tickets) - updated
+        self.updated[TICKET] += updated
+
+    @staticmethod
+    def _insert_tickets(tickets):
+        """One prepared INSERT for the batch, skipping per-row ORM compilation"""
+        sql = f"INSERT INTO {_ticket_columns()} VALUES (%s, %s, %s, %s)"
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                sql,
+                [
+                    (ticket.row, ticket.seat, ticket.flight_id, ticket.order_id)
+                    for ticket in tickets
+                ],
+            )
+
+    @staticmethod
+    def _copy_tickets(tickets):
+        data = io.StringIO()
+        for ticket in tickets:
+            order = "\\N" if ticket.order_id is None else ticket.order_id
+            data.write(f"{ticket.row}\t{ticket.seat}\t{ticket.flight_id}\t{order}\n")
+        data.seek(0)
+        sql = f"COPY {_ticket_columns()} FROM STDIN"
+        with connection.cursor() as cursor:
+            if hasattr(cursor.cursor, "copy_expert"):  # psycopg2
+                cursor.cursor.copy_expert(sql, data)
+            else:  # psycopg 3
+                with cursor.cursor.copy(sql) as copy:
+                    copy.write(data.getvalue())
+
+    def _save_seat_maps(self):
+        flights = [
+            Flight(
+                pk=pk,
+                seat_bitmap=self._seat_maps[pk].to_bytes(),
+                tickets_sold=self._seat_maps[pk].count(),
+            )
+            for pk in self._dirty_flights
+        ]
+        Flight.objects.bulk_update(
+            flights, ["seat_bitmap", "tickets_sold"], batch_size=self.batch_size
+        )
+
+    def _refresh_summaries(self):
+        updated = self._updated_pks
+        flights = Flight.objects.filter(
+            Q(id__in=[*self._imported_flights, *self._imported_seats])
+            | Q(route_id__in=updated["airport.route"])
+            | Q(route__source_id__in=updated["airport.airport"])
+            | Q(route__destination_id__in=updated["airport.airport"])
+            | Q(airplane_id__in=updated["airport.airplane"])
+            | Q(crew__in=updated["airport.crew"])
+        ).values("id")
+        tickets = (
+            Ticket.objects.filter(flight_id__in=flights)
+            .only("id", "order_id", "row", "seat", "flight_id")
+            .order_by("id")
+            .iterator(chunk_size=self.batch_size)
+        )
+        while batch := list(islice(tickets, self.batch_size)):
+            OrderTicketSummary.refresh_tickets(batch)
+
+    def _reset_sequences(self):
+        """Explicit pks do not advance Postgres sequences, as in loaddata"""
+        models = [apps.get_model(label) for label in self._explicit_pks]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def _invalidate_caches(self):
+        # bulk writes skip the signals that keep these in step with the DB
+        route_graph.reset()
+        for label in CATALOG_MODELS:
+            if self.created[label] or self.updated[label]:
+                bump_model_version(apps.get_model(label))
@@ -0,0 +1,37 @@
+"""Overlap detection for resources booked over time intervals.
+
+Used to validate whole schedules at once: every resource's intervals are
+sorted by start and swept with a heap of the ones still open, which is
+O(n log n + conflicts) instead of comparing each interval with every
+other interval of its resource.
+"""
+
+import heapq
+from collections import defaultdict
+from itertools import count
+
+
+def overlapping_pairs(intervals):
+    """Yields ``(resource, a, b)`` for each two overlapping intervals.
+
+    ``intervals`` are ``(resource, start, end, item)`` tuples; intervals
+    are half-open, so one ending exactly when another starts is no
+    overlap. ``a`` and ``b`` are the ``(start, end, item)`` of the pair,
+    ``a`` starting first.
+    """
+    by_resource = defaultdict(list)
+    for resource, start, end, item in intervals:
+        by_resource[resource].append((start, end, item))
+
+    for resource, booked in by_resource.items():
+        booked.sort(key=lambda interval: interval[:2])
+        # (end, tiebreak, interval) of the intervals not ended yet
+        open_intervals = []
+        tiebreak = count()
+        for interval in booked:
+            start, end, _ = interval
+            while open_intervals and open_intervals[0][0] <= start:
+                heapq.heappop(open_intervals)
+            for _, _, earlier in open_intervals:
+                yield resource, earlier, interval
+            heapq.heappush(open_intervals, (end, next(tiebreak), interval))
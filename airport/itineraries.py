@@ -0,0 +1,261 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from airport.models import Flight, Route
+
+GRAPH_VERSION_KEY = "route-graph-version"
+
+
+@dataclass(frozen=True)
+class Itinerary:
+    flight_ids: tuple
+    departure_time: object
+    arrival_time: object
+    distance: int
+
+    @property
+    def duration(self) -> timedelta:
+        return self.arrival_time - self.departure_time
+
+
+class RouteGraph:
+    """Route adjacency and per-route departures kept in process memory.
+
+    The graph is loaded from the database on first use and patched by the
+    Route/Flight signal receivers in ``airport.signals``. Every change
+    bumps a version in the Django cache, like the response cache of
+    ``airport.cache``; a process whose graph was loaded at another version
+    missed a change made elsewhere and reloads it. The version expires
+    after ``ROUTE_GRAPH_TTL``, so a graph is reloaded at least that often
+    even when the cache is not shared between workers. Writes that bypass
+    signals (``bulk_create``, ``QuerySet.update``) must call ``reset()``.
+    Departed flights are never added, and are dropped from a route's
+    departures whenever the route is patched.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._version = None
+        self.routes = {}
+        self.routes_from = defaultdict(set)
+        self.flights = {}
+        self.departures = defaultdict(list)
+
+    def _clear(self):
+        self.routes.clear()
+        self.routes_from.clear()
+        self.flights.clear()
+        self.departures.clear()
+
+    def reset(self):
+        with self._lock:
+            self._loaded = False
+            self._clear()
+            self._changed()
+
+    def _shared_version(self):
+        version = cache.get(GRAPH_VERSION_KEY)
+        if version is None:
+            # A fresh timestamp never repeats a version lost to eviction
+            cache.add(
+                GRAPH_VERSION_KEY, time.time_ns(), timeout=settings.ROUTE_GRAPH_TTL
+            )
+            version = cache.get(GRAPH_VERSION_KEY)
+        return version
+
+    def _changed(self):
+        """Bumps the shared version; the graph stays loaded only if it was current"""
+        try:
+            version = cache.incr(GRAPH_VERSION_KEY)
+        except ValueError:
+            cache.set(
+                GRAPH_VERSION_KEY, time.time_ns(), timeout=settings.ROUTE_GRAPH_TTL
+            )
+            version = None
+        if self._loaded and version is not None and version == self._version + 1:
+            self._version = version
+        else:
+            self._loaded = False
+
+    def _ensure_loaded(self):
+        version = self._shared_version()
+        if self._loaded and version == self._version:
+            return
+        with self._lock:
+            if self._loaded and version == self._version:
+                return
+            self._clear()
+            routes = Route.objects.values_list(
+                "id", "source_id", "destination_id", "distance"
+            )
+            for route_id, source_id, destination_id, distance in routes:
+                self._add_route(route_id, source_id, destination_id, distance)
+            flights = Flight.objects.filter(
+                route__isnull=False, departure_time__gte=timezone.now()
+            ).values_list("id", "route_id", "departure_time", "arrival_time")
+            for flight_id, route_id, departure_time, arrival_time in flights:
+                self._add_flight(flight_id, route_id, departure_time, arrival_time)
+            self._version = version
+            self._loaded = True
+
+    def _add_route(self, route_id, source_id, destination_id, distance):
+        if source_id is None or destination_id is None:
+            return
+        self.routes[route_id] = (source_id, destination_id, distance)
+        self.routes_from[source_id].add(route_id)
+
+    def _remove_route(self, route_id, keep_flights=False):
+        source_id, _, _ = self.routes.pop(route_id, (None, None, None))
+        self.routes_from.get(source_id, set()).discard(route_id)
+        if not keep_flights:
+            for _, _, flight_id in self.departures.pop(route_id, []):
+                self.flights.pop(flight_id, None)
+
+    def _add_flight(self, flight_id, route_id, departure_time, arrival_time):
+        if route_id is None:
+            return
+        self.flights[flight_id] = (route_id, departure_time, arrival_time)
+        insort(self.departures[route_id], (departure_time, arrival_time, flight_id))
+
+    def _remove_flight(self, flight_id):
+        flight = self.flights.pop(flight_id, None)
+        if flight is None:
+            return
+        route_id, departure_time, arrival_time = flight
+        departures = self.departures[route_id]
+        index = bisect_left(departures, (departure_time, arrival_time, flight_id))
+        if index < len(departures) and departures[index][2] == flight_id:
+            del departures[index]
+
+    def _drop_departed(self, route_id, now):
+        departures = self.departures.get(route_id)
+        if not departures:
+            return
+        index = bisect_left(departures, (now,))
+        for _, _, flight_id in departures[:index]:
+            self.flights.pop(flight_id, None)
+        del departures[:index]
+
+    def update_route(self, route_id, source_id, destination_id, distance):
+        with self._lock:
+            if self._loaded:
+                self._remove_route(route_id, keep_flights=True)
+                self._add_route(route_id, source_id, destination_id, distance)
+            self._changed()
+
+    def remove_route(self, route_id):
+        with self._lock:
+            if self._loaded:
+                self._remove_route(route_id)
+            self._changed()
+
+    def update_flight(self, flight_id, route_id, departure_time, arrival_time):
+        with self._lock:
+            if self._loaded:
+                now = timezone.now()
+                self._remove_flight(flight_id)
+                self._drop_departed(route_id, now)
+                if departure_time >= now:
+                    self._add_flight(flight_id, route_id, departure_time, arrival_time)
+            self._changed()
+
+    def remove_flight(self, flight_id):
+        with self._lock:
+            if self._loaded:
+                self._remove_flight(flight_id)
+            self._changed()
+
+    def _next_legs(self, airport_id, earliest, latest):
+        """(departure, arrival, flight_id, destination_id, distance) leaving airport_id"""
+        for route_id in self.routes_from.get(airport_id, ()):
+            _, destination_id, distance = self.routes[route_id]
+            departures = self.departures.get(route_id, ())
+            index = bisect_left(departures, (earliest,))
+            while index < len(departures) and departures[index][0] <= latest:
+                departure_time, arrival_time, flight_id = departures[index]
+                yield departure_time, arrival_time, flight_id, destination_id, distance
+                index += 1
+
+    def find(
+        self,
+        source_id,
+        destination_id,
+        departure_after,
+        departure_before,
+        max_legs=3,
+        limit=5,
+        min_connection=timedelta(minutes=45),
+        max_connection=timedelta(hours=24),
+    ):
+        """Best itineraries by arrival time, then duration, then fewer legs.
+
+        Depth-first search over at most ``max_legs`` flights; a branch is
+        cut as soon as it cannot arrive before the worst itinerary kept.
+        """
+        self._ensure_loaded()
+        best = []
+
+        def worst_arrival():
+            return -best[0][0][0] if len(best) == limit else None
+
+        def visit(airport_id, legs, visited, earliest, latest, distance):
+            legs_by_arrival = sorted(
+                self._next_legs(airport_id, earliest, latest), key=lambda leg: leg[1]
+            )
+            for (
+                departure,
+                arrival,
+                flight_id,
+                next_airport,
+                leg_distance,
+            ) in legs_by_arrival:
+                cutoff = worst_arrival()
+                if cutoff is not None and arrival.timestamp() > cutoff:
+                    break
+                if next_airport in visited:
+                    continue
+                path = legs + [(flight_id, departure, arrival)]
+                if next_airport == destination_id:
+                    itinerary = Itinerary(
+                        flight_ids=tuple(leg[0] for leg in path),
+                        departure_time=path[0][1],
+                        arrival_time=arrival,
+                        distance=distance + leg_distance,
+                    )
+                    key = (
+                        -arrival.timestamp(),
+                        -itinerary.duration.total_seconds(),
+                        -len(path),
+                    )
+                    heapq.heappush(best, (key, itinerary.flight_ids, itinerary))
+                    if len(best) > limit:
+                        heapq.heappop(best)
+                elif len(path) < max_legs:
+                    visit(
+                        next_airport,
+                        path,
+                        visited | {next_airport},
+                        arrival + min_connection,
+                        arrival + max_connection,
+                        distance + leg_distance,
+                    )
+
+        with self._lock:
+            visit(source_id, [], {source_id}, departure_after, departure_before, 0)
+        return [
+            itinerary
+            for _, _, itinerary in sorted(best, key=lambda item: item[0], reverse=True)
+        ]
+
+
+route_graph = RouteGraph()
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:50
+
+from itertools import groupby
+
+from django.db import migrations, models
+
+
+def pack_seats(rows, seats_in_row, seats):
+    """The SeatMap layout: row-major from (1, 1), most significant bit first"""
+    data = bytearray((rows * seats_in_row + 7) // 8)
+    for row, seat in seats:
+        if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+            index = (row - 1) * seats_in_row + seat - 1
+            data[index >> 3] |= 0x80 >> (index & 7)
+    return bytes(data)
+
+
+def fill_seat_bitmaps(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+    flights = Flight.objects.filter(airplane__isnull=False).select_related("airplane")
+    dimensions = {
+        flight.id: (flight.airplane.rows, flight.airplane.seats_in_row)
+        for flight in flights
+    }
+    tickets = (
+        Ticket.objects.filter(flight_id__in=dimensions)
+        .order_by("flight_id")
+        .values_list("flight_id", "row", "seat")
+    )
+    for flight_id, seats in groupby(tickets, key=lambda ticket: ticket[0]):
+        bitmap = pack_seats(
+            *dimensions[flight_id], [(row, seat) for _, row, seat in seats]
+        )
+        Flight.objects.filter(pk=flight_id).update(seat_bitmap=bitmap)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0005_flight_tickets_sold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="seat_bitmap",
+            field=models.BinaryField(default=b""),
+        ),
+        migrations.RunPython(fill_seat_bitmaps, migrations.RunPython.noop),
+    ]
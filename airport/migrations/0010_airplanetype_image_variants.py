@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0009_flight_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="airplanetype",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0011_flight_airplane_departure_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["customer", "created_at", "id"],
+                name="order_customer_created_idx",
+            ),
+        ),
+    ]
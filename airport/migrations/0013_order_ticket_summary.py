@@ -0,0 +1,120 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:00
+
+from itertools import islice
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FLIGHT_FIELDS = {
+    "route_id": "route_id",
+    "source_name": "route__source__name",
+    "destination_name": "route__destination__name",
+    "distance": "route__distance",
+    "airplane_name": "airplane__name",
+    "departure_time": "departure_time",
+    "arrival_time": "arrival_time",
+}
+
+
+def fill_order_summaries(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+    OrderTicketSummary = apps.get_model("airport", "OrderTicketSummary")
+    tickets = (
+        Ticket.objects.order_by("id")
+        .values_list("id", "order_id", "row", "seat", "flight_id")
+        .iterator(chunk_size=5000)
+    )
+    while batch := list(islice(tickets, 5000)):
+        flights = {}
+        for flight_id, *values in Flight.objects.filter(
+            id__in={ticket[4] for ticket in batch}
+        ).values_list("id", *FLIGHT_FIELDS.values()):
+            flights[flight_id] = dict(zip(FLIGHT_FIELDS, values), crew_names=[])
+        for flight_id, first_name, last_name in (
+            Flight.crew.through.objects.filter(flight_id__in=list(flights))
+            .order_by("crew_id")
+            .values_list("flight_id", "crew__first_name", "crew__last_name")
+        ):
+            flights[flight_id]["crew_names"].append(f"{first_name} {last_name}")
+        OrderTicketSummary.objects.bulk_create(
+            OrderTicketSummary(
+                ticket_id=ticket_id,
+                order_id=order_id,
+                row=row,
+                seat=seat,
+                flight_id=flight_id,
+                **flights.get(flight_id, {}),
+            )
+            for ticket_id, order_id, row, seat, flight_id in batch
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0012_order_customer_created_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderTicketSummary",
+            fields=[
+                (
+                    "ticket",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="airport.ticket",
+                    ),
+                ),
+                ("row", models.IntegerField()),
+                ("seat", models.IntegerField()),
+                ("source_name", models.CharField(max_length=255, null=True)),
+                ("destination_name", models.CharField(max_length=255, null=True)),
+                ("distance", models.IntegerField(null=True)),
+                ("airplane_name", models.CharField(max_length=255, null=True)),
+                ("crew_names", models.JSONField(default=list)),
+                ("departure_time", models.DateTimeField(null=True)),
+                ("arrival_time", models.DateTimeField(null=True)),
+                (
+                    "flight",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="airport.flight",
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ticket_summaries",
+                        to="airport.order",
+                    ),
+                ),
+                (
+                    "route",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="airport.route",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["order", "row", "seat"], name="summary_order_seat_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_order_summaries, migrations.RunPython.noop),
+    ]
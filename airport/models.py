@@ -1,9 +1,16 @@
-from django.db import models
+from django.db import connection, models, transaction
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 import os
 import uuid
+from collections import defaultdict
+from datetime import timedelta
+from django.utils import timezone
 from django.utils.text import slugify
 
+from airport.seat_map import SeatMap
+
 
 # Create your models here.
 class Airport(models.Model):
@@ -39,6 +46,13 @@ class Route(models.Model):
             f"{self.destination.name} ({self.distance} km)"
         )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["source", "destination"], name="route_source_dest_idx"
+            ),
+        ]
+
 
 class Crew(models.Model):
     id = models.AutoField(primary_key=True)
@@ -64,12 +78,16 @@ class AirplaneType(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255)
     image = models.ImageField(null=True, upload_to=movie_image_file_path)
+    # {"source": image name, format: {width: variant name}}, see airport.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.name
 
 
 class Airplane(models.Model):
+    SEATS_BOOKED_MESSAGE = "Booked seats do not fit in {rows} rows of {seats} seats."
+
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255)
     rows = models.IntegerField()
@@ -83,8 +101,40 @@ class Airplane(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def seats_booked_outside(cls, tickets, rows, seats_in_row):
+        """Error message if any of ``tickets`` lies outside rows x seats_in_row"""
+        outside = models.Q(row__gt=rows) | models.Q(seat__gt=seats_in_row)
+        if tickets.filter(outside).exists():
+            return cls.SEATS_BOOKED_MESSAGE.format(rows=rows, seats=seats_in_row)
+        return None
+
+    def save(self, *args, **kwargs):
+        previous = None
+        if not self._state.adding:
+            previous = (
+                Airplane.objects.filter(pk=self.pk)
+                .values_list("rows", "seats_in_row")
+                .first()
+            )
+
+        if previous is None or previous == (self.rows, self.seats_in_row):
+            return super().save(*args, **kwargs)
+        # The seat bitmaps of its flights are packed for the old geometry
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            Flight.rebuild_seats(
+                Ticket.objects.filter(flight__airplane=self)
+                .order_by()
+                .values_list("flight_id", flat=True)
+                .distinct()
+            )
+
 
 class Flight(models.Model):
+    BOOKED_MESSAGE = "{resource} is already booked for flight {pk}."
+    TOO_LONG_MESSAGE = "Flights last at most {hours} hours."
+
     id = models.AutoField(primary_key=True)
     route = models.ForeignKey("Route", on_delete=models.CASCADE, null=True, blank=True)
     airplane = models.ForeignKey(
@@ -93,6 +143,8 @@ class Flight(models.Model):
     crew = models.ManyToManyField("Crew", blank=True)
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    tickets_sold = models.IntegerField(default=0, editable=False)
+    seat_bitmap = models.BinaryField(default=b"", editable=False)
 
     def __str__(self):
         return (
@@ -100,6 +152,210 @@ class Flight(models.Model):
             f" {self.departure_time.strftime('%Y-%m-%d %H:%M')}"
         )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["departure_time", "id"], name="flight_departure_id_idx"
+            ),
+            models.Index(
+                fields=["route", "departure_time"], name="flight_route_departure_idx"
+            ),
+            models.Index(
+                fields=["airplane", "departure_time"],
+                name="flight_airplane_departure_idx",
+            ),
+        ]
+
+    @property
+    def seats_available(self) -> int:
+        return self.airplane.capacity - self.tickets_sold
+
+    @property
+    def seat_map(self) -> SeatMap:
+        return SeatMap(self.airplane.rows, self.airplane.seats_in_row, self.seat_bitmap)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        moved = False
+        if not self._state.adding and (
+            update_fields is None or "airplane" in update_fields
+        ):
+            previous = (
+                Flight.objects.filter(pk=self.pk)
+                .values_list("airplane_id", flat=True)
+                .first()
+            )
+            moved = previous != self.airplane_id
+
+        if not moved:
+            return super().save(*args, **kwargs)
+        # Another airplane has another seat geometry: repack the tickets
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            (flight,) = Flight.rebuild_seats([self.pk])
+            self.tickets_sold = flight.tickets_sold
+            self.seat_bitmap = flight.seat_bitmap
+
+    @staticmethod
+    def pack_seats(airplane, seats):
+        """Seat bitmap of (row, seat) pairs, those outside the airplane left out"""
+        if airplane is None:
+            return b""
+        seat_map = SeatMap(airplane.rows, airplane.seats_in_row)
+        for row, seat in seats:
+            if seat_map.contains(row, seat):
+                seat_map.take(row, seat)
+        return seat_map.to_bytes()
+
+    @classmethod
+    def rebuild_seats(cls, flight_ids):
+        """Recount and repack the seats of the flights from their tickets.
+
+        Flights are locked as for a seat change, so the rebuilt data cannot
+        race with orders.
+        """
+        with transaction.atomic():
+            flights = cls.lock_for_seat_change(list(flight_ids))
+            seats = defaultdict(list)
+            for flight_id, row, seat in Ticket.objects.filter(
+                flight_id__in=[flight.pk for flight in flights]
+            ).values_list("flight_id", "row", "seat"):
+                seats[flight_id].append((row, seat))
+            for flight in flights:
+                flight.tickets_sold = len(seats[flight.pk])
+                flight.seat_bitmap = cls.pack_seats(flight.airplane, seats[flight.pk])
+            cls.objects.bulk_update(flights, ["tickets_sold", "seat_bitmap"])
+        return flights
+
+    @classmethod
+    def crew_rows(cls, flight_ids):
+        """(flight_id, first_name, last_name) of the flights' crew, by crew id"""
+        return (
+            cls.crew.through.objects.filter(flight_id__in=flight_ids)
+            .order_by("crew_id")
+            .values_list("flight_id", "crew__first_name", "crew__last_name")
+        )
+
+    @staticmethod
+    def limit_lock_wait():
+        """Row locks of the transaction wait at most SEAT_LOCK_TIMEOUT_MS"""
+        if connection.vendor == "postgresql" and settings.SEAT_LOCK_TIMEOUT_MS:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SET LOCAL lock_timeout = %s",
+                    [f"{settings.SEAT_LOCK_TIMEOUT_MS}ms"],
+                )
+
+    @classmethod
+    def lock_for_seat_change(cls, flight_ids):
+        """Lock flight rows in id order, waiting at most SEAT_LOCK_TIMEOUT_MS"""
+        cls.limit_lock_wait()
+        return list(
+            cls.objects.select_for_update(of=("self",))
+            .select_related("airplane")
+            .filter(pk__in=flight_ids)
+            .order_by("pk")
+        )
+
+    @classmethod
+    def booking_conflicts(
+        cls,
+        departure_time,
+        arrival_time,
+        airplane_id=None,
+        crew_ids=(),
+        exclude=None,
+        lock=False,
+    ):
+        """Errors for the airplane or crew already booked during the window.
+
+        Any flight departing before ``arrival_time`` and landing after
+        ``departure_time`` overlaps the window. No flight lasts longer than
+        ``max_duration()``, so overlapping ones depart after
+        ``departure_time`` minus that: a bounded range of the ``(airplane,
+        departure_time)`` index. A crew member's flights are found through
+        the crew index of the ``crew`` table. Existing flights may overlap
+        each other (imported data, the generated scale data), so every
+        overlapping one is considered, not just the latest.
+
+        With ``lock`` the airplane and crew rows are locked first, until
+        the transaction ends, and the overlaps are read by later
+        statements: under READ COMMITTED they see the flights of the
+        transaction that held the lock before.
+        """
+        overlapping = cls.objects.filter(
+            departure_time__gt=departure_time - cls.max_duration(),
+            departure_time__lt=arrival_time,
+            arrival_time__gt=departure_time,
+        ).exclude(pk=exclude)
+        airplanes = Airplane.objects.none()
+        if airplane_id is not None:
+            airplanes = Airplane.objects.filter(pk=airplane_id)
+        crew = Crew.objects.filter(pk__in=crew_ids).order_by("pk")
+        if lock:
+            airplanes = airplanes.select_for_update()
+            crew = crew.select_for_update()
+        airplanes = list(airplanes)
+        crew = list(crew) if crew_ids else []
+
+        booked = []
+        if airplanes:
+            flight = (
+                overlapping.filter(airplane_id=airplane_id)
+                .values_list("pk", flat=True)
+                .first()
+            )
+            booked.append(("airplane", "Airplane", [(airplanes[0], flight)]))
+        if crew:
+            flights = {}
+            for member_id, flight in cls.crew.through.objects.filter(
+                crew_id__in=[member.pk for member in crew], flight__in=overlapping
+            ).values_list("crew_id", "flight_id"):
+                flights.setdefault(member_id, flight)
+            booked.append(
+                (
+                    "crew",
+                    "Crew member",
+                    [(member, flights.get(member.pk)) for member in crew],
+                )
+            )
+
+        errors = {}
+        for field, label, resources in booked:
+            messages = [
+                cls.BOOKED_MESSAGE.format(resource=f"{label} {resource}", pk=flight)
+                for resource, flight in resources
+                if flight is not None
+            ]
+            if messages:
+                errors[field] = messages
+        return errors
+
+    @staticmethod
+    def max_duration():
+        return timedelta(hours=settings.MAX_FLIGHT_HOURS)
+
+    @classmethod
+    def change_seats(cls, flight_id, taken=(), released=()):
+        """Mark seats taken/released under a row lock in the caller's transaction"""
+        if flight_id is None or not (taken or released):
+            return
+        flights = cls.lock_for_seat_change([flight_id])
+        if not flights:
+            return
+        flight = flights[0]
+
+        flight.tickets_sold += len(taken) - len(released)
+        if flight.airplane is not None:
+            seat_map = flight.seat_map
+            for row, seat in released:
+                if seat_map.contains(row, seat):
+                    seat_map.release(row, seat)
+            for row, seat in taken:
+                seat_map.take(row, seat)
+            flight.seat_bitmap = seat_map.to_bytes()
+        flight.save(update_fields=["tickets_sold", "seat_bitmap"])
+
 
 class Order(models.Model):
     id = models.AutoField(primary_key=True)
@@ -116,6 +372,13 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="order_created_id_idx"),
+            models.Index(
+                fields=["customer", "created_at", "id"],
+                name="order_customer_created_idx",
+            ),
+        ]
 
 
 class Ticket(models.Model):
@@ -157,6 +420,87 @@ class Ticket(models.Model):
                     }
                 )
 
+    @classmethod
+    def bulk_create_for_flights(cls, tickets):
+        """Insert new tickets at once, keeping flight seat data exact.
+
+        The seat holds of the tickets are locked first. When every ticket
+        consumes a live hold of its customer, nobody else can take those
+        seats: the tickets are inserted without locking the flight, which
+        is only updated by the last statement (see ``_create_from_holds``).
+        Otherwise flights are locked in id order and every seat is checked
+        against the locked seat bitmap and active holds, so a seat taken
+        concurrently since validation raises ValidationError instead of an
+        IntegrityError.
+        """
+        tickets_by_flight = {}
+        for ticket in tickets:
+            tickets_by_flight.setdefault(ticket.flight_id, []).append(ticket)
+        seats = [(ticket.flight_id, ticket.row, ticket.seat) for ticket in tickets]
+
+        holds = SeatHold.lock_seats(seats)
+        now = timezone.now()
+        live = {seat: hold for seat, hold in holds.items() if hold.expires_at > now}
+        if len(set(seats)) == len(seats) and all(
+            seat in live
+            and ticket.order is not None
+            and live[seat].customer_id == ticket.order.customer_id
+            for ticket, seat in zip(tickets, seats)
+        ):
+            return cls._create_from_holds(tickets_by_flight, holds)
+
+        flights = Flight.lock_for_seat_change(tickets_by_flight)
+        for flight in flights:
+            seat_map = flight.seat_map
+            for ticket in tickets_by_flight[flight.id]:
+                cls.validate_ticket(
+                    ticket.row, ticket.seat, flight.airplane, ValidationError
+                )
+                if seat_map.is_taken(ticket.row, ticket.seat):
+                    raise ticket.unique_error_message(cls, ("flight", "row", "seat"))
+                hold = live.get((flight.id, ticket.row, ticket.seat))
+                if hold is not None and (
+                    ticket.order is None or hold.customer_id != ticket.order.customer_id
+                ):
+                    raise ValidationError(SeatHold.HELD_MESSAGE)
+                seat_map.take(ticket.row, ticket.seat)
+            flight.seat_bitmap = seat_map.to_bytes()
+            flight.tickets_sold += len(tickets_by_flight[flight.id])
+
+        Flight.objects.bulk_update(flights, ["tickets_sold", "seat_bitmap"])
+        # Own holds are consumed, expired ones on the seats are locked anyway
+        SeatHold.objects.filter(id__in=[hold.id for hold in holds.values()]).delete()
+        tickets = cls.objects.bulk_create(tickets)
+        OrderTicketSummary.create_for_tickets(tickets)
+        return tickets
+
+    @classmethod
+    def _create_from_holds(cls, tickets_by_flight, holds):
+        """Tickets of seats held by their customer, with the holds locked.
+
+        Holds were placed on free seats under the flight lock and no other
+        checkout takes a held seat, so nothing needs checking against the
+        flight. Only the seat counters are written, last, under a short
+        ``change_seats`` lock.
+        """
+        SeatHold.objects.filter(id__in=[hold.id for hold in holds.values()]).delete()
+        tickets = cls.objects.bulk_create(
+            [
+                ticket
+                for flight_tickets in tickets_by_flight.values()
+                for ticket in flight_tickets
+            ]
+        )
+        OrderTicketSummary.create_for_tickets(tickets)
+        for flight_id in sorted(tickets_by_flight):
+            Flight.change_seats(
+                flight_id,
+                taken=[
+                    (ticket.row, ticket.seat) for ticket in tickets_by_flight[flight_id]
+                ],
+            )
+        return tickets
+
     def clean(self):
         Ticket.validate_ticket(
             self.row,
@@ -174,6 +518,279 @@ class Ticket(models.Model):
         update_fields=None,
     ):
         self.full_clean()
-        return super(Ticket, self).save(
-            force_insert, force_update, using, update_fields
+        adding = self._state.adding
+        previous = None
+        if not adding:
+            previous = (
+                Ticket.objects.filter(pk=self.pk)
+                .values_list("flight_id", "row", "seat")
+                .first()
+            )
+
+        with transaction.atomic(using=using):
+            result = super(Ticket, self).save(
+                force_insert, force_update, using, update_fields
+            )
+            current = (self.flight_id, self.row, self.seat)
+            if previous is None:
+                Flight.change_seats(self.flight_id, taken=[current[1:]])
+            elif previous != current:
+                Flight.change_seats(previous[0], released=[previous[1:]])
+                Flight.change_seats(self.flight_id, taken=[current[1:]])
+        return result
+
+
+class OrderTicketSummary(models.Model):
+    """Read model of the orders list: one row per ticket, its flight flattened.
+
+    Written with the tickets and kept in step with flight, route, airport,
+    airplane and crew changes by ``airport.signals``. Bulk writers that
+    skip signals call ``create_for_tickets``/``refresh_tickets`` themselves,
+    ``rebuild_order_summaries`` reports and repairs any drift.
+    """
+
+    # Summary field -> Flight lookup it is copied from
+    FLIGHT_FIELDS = {
+        "route_id": "route_id",
+        "source_name": "route__source__name",
+        "destination_name": "route__destination__name",
+        "distance": "route__distance",
+        "airplane_name": "airplane__name",
+        "departure_time": "departure_time",
+        "arrival_time": "arrival_time",
+    }
+
+    ticket = models.OneToOneField(
+        "Ticket", on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    order = models.ForeignKey(
+        "Order",
+        on_delete=models.CASCADE,
+        null=True,
+        db_index=False,
+        related_name="ticket_summaries",
+    )
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    flight = models.ForeignKey(
+        "Flight", on_delete=models.CASCADE, null=True, related_name="+"
+    )
+    route = models.ForeignKey(
+        "Route", on_delete=models.CASCADE, null=True, related_name="+"
+    )
+    source_name = models.CharField(max_length=255, null=True)
+    destination_name = models.CharField(max_length=255, null=True)
+    distance = models.IntegerField(null=True)
+    airplane_name = models.CharField(max_length=255, null=True)
+    crew_names = models.JSONField(default=list)
+    departure_time = models.DateTimeField(null=True)
+    arrival_time = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"Summary of ticket {self.ticket_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["order", "row", "seat"], name="summary_order_seat_idx"
+            ),
+        ]
+
+    @classmethod
+    def flight_columns(cls, flight_ids):
+        """Summary fields of each flight, keyed by flight id"""
+        columns = {}
+        for flight_id, *values in (
+            Flight.objects.filter(id__in=flight_ids)
+            .order_by()
+            .values_list("id", *cls.FLIGHT_FIELDS.values())
+        ):
+            columns[flight_id] = dict(zip(cls.FLIGHT_FIELDS, values), crew_names=[])
+        for flight_id, first_name, last_name in Flight.crew_rows(list(columns)):
+            columns[flight_id]["crew_names"].append(f"{first_name} {last_name}")
+        return columns
+
+    @classmethod
+    def create_for_tickets(cls, tickets, batch_size=None):
+        """Summaries of saved tickets that have none yet"""
+        flights = cls.flight_columns(
+            {ticket.flight_id for ticket in tickets if ticket.flight_id is not None}
+        )
+        return cls.objects.bulk_create(
+            [
+                cls(
+                    ticket_id=ticket.pk,
+                    order_id=ticket.order_id,
+                    row=ticket.row,
+                    seat=ticket.seat,
+                    flight_id=ticket.flight_id,
+                    **flights.get(ticket.flight_id, {}),
+                )
+                for ticket in tickets
+            ],
+            batch_size=batch_size,
+        )
+
+    @classmethod
+    def refresh_tickets(cls, tickets):
+        """Rewrite the summaries of saved tickets"""
+        tickets = list(tickets)
+        cls.objects.filter(ticket_id__in=[ticket.pk for ticket in tickets]).delete()
+        return cls.create_for_tickets(tickets)
+
+    @classmethod
+    def refresh_flights(cls, flight_ids):
+        """Copy the current route, airplane, crew and times of the flights"""
+        flight_ids = (
+            cls.objects.filter(flight_id__in=flight_ids)
+            .order_by()
+            .values_list("flight_id", flat=True)
+            .distinct()
+        )
+        for flight_id, columns in cls.flight_columns(list(flight_ids)).items():
+            cls.objects.filter(flight_id=flight_id).update(**columns)
+
+
+class SeatHold(models.Model):
+    HELD_MESSAGE = "This seat is held by another customer."
+
+    id = models.AutoField(primary_key=True)
+    flight = models.ForeignKey(
+        "Flight", on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Hold of row {self.row}, seat {self.seat} until {self.expires_at}"
+
+    class Meta:
+        unique_together = ("flight", "row", "seat")
+        ordering = ["row", "seat"]
+
+    @classmethod
+    def active_holds(cls, flight_ids):
+        """Map (flight_id, row, seat) to (hold_id, customer_id) of live holds"""
+        holds = cls.objects.filter(
+            flight_id__in=flight_ids, expires_at__gt=timezone.now()
+        ).values_list("id", "flight_id", "row", "seat", "customer_id")
+        return {
+            (flight_id, row, seat): (hold_id, customer_id)
+            for hold_id, flight_id, row, seat, customer_id in holds
+        }
+
+    @classmethod
+    def lock_seats(cls, seats):
+        """Lock the holds, live or expired, of (flight_id, row, seat) seats.
+
+        Holds are locked in id order and always before their flight, so a
+        checkout consuming its holds never waits for a flight while others
+        wait for those holds. Maps each held seat to its hold.
+        """
+        if not seats:
+            return {}
+        Flight.limit_lock_wait()
+        query = models.Q()
+        for flight_id, row, seat in seats:
+            query |= models.Q(flight_id=flight_id, row=row, seat=seat)
+        holds = cls.objects.select_for_update().filter(query).order_by("id")
+        return {(hold.flight_id, hold.row, hold.seat): hold for hold in holds}
+
+    @classmethod
+    def place(cls, flight_id, customer, seats, minutes=None):
+        """Hold free seats of a flight for the customer, renewing own holds"""
+        minutes = minutes or settings.SEAT_HOLD_MINUTES
+        with transaction.atomic():
+            locked = cls.lock_seats([(flight_id, row, seat) for row, seat in seats])
+            flight = Flight.lock_for_seat_change([flight_id])[0]
+            now = timezone.now()
+            seat_map = flight.seat_map
+            holds = {
+                seat: hold for seat, hold in locked.items() if hold.expires_at > now
+            }
+            renewed = []
+            for row, seat in seats:
+                Ticket.validate_ticket(row, seat, flight.airplane, ValidationError)
+                if seat_map.is_taken(row, seat):
+                    raise ValidationError("This seat is already taken.")
+                hold = holds.get((flight.id, row, seat))
+                if hold is not None:
+                    if hold.customer_id != customer.pk:
+                        raise ValidationError(cls.HELD_MESSAGE)
+                    renewed.append(hold.id)
+
+            expires_at = now + timedelta(minutes=minutes)
+            cls.objects.filter(id__in=renewed).update(expires_at=expires_at)
+            # Expired holds locked by a checkout are left to the sweeper
+            expired = cls.objects.filter(
+                flight=flight, expires_at__lte=now
+            ).select_for_update(skip_locked=True)
+            cls.objects.filter(
+                id__in=list(expired.values_list("id", flat=True))
+            ).delete()
+            cls.objects.bulk_create(
+                [
+                    cls(
+                        flight=flight,
+                        customer=customer,
+                        row=row,
+                        seat=seat,
+                        expires_at=expires_at,
+                    )
+                    for row, seat in sorted(set(seats))
+                    if (flight.id, row, seat) not in holds
+                ]
+            )
+            return list(cls.objects.filter(flight=flight, customer=customer))
+
+
+class IdempotencyKey(models.Model):
+    """The stored response of a write sent with an ``Idempotency-Key`` header"""
+
+    REUSED_MESSAGE = "This Idempotency-Key was already used for another request."
+
+    id = models.AutoField(primary_key=True)
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    # sha256 of the request data, a reused key must come with the same request
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Idempotency key {self.key} until {self.expires_at}"
+
+    class Meta:
+        unique_together = ("customer", "key")
+
+    @classmethod
+    def claim(cls, customer, key, fingerprint):
+        """``(record, created)`` of the live key, run in the write's transaction.
+
+        The new row stays uncommitted until the write is done: a duplicate
+        request blocks on the unique index, then replays the stored response
+        if the first one committed or claims the key if it rolled back.
+        """
+        now = timezone.now()
+        cls.objects.filter(customer=customer, key=key, expires_at__lte=now).delete()
+        return cls.objects.get_or_create(
+            customer=customer,
+            key=key,
+            defaults={
+                "fingerprint": fingerprint,
+                "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_KEY_HOURS),
+            },
         )
@@ -0,0 +1,145 @@
+from asgiref.sync import sync_to_async
+from django.db import connections
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+def approximate_row_count(model, using="default"):
+    """Planner estimate of the table size instead of a COUNT(*) scan"""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return model._default_manager.using(using).count()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 until the table has been vacuumed or analyzed
+    return row[0] if row and row[0] >= 0 else None
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination that never counts rows unless asked to.
+
+    ``?count=approx`` adds a ``count`` estimate of the whole table
+    (filters are not taken into account). With ``count_queryset`` the
+    queryset itself is counted instead, for lists scoped to the user: the
+    table estimate would describe everyone's rows.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    count_query_param = "count"
+    count_queryset = False
+
+    def _count(self, queryset):
+        if self.count_queryset:
+            return queryset.count()
+        return approximate_row_count(queryset.model, queryset.db)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) == "approx":
+            self.count = self._count(queryset)
+        return self._set_page(list(self._page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, the page is read with ``async for``"""
+        self.count = None
+        if request.query_params.get(self.count_query_param) == "approx":
+            self.count = await sync_to_async(self._count)(queryset)
+        page = self._page_queryset(queryset, request, view)
+        return self._set_page([item async for item in page])
+
+    # CursorPagination.paginate_queryset split around the one query it runs,
+    # so the sync and async paths share the cursor logic.
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+        self._cursor_state = offset, reverse, current_position
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            order = self.ordering[0]
+            order_attr = order.lstrip("-")
+            if self.cursor.reverse != order.startswith("-"):
+                queryset = queryset.filter(**{order_attr + "__lt": current_position})
+            else:
+                queryset = queryset.filter(**{order_attr + "__gt": current_position})
+
+        # One extra row tells whether a following page exists
+        return queryset[offset : offset + self.page_size + 1]
+
+    def _set_page(self, results):
+        offset, reverse, current_position = self._cursor_state
+        self.page = results[: self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = {"count": self.count, **response.data}
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"] = {
+            "type": "integer",
+            "description": f"Approximate total, only with ?{self.count_query_param}=approx",
+        }
+        return response_schema
+
+
+class CatalogPagination(KeysetPagination):
+    ordering = "id"
+
+
+class FlightPagination(KeysetPagination):
+    ordering = ("departure_time", "id")
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+    # Orders are scoped to the customer, on the (customer, created_at) index
+    count_queryset = True
@@ -0,0 +1,269 @@
+from collections import defaultdict
+
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from airport.models import Flight, OrderTicketSummary
+from airport_service.metrics import timed
+
+
+class FlightRows:
+    """Builds FlightListSerializer output straight from ``.values()`` rows.
+
+    Crew names are loaded with one query per page. Given ``only``, rows
+    carry just the columns of those fields (plus the ``FlightPagination``
+    ordering) and nothing else is rendered.
+    """
+
+    fields = (
+        "id",
+        "route_id",
+        "route__source__name",
+        "route__destination__name",
+        "route__distance",
+        "airplane__name",
+        "departure_time",
+        "arrival_time",
+    )
+
+    # The .values() columns behind each FlightListSerializer field
+    field_columns = {
+        "id": ("id",),
+        "route": (
+            "route_id",
+            "route__source__name",
+            "route__destination__name",
+            "route__distance",
+        ),
+        "airplane": ("airplane__name",),
+        "crew": (),
+        "departure_time": ("departure_time",),
+        "arrival_time": ("arrival_time",),
+        "tickets_available": ("tickets_available",),
+    }
+
+    def __init__(self, only=None):
+        self.only = None if only is None else tuple(only)
+        self.columns = tuple(
+            dict.fromkeys(
+                ("id", "departure_time")
+                + sum((self.field_columns[field] for field in self.renders), ())
+            )
+        )
+        self.datetime = serializers.DateTimeField().to_representation
+
+    @property
+    def renders(self):
+        return tuple(self.field_columns) if self.only is None else self.only
+
+    @staticmethod
+    def _crew(flight_ids):
+        return Flight.crew_rows(flight_ids)
+
+    @classmethod
+    def crew_names(cls, flight_ids):
+        names = defaultdict(list)
+        for flight_id, first_name, last_name in cls._crew(flight_ids):
+            names[flight_id].append(f"{first_name} {last_name}")
+        return names
+
+    @classmethod
+    async def acrew_names(cls, flight_ids):
+        names = defaultdict(list)
+        async for flight_id, first_name, last_name in cls._crew(flight_ids):
+            names[flight_id].append(f"{first_name} {last_name}")
+        return names
+
+    def represent(self, row, crew_names):
+        (
+            flight_id,
+            route_id,
+            source,
+            destination,
+            distance,
+            airplane,
+            departure_time,
+            arrival_time,
+        ) = (row.get(column) for column in self.fields)
+        flight = {
+            "id": flight_id,
+            "route": (
+                None
+                if route_id is None
+                else {
+                    "id": route_id,
+                    "source": source,
+                    "destination": destination,
+                    "distance": distance,
+                }
+            ),
+            "airplane": airplane,
+            "crew": crew_names.get(flight_id, []),
+            "departure_time": self.datetime(departure_time),
+            "arrival_time": self.datetime(arrival_time),
+            "tickets_available": row.get("tickets_available"),
+        }
+        if self.only is None:
+            return flight
+        return {field: flight[field] for field in self.only}
+
+
+class FlightListRows:
+    """Fast equivalent of ``FlightListSerializer(many=True)``.
+
+    ``fields`` limits it to those serializer fields, crew names are only
+    queried when ``crew`` is one of them.
+    """
+
+    def __init__(self, fields=None):
+        self.flights = FlightRows(fields)
+
+    def rows(self, queryset):
+        return queryset.prefetch_related(None).values(*self.flights.columns)
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        crew_names = {}
+        if "crew" in self.flights.renders:
+            crew_names = self.flights.crew_names([row["id"] for row in rows])
+        return [self.flights.represent(row, crew_names) for row in rows]
+
+    async def ato_representation(self, rows):
+        """``to_representation`` for an already fetched page, from async code"""
+        crew_names = {}
+        if "crew" in self.flights.renders:
+            crew_names = await self.flights.acrew_names([row["id"] for row in rows])
+        return [self.flights.represent(row, crew_names) for row in rows]
+
+
+class OrderListRows:
+    """Fast equivalent of ``OrderListSerializer(many=True)``.
+
+    The tickets of the page come from ``OrderTicketSummary`` in one query on
+    its (order, row, seat) index. Like the nested serializers, ticket
+    flights carry no ``tickets_available``; each is rendered once per page.
+    Without ``tickets`` in ``fields`` the summaries are not read at all.
+    """
+
+    fields = (
+        "ticket_id",
+        "row",
+        "seat",
+        "order_id",
+        "flight_id",
+        "route_id",
+        "source_name",
+        "destination_name",
+        "distance",
+        "airplane_name",
+        "crew_names",
+        "departure_time",
+        "arrival_time",
+    )
+
+    def __init__(self, fields=None):
+        self.only = None if fields is None else tuple(fields)
+        self.datetime = serializers.DateTimeField().to_representation
+
+    def rows(self, queryset):
+        return queryset.prefetch_related(None).values("id", "created_at")
+
+    def tickets(self, rows):
+        """Ticket dicts of the orders of ``rows``, by order id"""
+        summaries = (
+            OrderTicketSummary.objects.filter(order_id__in=[row["id"] for row in rows])
+            .order_by("order_id", "row", "seat")
+            .values_list(*self.fields)
+        )
+
+        flights = {None: None}
+        tickets_by_order = defaultdict(list)
+        for summary in summaries:
+            ticket_id, row, seat, order_id, flight_id = summary[:5]
+            if flight_id not in flights:
+                flights[flight_id] = self.flight(summary)
+            tickets_by_order[order_id].append(
+                {
+                    "id": ticket_id,
+                    "row": row,
+                    "seat": seat,
+                    "flight": flights[flight_id],
+                    "order": order_id,
+                }
+            )
+        return tickets_by_order
+
+    def flight(self, summary):
+        (
+            flight_id,
+            route_id,
+            source,
+            destination,
+            distance,
+            airplane,
+            crew,
+            departure_time,
+            arrival_time,
+        ) = summary[4:]
+        return {
+            "id": flight_id,
+            "route": (
+                None
+                if route_id is None
+                else {
+                    "id": route_id,
+                    "source": source,
+                    "destination": destination,
+                    "distance": distance,
+                }
+            ),
+            "airplane": airplane,
+            "crew": crew,
+            "departure_time": self.datetime(departure_time),
+            "arrival_time": self.datetime(arrival_time),
+        }
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        if self.only is None or "tickets" in self.only:
+            tickets_by_order = self.tickets(rows)
+        else:
+            tickets_by_order = {}
+        orders = [
+            {
+                "id": row["id"],
+                "tickets": tickets_by_order.get(row["id"], []),
+                "created_at": self.datetime(row["created_at"]),
+            }
+            for row in rows
+        ]
+        if self.only is None:
+            return orders
+        return [{field: order[field] for field in self.only} for order in orders]
+
+
+class FastListMixin:
+    """Serves ``list`` through ``fast_list_class`` instead of the serializer.
+
+    The rows class must render exactly what ``get_serializer_class()``
+    renders for the list action (see ``test_row_serializers``). When
+    ``get_fast_list_reader()`` returns None the serializer is used.
+    """
+
+    fast_list_class = None
+
+    def get_fast_list_reader(self):
+        return self.fast_list_class()
+
+    def list(self, request, *args, **kwargs):
+        reader = None if self.fast_list_class is None else self.get_fast_list_reader()
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = reader.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        with timed("serialize"):
+            data = reader.to_representation(rows if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
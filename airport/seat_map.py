@@ -0,0 +1,79 @@
+import base64
+
+
+class SeatMap:
+    """Seat occupancy of a flight packed into one bit per seat.
+
+    Seats are numbered row-major starting from (1, 1); bit ``i`` is the
+    ``i % 8``-th most significant bit of byte ``i // 8``.
+    """
+
+    def __init__(self, rows, seats_in_row, data=b""):
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        size = (rows * seats_in_row + 7) // 8
+        self.data = bytearray(bytes(data or b"")[:size].ljust(size, b"\0"))
+
+    @property
+    def capacity(self) -> int:
+        return self.rows * self.seats_in_row
+
+    def contains(self, row, seat) -> bool:
+        return 1 <= row <= self.rows and 1 <= seat <= self.seats_in_row
+
+    def _position(self, row, seat):
+        if not self.contains(row, seat):
+            raise ValueError(f"Seat ({row}, {seat}) is outside the seat map")
+        index = (row - 1) * self.seats_in_row + seat - 1
+        return index >> 3, 0x80 >> (index & 7)
+
+    def is_taken(self, row, seat) -> bool:
+        byte, mask = self._position(row, seat)
+        return bool(self.data[byte] & mask)
+
+    def take(self, row, seat):
+        byte, mask = self._position(row, seat)
+        self.data[byte] |= mask
+
+    def release(self, row, seat):
+        byte, mask = self._position(row, seat)
+        self.data[byte] &= ~mask
+
+    def count(self) -> int:
+        return sum(byte.bit_count() for byte in self.data)
+
+    def taken_seats(self):
+        """Yield taken (row, seat) pairs in row, seat order"""
+        for byte_index, byte in enumerate(self.data):
+            if not byte:
+                continue
+            for bit in range(8):
+                if byte & (0x80 >> bit):
+                    row, seat = divmod(byte_index * 8 + bit, self.seats_in_row)
+                    yield row + 1, seat + 1
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.data)
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.data).decode("ascii")
+
+    def to_rle_rows(self):
+        """Per row, alternating run lengths of free and taken seats.
+
+        Every row starts with a (possibly zero) run of free seats,
+        e.g. ``[2, 1, 3]`` is two free seats, one taken, three free.
+        """
+        result = []
+        for row in range(1, self.rows + 1):
+            runs = []
+            current, length = False, 0
+            for seat in range(1, self.seats_in_row + 1):
+                taken = self.is_taken(row, seat)
+                if taken != current:
+                    runs.append(length)
+                    current, length = taken, 0
+                length += 1
+            runs.append(length)
+            result.append(runs)
+        return result
@@ -1,7 +1,14 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
 from django.db import transaction
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.relations import MANY_RELATION_KWARGS
+from rest_framework.validators import UniqueTogetherValidator
 
+from airport.images import image_too_large
 from airport.models import (
     Airport,
     Route,
@@ -11,9 +18,49 @@ from airport.models import (
     Flight,
     Order,
     Ticket,
+    SeatHold,
 )
 
 
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Looks up all the primary keys of the list in one query"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pks = []
+        for pk in data:
+            if child.pk_field is not None:
+                pk = child.pk_field.to_internal_value(pk)
+            try:
+                if isinstance(pk, bool):
+                    raise TypeError
+                pks.append(queryset.model._meta.pk.to_python(pk))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail("incorrect_type", data_type=type(pk).__name__)
+        found = queryset.in_bulk(pks)
+        for pk in pks:
+            if pk not in found:
+                child.fail("does_not_exist", pk_value=pk)
+        return [found[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """With ``many=True``, validates the whole list in one query"""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
 class AirportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Airport
@@ -46,39 +93,159 @@ class CrewSerializer(serializers.ModelSerializer):
         fields = ("id", "first_name", "last_name", "full_name")
 
 
+def validate_image_pixels(image):
+    """Rejects decompression bombs from the header, before anything is decoded"""
+    if image_too_large(image.image):
+        raise ValidationError(
+            f"Image is larger than {settings.IMAGE_MAX_PIXELS} pixels."
+        )
+
+
+@extend_schema_field(
+    serializers.DictField(child=serializers.DictField(child=serializers.URLField()))
+)
+class ImageVariantsField(serializers.ReadOnlyField):
+    """``{format: {width: url}}``, empty until the variants are rendered"""
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        variants = {}
+        for extension, names in value.items():
+            if extension == "source":
+                continue
+            variants[extension] = {}
+            for width, name in names.items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                variants[extension][width] = url
+        return variants
+
+
 class AirplaneTypeImageSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = AirplaneType
-        fields = ("id", "image")
+        fields = ("id", "image", "image_variants")
+        extra_kwargs = {"image": {"validators": [validate_image_pixels]}}
 
 
 class AirplaneTypeSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = AirplaneType
-        fields = ("id", "name", "image")
+        fields = ("id", "name", "image", "image_variants")
+        extra_kwargs = {"image": {"validators": [validate_image_pixels]}}
 
 
 class AirplaneTypeDetail(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = AirplaneType
-        fields = ("id", "name", "image")
+        fields = ("id", "name", "image", "image_variants")
 
 
 class AirplaneSerializer(serializers.ModelSerializer):
-    airplane_type = serializers.SlugRelatedField(
-        many=False, read_only=True, slug_field="name"
-    )
-
     class Meta:
         model = Airplane
         fields = ("id", "name", "rows", "seats_in_row", "airplane_type", "capacity")
 
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if self.instance is not None:
+            message = Airplane.seats_booked_outside(
+                Ticket.objects.filter(flight__airplane=self.instance),
+                attrs.get("rows", self.instance.rows),
+                attrs.get("seats_in_row", self.instance.seats_in_row),
+            )
+            if message:
+                raise ValidationError(message)
+        return data
+
+
+class AirplaneListSerializer(AirplaneSerializer):
+    airplane_type = serializers.SlugRelatedField(
+        many=False, read_only=True, slug_field="name"
+    )
+
 
 class FlightSerializer(serializers.ModelSerializer):
+    crew = BulkPrimaryKeyRelatedField(
+        many=True, queryset=Crew.objects.all(), required=False
+    )
+
     class Meta:
         model = Flight
         fields = ("id", "route", "airplane", "crew", "departure_time", "arrival_time")
 
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        departure = attrs.get(
+            "departure_time", getattr(self.instance, "departure_time", None)
+        )
+        arrival = attrs.get(
+            "arrival_time", getattr(self.instance, "arrival_time", None)
+        )
+        if departure is not None and arrival is not None and arrival <= departure:
+            raise ValidationError({"arrival_time": "Must be after the departure time."})
+        if (
+            departure is not None
+            and arrival is not None
+            and arrival - departure > Flight.max_duration()
+        ):
+            raise ValidationError(
+                {
+                    "arrival_time": Flight.TOO_LONG_MESSAGE.format(
+                        hours=settings.MAX_FLIGHT_HOURS
+                    )
+                }
+            )
+        airplane = attrs.get("airplane")
+        if self.instance is not None and airplane is not None:
+            message = Airplane.seats_booked_outside(
+                self.instance.tickets.all(), airplane.rows, airplane.seats_in_row
+            )
+            if message:
+                raise ValidationError({"airplane": message})
+        return data
+
+    def _check_bookings(self, validated_data, instance=None):
+        """Checked in the transaction of the write, holding the row locks"""
+
+        def value(name):
+            return validated_data.get(name, getattr(instance, name, None))
+
+        airplane = value("airplane")
+        if "crew" in validated_data:
+            crew_ids = [member.pk for member in validated_data["crew"]]
+        elif instance is not None:
+            crew_ids = list(instance.crew.values_list("pk", flat=True))
+        else:
+            crew_ids = []
+        errors = Flight.booking_conflicts(
+            value("departure_time"),
+            value("arrival_time"),
+            None if airplane is None else airplane.pk,
+            crew_ids,
+            exclude=getattr(instance, "pk", None),
+            lock=True,
+        )
+        if errors:
+            raise ValidationError(errors)
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            self._check_bookings(validated_data)
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            self._check_bookings(validated_data, instance)
+            return super().update(instance, validated_data)
+
 
 class FlightListSerializer(FlightSerializer):
     route = RouteListSerializer(read_only=True)
@@ -132,9 +299,9 @@ class TicketSeatsSerializer(TicketSerializer):
 
 class FlightDetailSerializer(FlightSerializer):
     route = RouteDetailSerializer(many=False, read_only=True)
-    airplane = AirplaneSerializer(many=False, read_only=True)
+    airplane = AirplaneListSerializer(many=False, read_only=True)
     crew = CrewSerializer(many=True, read_only=True)
-    taken_places = TicketSeatsSerializer(source="tickets", many=True, read_only=True)
+    taken_places = serializers.SerializerMethodField()
 
     class Meta:
         model = Flight
@@ -148,9 +315,127 @@ class FlightDetailSerializer(FlightSerializer):
             "taken_places",
         )
 
+    @extend_schema_field(TicketSeatsSerializer(many=True))
+    def get_taken_places(self, obj):
+        if obj.airplane is None:
+            return []
+        return [{"row": row, "seat": seat} for row, seat in obj.seat_map.taken_seats()]
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
+
+
+class SeatHoldCreateSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False)
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("id", "flight", "row", "seat", "expires_at")
+        read_only_fields = fields
+
+
+class FlightSeatMapSerializer(serializers.ModelSerializer):
+    rows = serializers.IntegerField(source="airplane.rows", read_only=True)
+    seats_in_row = serializers.IntegerField(
+        source="airplane.seats_in_row", read_only=True
+    )
+    encoding = serializers.SerializerMethodField()
+    seats = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Flight
+        fields = ("id", "rows", "seats_in_row", "tickets_sold", "encoding", "seats")
+
+    def get_encoding(self, obj) -> str:
+        return self.context.get("encoding", "base64")
+
+    @extend_schema_field(serializers.JSONField())
+    def get_seats(self, obj):
+        """Base64 bitmap (row-major, MSB first) or run-length rows"""
+        if self.get_encoding(obj) == "rle":
+            return obj.seat_map.to_rle_rows()
+        return obj.seat_map.to_base64()
+
+
+class PreloadedFlightField(serializers.PrimaryKeyRelatedField):
+    """Resolves flights from the batch preloaded by BulkTicketListSerializer"""
+
+    def to_internal_value(self, data):
+        flights = getattr(self.parent.parent, "preloaded_flights", None)
+        if flights is None:
+            return super().to_internal_value(data)
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            flight = flights.get(int(data))
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if flight is None:
+            self.fail("does_not_exist", pk_value=data)
+        return flight
+
+
+class BulkTicketListSerializer(serializers.ListSerializer):
+    """Validates all tickets of an order with a constant number of queries.
+
+    Flights (with airplane and seat bitmap) are loaded in one query, seat
+    ranges are checked in memory and collisions are looked up in the seat
+    bitmaps instead of a unique_together query per ticket.
+    """
+
+    def to_internal_value(self, data):
+        flight_ids = set()
+        if isinstance(data, list):
+            for item in data:
+                flight_id = item.get("flight") if isinstance(item, dict) else None
+                if isinstance(flight_id, (int, str)) and str(flight_id).isdigit():
+                    flight_ids.add(int(flight_id))
+        self.preloaded_flights = Flight.objects.select_related("airplane").in_bulk(
+            flight_ids
+        )
+
+        tickets = super().to_internal_value(data)
+
+        message = UniqueTogetherValidator.message.format(
+            field_names=", ".join(Ticket._meta.unique_together[0])
+        )
+        request = self.context.get("request")
+        customer_id = request.user.pk if request else None
+        holds = SeatHold.active_holds(list(self.preloaded_flights))
+        errors = []
+        seen = set()
+        for ticket in tickets:
+            flight = ticket["flight"]
+            seat = (flight.id, ticket["row"], ticket["seat"])
+            hold = holds.get(seat)
+            if seat in seen or flight.seat_map.is_taken(ticket["row"], ticket["seat"]):
+                errors.append({"non_field_errors": [message]})
+            elif hold is not None and hold[1] != customer_id:
+                errors.append({"non_field_errors": [SeatHold.HELD_MESSAGE]})
+            else:
+                errors.append({})
+            seen.add(seat)
+
+        if any(errors):
+            raise ValidationError(errors)
+        return tickets
+
+
+class OrderTicketSerializer(TicketSerializer):
+    flight = PreloadedFlightField(queryset=Flight.objects.select_related("airplane"))
+
+    class Meta(TicketSerializer.Meta):
+        read_only_fields = ("order",)
+        validators = []
+        list_serializer_class = BulkTicketListSerializer
+
 
 class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    tickets = OrderTicketSerializer(many=True, read_only=False, allow_empty=False)
 
     class Meta:
         model = Order
@@ -165,10 +450,36 @@ class OrderSerializer(serializers.ModelSerializer):
         with transaction.atomic():
             tickets_data = validated_data.pop("tickets")
             order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            try:
+                Ticket.bulk_create_for_flights(
+                    [Ticket(order=order, **ticket_data) for ticket_data in tickets_data]
+                )
+            except DjangoValidationError as exc:
+                raise ValidationError({"tickets": serializers.as_serializer_error(exc)})
             return order
 
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class ItinerarySearchSerializer(serializers.Serializer):
+    source = serializers.IntegerField(help_text="Source airport id")
+    destination = serializers.IntegerField(help_text="Destination airport id")
+    departure_after = serializers.DateTimeField(
+        required=False, help_text="First leg departs at or after (default: now)"
+    )
+    departure_before = serializers.DateTimeField(
+        required=False,
+        help_text="First leg departs at or before (default: one day later)",
+    )
+    max_legs = serializers.IntegerField(min_value=1, max_value=3, default=3)
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=5)
+
+
+class ItinerarySerializer(serializers.Serializer):
+    legs = FlightListSerializer(many=True, read_only=True)
+    departure_time = serializers.DateTimeField(read_only=True)
+    arrival_time = serializers.DateTimeField(read_only=True)
+    duration = serializers.DurationField(read_only=True)
+    distance = serializers.IntegerField(read_only=True)
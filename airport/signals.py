@@ -0,0 +1,181 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from airport.cache import bump_model_version
+from airport.images import delete_variants, schedule_variants
+from airport.itineraries import route_graph
+from airport.models import (
+    Airport,
+    Route,
+    Crew,
+    AirplaneType,
+    Airplane,
+    Flight,
+    Ticket,
+    OrderTicketSummary,
+)
+
+SEAT_FIELDS = frozenset(("tickets_sold", "seat_bitmap"))
+CACHED_CATALOG_MODELS = (Airport, Route, Crew, AirplaneType, Airplane)
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    transaction.on_commit(partial(bump_model_version, sender))
+
+
+for model in CACHED_CATALOG_MODELS:
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_seat(sender, instance, **kwargs):
+    Flight.change_seats(instance.flight_id, released=[(instance.row, instance.seat)])
+
+
+@receiver(post_save, sender=Route)
+def update_graph_route(sender, instance, **kwargs):
+    transaction.on_commit(
+        partial(
+            route_graph.update_route,
+            instance.id,
+            instance.source_id,
+            instance.destination_id,
+            instance.distance,
+        )
+    )
+
+
+@receiver(post_delete, sender=Route)
+def remove_graph_route(sender, instance, **kwargs):
+    transaction.on_commit(partial(route_graph.remove_route, instance.id))
+
+
+@receiver(post_save, sender=Flight)
+def update_graph_flight(sender, instance, update_fields=None, **kwargs):
+    if update_fields and SEAT_FIELDS.issuperset(update_fields):
+        return
+    transaction.on_commit(
+        partial(
+            route_graph.update_flight,
+            instance.id,
+            instance.route_id,
+            instance.departure_time,
+            instance.arrival_time,
+        )
+    )
+
+
+@receiver(post_delete, sender=Flight)
+def remove_graph_flight(sender, instance, **kwargs):
+    transaction.on_commit(partial(route_graph.remove_flight, instance.id))
+
+
+@receiver(post_save, sender=AirplaneType)
+def render_image_variants(sender, instance, raw=False, **kwargs):
+    image = instance.image.name if instance.image else None
+    if raw or image == instance.image_variants.get("source"):
+        return
+    if image:
+        transaction.on_commit(partial(schedule_variants, instance.id, image))
+    else:
+        AirplaneType.objects.filter(id=instance.id).update(image_variants={})
+        transaction.on_commit(partial(delete_variants, instance.image_variants))
+
+
+# Order summaries are written in the transaction of the change they copy
+
+
+@receiver(post_save, sender=Ticket)
+def write_ticket_summary(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        OrderTicketSummary.create_for_tickets([instance])
+    else:
+        OrderTicketSummary.refresh_tickets([instance])
+
+
+@receiver(post_save, sender=Flight)
+def update_flight_summaries(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    if created or raw:
+        return
+    if update_fields and SEAT_FIELDS.issuperset(update_fields):
+        return
+    OrderTicketSummary.refresh_flights([instance.id])
+
+
+@receiver(m2m_changed, sender=Flight.crew.through)
+def update_crew_summaries(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # The crew member's flights are unknown once cleared
+        instance._summary_flights = list(
+            instance.flight_set.values_list("id", flat=True)
+        )
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        OrderTicketSummary.refresh_flights([instance.id])
+    elif action == "post_clear":
+        OrderTicketSummary.refresh_flights(instance._summary_flights)
+    else:
+        OrderTicketSummary.refresh_flights(pk_set)
+
+
+@receiver(post_save, sender=Route)
+def update_route_summaries(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    columns = {
+        "source_name": instance.source.name if instance.source_id else None,
+        "destination_name": (
+            instance.destination.name if instance.destination_id else None
+        ),
+        "distance": instance.distance,
+    }
+    OrderTicketSummary.objects.filter(route_id=instance.id).exclude(**columns).update(
+        **columns
+    )
+
+
+@receiver(post_save, sender=Airport)
+def update_airport_summaries(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    for end in ("source", "destination"):
+        routes = Route.objects.filter(**{end: instance}).values("id")
+        OrderTicketSummary.objects.filter(route_id__in=routes).exclude(
+            **{f"{end}_name": instance.name}
+        ).update(**{f"{end}_name": instance.name})
+
+
+@receiver(post_save, sender=Airplane)
+def update_airplane_summaries(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    flights = Flight.objects.filter(airplane=instance).values("id")
+    OrderTicketSummary.objects.filter(flight_id__in=flights).exclude(
+        airplane_name=instance.name
+    ).update(airplane_name=instance.name)
+
+
+@receiver(post_save, sender=Crew)
+def update_crew_member_summaries(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    OrderTicketSummary.refresh_flights(instance.flight_set.values("id"))
+
+
+@receiver(pre_delete, sender=Crew)
+def collect_crew_member_flights(sender, instance, **kwargs):
+    instance._summary_flights = list(instance.flight_set.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Crew)
+def remove_crew_member_summaries(sender, instance, **kwargs):
+    OrderTicketSummary.refresh_flights(instance._summary_flights)
@@ -0,0 +1,114 @@
+import io
+import os
+import shutil
+import tempfile
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.images import render_variants, variant_pool
+from airport.tests.test_utils import sample_airplane_type
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_file(width, height, image_format="JPEG", name="plane.jpg"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (30, 90, 200)).save(buffer, image_format)
+    buffer.name = name
+    buffer.seek(0)
+    return buffer
+
+
+def upload_url(airplane_type_id):
+    return reverse("airport:airplanetype-upload-image", args=[airplane_type_id])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_VARIANTS_SYNC=True)
+class AirplaneTypeImageVariantTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.airplane_type = sample_airplane_type()
+
+    def upload(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                upload_url(self.airplane_type.id), {"image": image}, format="multipart"
+            )
+        self.airplane_type.refresh_from_db()
+        return res
+
+    def test_upload_renders_variants(self):
+        res = self.upload(image_file(1600, 800))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        variants = self.airplane_type.image_variants
+        self.assertEqual(variants["source"], self.airplane_type.image.name)
+        self.assertEqual(list(variants["webp"]), ["1280", "640", "320"])
+        for extension, image_format in (("webp", "WEBP"), ("jpeg", "JPEG")):
+            for width, name in variants[extension].items():
+                self.assertRegex(name, rf"-{width}w-[0-9a-f]{{12}}\.{extension}$")
+                with Image.open(os.path.join(MEDIA_ROOT, name)) as variant:
+                    self.assertEqual(variant.format, image_format)
+                    self.assertEqual(variant.size, (int(width), int(width) // 2))
+
+    def test_variant_urls_in_api(self):
+        self.upload(image_file(400, 300))
+
+        res = self.client.get(
+            reverse("airport:airplanetype-detail", args=[self.airplane_type.id])
+        )
+
+        self.assertEqual(list(res.data["image_variants"]), ["webp", "jpeg"])
+        self.assertEqual(list(res.data["image_variants"]["webp"]), ["320"])
+        self.assertTrue(
+            res.data["image_variants"]["webp"]["320"].startswith(
+                "http://testserver/media/uploads/movies/variants/"
+            )
+        )
+
+    def test_replacing_image_removes_old_variants(self):
+        self.upload(image_file(400, 300))
+        old = self.airplane_type.image_variants["jpeg"]["320"]
+
+        self.upload(image_file(200, 100, "PNG", "plane.png"))
+
+        self.assertFalse(os.path.exists(os.path.join(MEDIA_ROOT, old)))
+        self.assertEqual(list(self.airplane_type.image_variants["jpeg"]), ["200"])
+
+    @override_settings(IMAGE_MAX_PIXELS=1000)
+    def test_oversized_image_rejected(self):
+        res = self.upload(image_file(100, 100))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.airplane_type.image)
+
+    def test_render_in_process_pool(self):
+        source = os.path.join(MEDIA_ROOT, "source.jpg")
+        with open(source, "wb") as file:
+            file.write(image_file(700, 350).getvalue())
+
+        variants = (
+            variant_pool()
+            .submit(render_variants, source, MEDIA_ROOT, "pool", "source")
+            .result(timeout=60)
+        )
+
+        self.assertEqual(list(variants["jpeg"]), ["640", "320"])
+        self.assertTrue(
+            os.path.exists(os.path.join(MEDIA_ROOT, variants["webp"]["640"]))
+        )
@@ -0,0 +1,125 @@
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_crew,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+
+FLIGHT_URL = reverse("airport:flight-list")
+ASYNC_FLIGHT_URL = reverse("airport:async-flight-list")
+
+
+class AsyncFlightViewsTests(TestCase):
+    """The async endpoints answer exactly like their DRF counterparts"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.async_client = AsyncClient()
+        self.auth = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+        kyiv = sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        lviv = sample_airport(name="Danylo Halytskyi", closest_big_city="Lviv")
+        airplane = sample_airplane(sample_airplane_type(), rows=3, seats_in_row=4)
+        crew = [sample_crew(), sample_crew(first_name="Arya")]
+        departure = timezone.now() + timedelta(days=1)
+        self.flights = [
+            sample_flight(
+                sample_route(kyiv, lviv),
+                airplane,
+                crew,
+                departure_time=departure + timedelta(hours=index),
+                arrival_time=departure + timedelta(hours=index + 1),
+            )
+            for index in range(3)
+        ]
+        sample_ticket(sample_order(self.user), self.flights[0], row=2, seat=3)
+
+    def assertSameResponse(self, async_res, sync_url, params=None):
+        sync_res = self.client.get(sync_url, params)
+        self.assertEqual(async_res.status_code, sync_res.status_code)
+        # Pagination links differ only by the async URL prefix
+        content = async_res.content.decode().replace("/async/flights/", "/flights/")
+        self.assertEqual(json.loads(content), json.loads(sync_res.content))
+
+    async def _aget(self, url, params=None):
+        return await self.async_client.get(url, params, headers=self.auth)
+
+    async def test_list_matches_sync_list(self):
+        params = {"source": "kyiv", "page_size": 2}
+        res = await self._aget(ASYNC_FLIGHT_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()["results"]), 2)
+        await self.async_assertSameResponse(res, FLIGHT_URL, params)
+
+    async def test_list_next_page(self):
+        first = await self._aget(ASYNC_FLIGHT_URL, {"page_size": 2})
+        second = await self._aget(first.json()["next"])
+
+        self.assertEqual(
+            [flight["id"] for flight in second.json()["results"]],
+            [self.flights[2].id],
+        )
+
+    async def test_detail_and_seat_map_match_sync(self):
+        flight_id = self.flights[0].id
+        for name, params in (
+            ("flight-detail", None),
+            ("flight-seat-map", {"encoding": "rle"}),
+        ):
+            res = await self._aget(
+                reverse(f"airport:async-{name}", args=[flight_id]), params
+            )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            await self.async_assertSameResponse(
+                res, reverse(f"airport:{name}", args=[flight_id]), params
+            )
+
+    async def test_sparse_fields_match_sync(self):
+        for url, params in (
+            (ASYNC_FLIGHT_URL, {"fields": "id,route"}),
+            (ASYNC_FLIGHT_URL, {"fields": "id,crew", "expand": "crew"}),
+            (
+                reverse("airport:async-flight-detail", args=[self.flights[0].id]),
+                {"fields": "id,airplane,taken_places"},
+            ),
+        ):
+            res = await self._aget(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            await self.async_assertSameResponse(
+                res, url.replace("/async/flights/", "/flights/"), params
+            )
+
+    async def test_errors(self):
+        anonymous = await self.async_client.get(ASYNC_FLIGHT_URL)
+        bad_filter = await self._aget(ASYNC_FLIGHT_URL, {"min_seats": "x"})
+        missing = await self._aget(reverse("airport:async-flight-detail", args=[0]))
+        post = await self.async_client.post(ASYNC_FLIGHT_URL, headers=self.auth)
+
+        self.assertEqual(anonymous.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("detail", anonymous.json())
+        self.assertEqual(bad_filter.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("min_seats", bad_filter.json())
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(post.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def async_assertSameResponse(self, async_res, sync_url, params=None):
+        await sync_to_async(self.assertSameResponse)(async_res, sync_url, params)
@@ -0,0 +1,101 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from airport_service.cache_backends import MmapCache
+
+WORKERS = 4
+INCREMENTS = 500
+
+
+def mmap_cache(path, **options):
+    return MmapCache(path, {"TIMEOUT": None, "OPTIONS": options})
+
+
+def stress_worker(directory, worker):
+    """Increments a shared counter and checks reads of keys other workers write"""
+    counters = mmap_cache(os.path.join(directory, "counters"))
+    # Small enough that the workers keep evicting each other's entries
+    churn = mmap_cache(os.path.join(directory, "churn"), SLOTS=32, SLOT_SIZE=512)
+    for index in range(INCREMENTS):
+        counters.incr("counter")
+        size = (worker * 31 + index) % 300
+        churn.set(f"key-{(worker * 7 + index) % 40}", (worker, size, "x" * size))
+        value = churn.get(f"key-{index % 40}")
+        # A torn read would show as a payload of the wrong size
+        if value is not None and len(value[2]) != value[1]:
+            os._exit(2)
+    os._exit(0)
+
+
+class MmapCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.cache = mmap_cache(os.path.join(self.directory, "cache"))
+
+    def test_basic_operations(self):
+        self.cache.set("a", {"x": 1})
+        self.assertEqual(self.cache.get("a"), {"x": 1})
+        self.assertFalse(self.cache.add("a", 2))
+        self.assertTrue(self.cache.add("b", 2))
+        self.assertEqual(self.cache.incr("b", 5), 7)
+        self.assertEqual(self.cache.decr("b"), 6)
+        self.assertTrue(self.cache.delete("a"))
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("a", "default"), "default")
+        with self.assertRaises(ValueError):
+            self.cache.incr("a")
+        self.cache.clear()
+        self.assertFalse(self.cache.has_key("b"))
+
+    def test_timeouts(self):
+        self.cache.set("short", 1, timeout=0.05)
+        self.cache.set("touched", 1, timeout=0.05)
+        self.assertTrue(self.cache.touch("touched", timeout=None))
+        time.sleep(0.1)
+
+        self.assertIsNone(self.cache.get("short"))
+        self.assertEqual(self.cache.get("touched"), 1)
+
+    def test_shared_between_instances(self):
+        other = mmap_cache(os.path.join(self.directory, "cache"))
+        self.cache.set("shared", [1, 2])
+
+        self.assertEqual(other.get("shared"), [1, 2])
+
+    def test_least_recently_used_way_is_evicted(self):
+        cache = mmap_cache(os.path.join(self.directory, "lru"), SLOTS=2, WAYS=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+
+    def test_value_larger_than_slot_is_not_cached(self):
+        cache = mmap_cache(os.path.join(self.directory, "small"), SLOT_SIZE=256)
+        cache.set("big", "small")
+        cache.set("big", "x" * 1000)
+
+        self.assertIsNone(cache.get("big"))
+
+    def test_multiprocess_stress(self):
+        counters = mmap_cache(os.path.join(self.directory, "counters"))
+        counters.set("counter", 0)
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=stress_worker, args=(self.directory, worker))
+            for worker in range(WORKERS)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+
+        self.assertEqual([worker.exitcode for worker in workers], [0] * WORKERS)
+        self.assertEqual(counters.get("counter"), WORKERS * INCREMENTS)
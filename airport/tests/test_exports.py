@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+
+ORDER_EXPORT_URL = reverse("airport:order-export")
+TICKET_EXPORT_URL = reverse("airport:order-export-tickets")
+
+
+def read_csv(res):
+    return list(csv.DictReader(io.StringIO(b"".join(res.streaming_content).decode())))
+
+
+def read_ndjson(res):
+    lines = b"".join(res.streaming_content).decode().splitlines()
+    return [json.loads(line) for line in lines]
+
+
+class ExportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        route = sample_route(
+            sample_airport(name="Boryspil"), sample_airport(name="Orly")
+        )
+        airplane = sample_airplane(sample_airplane_type())
+        self.flight = sample_flight(route, airplane)
+        self.other_flight = sample_flight(route, airplane)
+
+        self.old_order = sample_order(self.user)
+        self.old_order.created_at = timezone.make_aware(datetime(2020, 1, 1, 12))
+        self.old_order.save()
+        sample_ticket(self.old_order, self.flight, row=1, seat=1)
+        sample_ticket(self.old_order, self.flight, row=1, seat=2)
+        self.new_order = sample_order(self.user)
+        sample_ticket(self.new_order, self.other_flight, row=3, seat=4)
+
+    def test_orders_csv(self):
+        res = self.client.get(ORDER_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="orders-', res["Content-Disposition"])
+        rows = read_csv(res)
+        self.assertEqual(
+            [(row["order_id"], row["tickets"]) for row in rows],
+            [(str(self.old_order.id), "2"), (str(self.new_order.id), "1")],
+        )
+        self.assertEqual(rows[0]["customer_email"], "admin@test.com")
+        self.assertEqual(rows[0]["created_at"], "2020-01-01T12:00:00+00:00")
+
+    def test_tickets_ndjson(self):
+        res = self.client.get(TICKET_EXPORT_URL, {"output": "ndjson"})
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        tickets = read_ndjson(res)
+        self.assertEqual(len(tickets), 3)
+        self.assertEqual(
+            tickets[2],
+            {
+                "ticket_id": tickets[2]["ticket_id"],
+                "order_id": self.new_order.id,
+                "order_created_at": self.new_order.created_at.isoformat(),
+                "customer_id": self.user.id,
+                "customer_email": "admin@test.com",
+                "flight_id": self.other_flight.id,
+                "departure_time": self.other_flight.departure_time.isoformat(),
+                "arrival_time": self.other_flight.arrival_time.isoformat(),
+                "source": "Boryspil",
+                "destination": "Orly",
+                "airplane": "Test plane",
+                "row": 3,
+                "seat": 4,
+            },
+        )
+
+    def test_date_and_flight_filters(self):
+        before = self.client.get(ORDER_EXPORT_URL, {"created_before": "2020-01-01"})
+        after = self.client.get(
+            TICKET_EXPORT_URL,
+            {"created_after": (timezone.now() - timedelta(days=1)).isoformat()},
+        )
+        by_flight = self.client.get(ORDER_EXPORT_URL, {"flight": str(self.flight.id)})
+
+        self.assertEqual(
+            [row["order_id"] for row in read_csv(before)], [str(self.old_order.id)]
+        )
+        self.assertEqual(
+            [row["order_id"] for row in read_csv(after)], [str(self.new_order.id)]
+        )
+        self.assertEqual(
+            [row["tickets"] for row in read_csv(by_flight)],
+            ["2"],
+        )
+
+    def test_invalid_params(self):
+        for params in ({"output": "xml"}, {"flight": "a"}, {"created_after": "x"}):
+            res = self.client.get(ORDER_EXPORT_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_staff_only(self):
+        customer = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(customer)
+
+        for url in (ORDER_EXPORT_URL, TICKET_EXPORT_URL):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
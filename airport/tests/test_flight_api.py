@@ -1,7 +1,11 @@
+import re
 import tempfile
+import threading
 import os
 from PIL import Image
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.db.models import F, Count
 from rest_framework.test import APIClient
@@ -111,19 +115,21 @@ class AuthenticatedFlightApiTests(TestCase):
         ).data
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertDictEqual(serializer_data_expected, res.data[0])
-        self.assertNotIn(serializer_data_not_expected, res.data)
+        self.assertDictEqual(serializer_data_expected, res.data["results"][0])
+        self.assertNotIn(serializer_data_not_expected, res.data["results"])
 
     def test_flight_list(self):
         sample_flight(self.route, self.airplane, crew_list=[self.crew1])
         sample_flight(self.route, self.airplane, crew_list=[self.crew2])
 
         res = self.client.get(Flight_URL)
-        flights_queryset_for_test = _get_annotated_flight_queryset().order_by("id")
+        flights_queryset_for_test = _get_annotated_flight_queryset().order_by(
+            "departure_time", "id"
+        )
         serializer = FlightListSerializer(flights_queryset_for_test, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_filter_flight_by_crew(self):
         crew1 = sample_crew(first_name="Crew 1", last_name="Last 1")
@@ -149,9 +155,30 @@ class AuthenticatedFlightApiTests(TestCase):
             _get_annotated_flight_queryset(flight_id=flight3.id).first()
         ).data
 
-        self.assertIn(serializer_data_expected, res.data)
-        self.assertIn(serializer_data_expected2, res.data)
-        self.assertNotIn(serializer_data_not_expected, res.data)
+        self.assertIn(serializer_data_expected, res.data["results"])
+        self.assertIn(serializer_data_expected2, res.data["results"])
+        self.assertNotIn(serializer_data_not_expected, res.data["results"])
+
+    def test_filter_by_several_crew_of_one_flight(self):
+        flight = sample_flight(
+            self.route, self.airplane, crew_list=[self.crew1, self.crew2]
+        )
+        order = sample_order(self.user)
+        for seat in range(1, 4):
+            sample_ticket(order, flight, row=1, seat=seat)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                Flight_URL,
+                {"crew": f"{self.crew1.id},{self.crew2.id}", "airplane_name": "test"},
+            )
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["tickets_available"], 50 - 3)
+        self.assertEqual(res.data["results"][0]["crew"], ["John Doe", "Jane Smith"])
+        self.assertFalse(
+            any("DISTINCT" in query["sql"] for query in queries.captured_queries)
+        )
 
     def test_retrieve_list(self):
         flight = sample_flight(self.route, self.airplane, crew_list=[self.crew1])
@@ -160,3 +187,178 @@ class AuthenticatedFlightApiTests(TestCase):
         serializer = FlightDetailSerializer(flight)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
+
+
+class FlightBookingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        admin = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+        self.route = sample_route(sample_airport(), sample_airport(name="Lviv"))
+        self.airplane = sample_airplane(sample_airplane_type())
+        self.crew = sample_crew()
+        self.departure = timezone.now() + timedelta(days=1)
+        self.flight = sample_flight(
+            self.route,
+            self.airplane,
+            [self.crew],
+            departure_time=self.departure,
+            arrival_time=self.departure + timedelta(hours=2),
+        )
+
+    def payload(self, start_hours, end_hours, airplane=None, crew=()):
+        airplane = airplane or self.airplane
+        return {
+            "route": self.route.id,
+            "airplane": airplane.id,
+            "crew": [member.id for member in crew],
+            "departure_time": self.departure + timedelta(hours=start_hours),
+            "arrival_time": self.departure + timedelta(hours=end_hours),
+        }
+
+    def test_airplane_double_booking(self):
+        res = self.client.post(Flight_URL, self.payload(1, 3))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"booked for flight {self.flight.id}", res.data["airplane"][0])
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_crew_double_booking(self):
+        other_airplane = sample_airplane(sample_airplane_type(), name="Other")
+        free = sample_crew(first_name="Free")
+        res = self.client.post(
+            Flight_URL, self.payload(-1, 1, other_airplane, [self.crew, free])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data["crew"]), 1)
+        self.assertIn(self.crew.full_name, res.data["crew"][0])
+
+    def test_back_to_back_flights(self):
+        res = self.client.post(Flight_URL, self.payload(2, 4, crew=[self.crew]))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_update_does_not_conflict_with_itself(self):
+        res = self.client.patch(
+            detail_url(self.flight.id),
+            {"arrival_time": self.departure + timedelta(hours=3)},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_into_another_booking(self):
+        later = sample_flight(
+            self.route,
+            self.airplane,
+            departure_time=self.departure + timedelta(hours=5),
+            arrival_time=self.departure + timedelta(hours=7),
+        )
+        res = self.client.patch(
+            detail_url(later.id),
+            {"departure_time": self.departure + timedelta(hours=1)},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("airplane", res.data)
+
+    def test_earlier_long_flight_overlaps(self):
+        # Imported flights may overlap: this one spans self.flight
+        long_flight = sample_flight(
+            self.route,
+            self.airplane,
+            departure_time=self.departure - timedelta(hours=1),
+            arrival_time=self.departure + timedelta(hours=12),
+        )
+        res = self.client.post(Flight_URL, self.payload(5, 7))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"booked for flight {long_flight.id}", res.data["airplane"][0])
+
+    def test_crew_looked_up_in_one_query(self):
+        crew = [sample_crew(first_name=f"Crew {index}") for index in range(4)]
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(Flight_URL, self.payload(3, 5, crew=crew))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        # No lookup of a single crew member per id
+        self.assertFalse(
+            any(
+                re.search(r'"airport_crew"\."id" = \d', query["sql"])
+                for query in queries.captured_queries
+            )
+        )
+
+    def test_unknown_crew_rejected(self):
+        res = self.client.post(Flight_URL, self.payload(3, 5) | {"crew": [0]})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Invalid pk "0"', res.data["crew"][0])
+
+        res = self.client.post(Flight_URL, self.payload(3, 5) | {"crew": ["x"]})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Incorrect type", res.data["crew"][0])
+
+    def test_flight_longer_than_max_duration(self):
+        res = self.client.post(Flight_URL, self.payload(10, 40))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("at most 24 hours", res.data["arrival_time"][0])
+
+    def test_arrival_after_departure(self):
+        res = self.client.post(Flight_URL, self.payload(6, 5))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("arrival_time", res.data)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class FlightBookingContentionTests(TransactionTestCase):
+    workers = 4
+
+    def test_parallel_overlapping_creates_book_the_airplane_once(self):
+        admin = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        route = sample_route(sample_airport(), sample_airport(name="Lviv"))
+        airplane = sample_airplane(sample_airplane_type())
+        departure = timezone.now() + timedelta(days=1)
+        responses = []
+        barrier = threading.Barrier(self.workers)
+
+        def create(offset):
+            client = APIClient()
+            client.force_authenticate(admin)
+            barrier.wait()
+            try:
+                responses.append(
+                    client.post(
+                        Flight_URL,
+                        {
+                            "route": route.id,
+                            "airplane": airplane.id,
+                            "crew": [],
+                            "departure_time": departure + timedelta(minutes=offset),
+                            "arrival_time": departure + timedelta(hours=2),
+                        },
+                    )
+                )
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=create, args=(index,))
+            for index in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            sorted(res.status_code for res in responses),
+            [status.HTTP_201_CREATED]
+            + [status.HTTP_400_BAD_REQUEST] * (self.workers - 1),
+        )
+        self.assertEqual(Flight.objects.count(), 1)
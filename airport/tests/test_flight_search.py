@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airport, Flight, Route
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+
+Flight_URL = reverse("airport:flight-list")
+
+
+def result_ids(res):
+    return [flight["id"] for flight in res.data["results"]]
+
+
+class FlightSearchApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.kyiv = sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        self.lviv = sample_airport(name="Danylo Halytskyi", closest_big_city="Lviv")
+        self.paris = sample_airport(name="Orly", closest_big_city="Paris")
+        airplane = sample_airplane(sample_airplane_type(), rows=2, seats_in_row=2)
+        self.day = timezone.make_aware(datetime(2030, 5, 1, 10, 0))
+
+        def flight(source, destination, days):
+            departure = self.day + timedelta(days=days)
+            return sample_flight(
+                sample_route(source, destination),
+                airplane,
+                departure_time=departure,
+                arrival_time=departure + timedelta(hours=2),
+            )
+
+        self.kyiv_lviv = flight(self.kyiv, self.lviv, 0)
+        self.kyiv_paris = flight(self.kyiv, self.paris, 1)
+        self.lviv_paris = flight(self.lviv, self.paris, 2)
+
+    def test_filter_by_source_city_and_destination_id(self):
+        res = self.client.get(
+            Flight_URL, {"source": "kyiv", "destination": str(self.paris.id)}
+        )
+
+        self.assertEqual(result_ids(res), [self.kyiv_paris.id])
+
+    def test_filter_by_departure_dates(self):
+        res = self.client.get(
+            Flight_URL,
+            {"departure_after": "2030-05-02", "departure_before": "2030-05-02"},
+        )
+
+        self.assertEqual(result_ids(res), [self.kyiv_paris.id])
+
+    def test_filter_by_min_seats(self):
+        order = sample_order(self.user)
+        for seat in (1, 2):
+            sample_ticket(order, self.kyiv_lviv, row=1, seat=seat)
+
+        res = self.client.get(Flight_URL, {"min_seats": "3"})
+
+        self.assertEqual(result_ids(res), [self.kyiv_paris.id, self.lviv_paris.id])
+
+    def test_invalid_date_rejected(self):
+        res = self.client.get(Flight_URL, {"departure_after": "tomorrow"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FlightSearchQueryPlanTests(TestCase):
+    airports = 100
+    flights_per_route = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        airports = Airport.objects.bulk_create(
+            Airport(name=f"Airport {i}", closest_big_city=f"City {i}")
+            for i in range(cls.airports)
+        )
+        routes = Route.objects.bulk_create(
+            Route(source=source, destination=destination, distance=100)
+            for source in airports
+            for destination in airports[:10]
+            if source != destination
+        )
+        airplane = sample_airplane(sample_airplane_type())
+        cls.start = start = timezone.now()
+        Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=airplane,
+                departure_time=start + timedelta(hours=index),
+                arrival_time=start + timedelta(hours=index + 2),
+            )
+            for route in routes
+            for index in range(cls.flights_per_route)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        cls.source, cls.destination = airports[50], airports[3]
+
+    def test_search_uses_composite_indexes(self):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user("plan@test.com", "testpass")
+        )
+        departure = self.start + timedelta(hours=5)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = client.get(
+                Flight_URL,
+                {
+                    "source": str(self.source.id),
+                    "destination": str(self.destination.id),
+                    "departure_after": departure.isoformat(),
+                },
+            )
+        self.assertEqual(len(res.data["results"]), self.flights_per_route - 5)
+
+        flight_sql = next(
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('SELECT "airport_flight"')
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {flight_sql}")
+            plan = "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+
+        self.assertIn("route_source_dest_idx", plan)
+        self.assertIn("flight_route_departure_idx", plan)
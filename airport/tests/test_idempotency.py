@@ -0,0 +1,145 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import IdempotencyKey, Order, Ticket
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def sample_order_flight():
+    route = sample_route(sample_airport(name="A"), sample_airport(name="B"))
+    return sample_flight(route, sample_airplane(sample_airplane_type()))
+
+
+class IdempotentOrderTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_order_flight()
+
+    def _post(self, key, seat=1):
+        payload = {"tickets": [{"row": 1, "seat": seat, "flight": self.flight.id}]}
+        return self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self._post("retry-1")
+        with CaptureQueriesContext(connection) as queries:
+            retry = self._post("retry-1")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(
+            any("airport_ticket" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_key_reused_for_another_request(self):
+        self._post("reused")
+
+        res = self._post("reused", seat=2)
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_keys_are_per_customer(self):
+        self._post("shared")
+        other = get_user_model().objects.create_user(
+            "other@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(other)
+
+        res = self._post("shared", seat=2)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_failed_request_is_not_stored(self):
+        self._post("first")
+
+        failed = self._post("taken")
+        self.assertEqual(failed.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.filter(key="taken").exists())
+        self.assertEqual(self._post("taken", seat=2).status_code, 201)
+
+    def test_expired_key_runs_again(self):
+        self._post("old")
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+
+        res = self._post("old", seat=2)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Idempotent-Replayed", res)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_expire_command(self):
+        self._post("live")
+        self._post("stale", seat=2)
+        IdempotencyKey.objects.filter(key="stale").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        call_command("expire_idempotency_keys", stdout=StringIO())
+
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["live"]
+        )
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class IdempotentOrderContentionTests(TransactionTestCase):
+    workers = 8
+
+    def test_parallel_retries_create_one_order(self):
+        flight = sample_order_flight()
+        user = get_user_model().objects.create_user("user@test.com", "testpass")
+        payload = {"tickets": [{"row": 1, "seat": 1, "flight": flight.id}]}
+        responses = []
+        barrier = threading.Barrier(self.workers)
+
+        def retry():
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                responses.append(
+                    client.post(
+                        ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="storm"
+                    )
+                )
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=retry) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([res.status_code for res in responses], [201] * self.workers)
+        self.assertEqual(len({res.json()["id"] for res in responses}), 1)
+        self.assertEqual(Order.objects.count(), 1)
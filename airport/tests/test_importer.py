@@ -0,0 +1,285 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from airport.models import Airport, Crew, Flight, Order, OrderTicketSummary, Ticket
+from airport.seat_map import SeatMap
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+
+DEPARTURE = "2030-05-01T08:00:00+00:00"
+
+
+def schedule_records(**ticket_fields):
+    """Fixture records for one flight, referencing each other by natural key"""
+    ticket = {
+        "flight": ["UR-IMP", DEPARTURE],
+        "order": 500,
+        "row": 2,
+        "seat": 3,
+    }
+    ticket.update(ticket_fields)
+    return [
+        {
+            "model": "customer.user",
+            "pk": None,
+            "fields": {"email": "importer@test.com", "password": "!"},
+        },
+        {
+            "model": "airport.airport",
+            "pk": None,
+            "fields": {"name": "Kyiv", "closest_big_city": "Kyiv"},
+        },
+        {
+            "model": "airport.airport",
+            "pk": None,
+            "fields": {"name": "Lviv", "closest_big_city": "Lviv"},
+        },
+        {"model": "airport.airplanetype", "pk": None, "fields": {"name": "A320"}},
+        {
+            "model": "airport.airplane",
+            "pk": None,
+            "fields": {
+                "name": "UR-IMP",
+                "rows": 5,
+                "seats_in_row": 4,
+                "airplane_type": "A320",
+            },
+        },
+        {
+            "model": "airport.crew",
+            "pk": None,
+            "fields": {"first_name": "Anna", "last_name": "Koval"},
+        },
+        {
+            "model": "airport.route",
+            "pk": None,
+            "fields": {"source": "Kyiv", "destination": "Lviv", "distance": 470},
+        },
+        {
+            "model": "airport.flight",
+            "pk": None,
+            "fields": {
+                "route": ["Kyiv", "Lviv"],
+                "airplane": "UR-IMP",
+                "crew": [["Anna", "Koval"]],
+                "departure_time": DEPARTURE,
+                "arrival_time": "2030-05-01T09:10:00+00:00",
+                "tickets_sold": 99,
+            },
+        },
+        {
+            "model": "airport.order",
+            "pk": 500,
+            "fields": {
+                "customer": "importer@test.com",
+                "created_at": "2030-01-02T03:04:05+00:00",
+            },
+        },
+        {"model": "airport.ticket", "pk": 77, "fields": ticket},
+        {"model": "sessions.session", "pk": "x", "fields": {}},
+    ]
+
+
+class ImportScheduleTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", newline="") as file:
+            file.write(content)
+        return path
+
+    def run_import(self, path, *args):
+        out = StringIO()
+        call_command("import_schedule", path, *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def assert_seats_consistent(self, flight):
+        flight.refresh_from_db()
+        seats = SeatMap(
+            flight.airplane.rows, flight.airplane.seats_in_row, flight.seat_bitmap
+        )
+        tickets = set(flight.tickets.values_list("row", "seat"))
+        self.assertEqual(flight.tickets_sold, len(tickets))
+        self.assertEqual(set(seats.taken_seats()), tickets)
+
+    def test_fixture_with_natural_keys(self):
+        path = self.write("schedule.json", json.dumps(schedule_records()))
+
+        out = self.run_import(path)
+
+        self.assertIn("airport.ticket: 1 created, 0 updated", out)
+        self.assertIn("sessions.session: 1 skipped", out)
+        flight = Flight.objects.get(airplane__name="UR-IMP")
+        self.assertEqual(flight.route.source.name, "Kyiv")
+        self.assertEqual([crew.full_name for crew in flight.crew.all()], ["Anna Koval"])
+        order = Order.objects.get(pk=500)
+        self.assertEqual(order.customer.email, "importer@test.com")
+        self.assertEqual(
+            order.created_at, datetime(2030, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        )
+        ticket = Ticket.objects.get()
+        self.assertNotEqual(ticket.pk, 77)
+        self.assertEqual((ticket.row, ticket.seat, ticket.order_id), (2, 3, 500))
+        self.assert_seats_consistent(flight)
+
+    def test_ndjson_reimport_needs_upsert(self):
+        lines = "\n".join(map(json.dumps, schedule_records()))
+        path = self.write("schedule.ndjson", lines)
+        self.run_import(path)
+
+        with self.assertRaises(CommandError):
+            self.run_import(path)
+        out = self.run_import(path, "--upsert")
+
+        self.assertIn("airport.flight: 0 created, 1 updated", out)
+        self.assertIn("airport.ticket: 0 created, 1 updated", out)
+        self.assertEqual(Airport.objects.count(), 2)
+        self.assertEqual(Crew.objects.count(), 1)
+        self.assert_seats_consistent(Flight.objects.get())
+
+    def test_upsert_onto_another_airplane_repacks_seats(self):
+        records = schedule_records()
+        self.run_import(self.write("schedule.json", json.dumps(records)))
+        wide = dict(records[4], fields=dict(records[4]["fields"], name="UR-WIDE"))
+        wide["fields"]["seats_in_row"] = 6
+        flight = dict(records[7], pk=Flight.objects.get().pk)
+        flight["fields"] = dict(flight["fields"], airplane="UR-WIDE")
+        path = self.write("moved.json", json.dumps([wide, flight]))
+
+        self.run_import(path, "--upsert")
+
+        flight = Flight.objects.get()
+        self.assertEqual(flight.airplane.name, "UR-WIDE")
+        self.assert_seats_consistent(flight)
+
+    def test_order_summaries(self):
+        records = schedule_records()
+        self.run_import(self.write("schedule.json", json.dumps(records)))
+        records[6]["fields"]["distance"] = 480
+        self.run_import(self.write("route.json", json.dumps(records[6:7])), "--upsert")
+
+        summary = OrderTicketSummary.objects.get()
+        self.assertEqual(summary.source_name, "Kyiv")
+        self.assertEqual(summary.crew_names, ["Anna Koval"])
+        self.assertEqual(summary.distance, 480)
+        call_command("rebuild_order_summaries", "--check", stdout=StringIO())
+
+    def test_csv_tickets(self):
+        route = sample_route(sample_airport(name="A"), sample_airport(name="B"))
+        airplane = sample_airplane(sample_airplane_type(), rows=5, seats_in_row=4)
+        flight = sample_flight(route, airplane)
+        order = sample_order(get_user_model().objects.create_user("a@test.com"))
+        sample_ticket(order, flight, row=1, seat=1)
+        path = self.write(
+            "tickets.csv",
+            "flight,order,row,seat\n"
+            f"{flight.id},{order.id},1,2\n"
+            f"Test plane|{flight.departure_time.isoformat()},{order.id},5,4\n",
+        )
+
+        out = self.run_import(path, "--model", "airport.ticket")
+
+        self.assertIn("airport.ticket: 2 created", out)
+        self.assert_seats_consistent(flight)
+        self.assertEqual(flight.tickets_sold, 3)
+
+    def test_invalid_seats_roll_back_everything(self):
+        records = schedule_records(row=6)
+        records.append(
+            {
+                "model": "airport.ticket",
+                "fields": {"flight": ["UR-IMP", DEPARTURE], "row": 1, "seat": 1},
+            }
+        )
+        records.append(
+            {
+                "model": "airport.ticket",
+                "fields": {"flight": ["UR-IMP", DEPARTURE], "row": 1, "seat": 1},
+            }
+        )
+        path = self.write("schedule.json", json.dumps(records))
+        errors = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("import_schedule", path, stdout=StringIO(), stderr=errors)
+
+        self.assertIn("row 6, seat 3 is outside 5x4", errors.getvalue())
+        self.assertIn("seat appears twice in the input", errors.getvalue())
+        self.assertFalse(Flight.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_taken_seat(self):
+        self.run_import(self.write("first.json", json.dumps(schedule_records())))
+        record = schedule_records()[-2]
+        path = self.write("second.json", json.dumps([record]))
+        errors = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("import_schedule", path, stdout=StringIO(), stderr=errors)
+
+        self.assertIn("seat already taken", errors.getvalue())
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_double_bookings(self):
+        self.run_import(self.write("first.json", json.dumps(schedule_records())))
+        existing = Flight.objects.get()
+        flight = schedule_records()[7]
+        overlapping = dict(flight["fields"], departure_time="2030-05-01T09:00:00+00:00")
+        overlapping["arrival_time"] = "2030-05-01T10:00:00+00:00"
+        # The crew member is double booked even on another airplane
+        crew_only = dict(overlapping, airplane="UR-2", crew=[["Anna", "Koval"]])
+        back_to_back = dict(
+            crew_only,
+            crew=[],
+            departure_time="2030-05-01T10:00:00+00:00",
+            arrival_time="2030-05-01T11:00:00+00:00",
+        )
+        airplane = dict(schedule_records()[4]["fields"], name="UR-2")
+        records = [{"model": "airport.airplane", "fields": airplane}] + [
+            {"model": "airport.flight", "fields": fields}
+            for fields in (overlapping, crew_only, back_to_back)
+        ]
+        path = self.write("second.json", json.dumps(records))
+        errors = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("import_schedule", path, stdout=StringIO(), stderr=errors)
+
+        errors = errors.getvalue()
+        self.assertIn(
+            f"record 2 (airport.flight): airplane {existing.airplane_id} is already "
+            f"booked for flight {existing.pk} from 2030-05-01 08:00 to 2030-05-01 "
+            "09:10",
+            errors,
+        )
+        self.assertIn("record 3 (airport.flight): crew member", errors)
+        # UR-IMP with record 2, Anna with record 2 and between records 2 and 3
+        self.assertEqual(errors.count("is already booked"), 4)
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_unknown_reference(self):
+        record = schedule_records()[-2]
+        record["fields"]["flight"] = ["UR-NONE", DEPARTURE]
+        path = self.write("schedule.json", json.dumps([record]))
+
+        with self.assertRaises(CommandError):
+            call_command("import_schedule", path, stdout=StringIO(), stderr=StringIO())
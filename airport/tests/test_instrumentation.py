@@ -0,0 +1,151 @@
+import re
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.serializers import FlightListSerializer
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+)
+from airport_service import metrics
+
+FLIGHT_URL = reverse("airport:flight-list")
+ASYNC_FLIGHT_URL = reverse("airport:async-flight-list")
+METRICS_URL = reverse("metrics")
+
+
+def server_timing(response):
+    return dict(
+        re.match(r"(\w+);(.*)", entry.strip()).groups()
+        for entry in response["Server-Timing"].split(",")
+    )
+
+
+class HistogramTests(SimpleTestCase):
+    def test_prometheus_text_format(self):
+        histogram = metrics.Histogram("latency", "Help.", (0.1, 1), ("view",))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(('a"b',), value)
+
+        self.assertEqual(
+            histogram.render(),
+            [
+                "# HELP latency Help.",
+                "# TYPE latency histogram",
+                'latency_bucket{view="a\\"b",le="0.1"} 2',
+                'latency_bucket{view="a\\"b",le="1"} 3',
+                'latency_bucket{view="a\\"b",le="+Inf"} 4',
+                'latency_sum{view="a\\"b"} 3.65',
+                'latency_count{view="a\\"b"} 4',
+            ],
+        )
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        metrics.clear_metrics()
+        self.addCleanup(metrics.clear_metrics)
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        route = sample_route(sample_airport(name="A"), sample_airport(name="B"))
+        sample_flight(route, sample_airplane(sample_airplane_type()))
+
+    def test_server_timing_header(self):
+        with self.assertNumQueries(2) as context:
+            res = self.client.get(FLIGHT_URL)
+
+        timing = server_timing(res)
+        self.assertEqual(set(timing), {"app", "db", "serialize", "size"})
+        self.assertIn(f'desc="{len(context.captured_queries)} queries"', timing["db"])
+        self.assertEqual(timing["size"], f'desc="{len(res.content)} bytes"')
+
+    def test_serializer_data_is_timed(self):
+        to_representation = FlightListSerializer.to_representation
+
+        def slow(serializer, instance):
+            time.sleep(0.05)
+            return to_representation(serializer, instance)
+
+        # ?expand= renders through the serializer instead of the fast list
+        with mock.patch.object(FlightListSerializer, "to_representation", slow):
+            res = self.client.get(FLIGHT_URL, {"expand": "route"})
+
+        serialize = float(server_timing(res)["serialize"].removeprefix("dur="))
+        self.assertGreaterEqual(serialize, 50)
+
+    def test_requests_are_aggregated(self):
+        self.client.get(FLIGHT_URL)
+        self.client.get(FLIGHT_URL)
+
+        labels = ("airport:flight-list", "GET")
+        text = metrics.render_metrics()
+        self.assertIn(
+            'airport_request_duration_seconds_count{view="airport:flight-list",'
+            'method="GET"} 2',
+            text,
+        )
+        self.assertEqual(metrics.requests_total._values[labels + ("200",)], 2)
+        self.assertEqual(metrics.db_queries._values[labels][-1], 4)
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertNotIn("Server-Timing", res)
+        self.assertEqual(metrics.requests_total._values, {})
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0)
+    def test_unsampled_serializers_are_not_timed(self):
+        with mock.patch.object(metrics, "timed_serializer_class") as timed_class:
+            res = self.client.get(FLIGHT_URL, {"expand": "route"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        timed_class.assert_not_called()
+
+    async def test_async_views_are_measured(self):
+        res = await AsyncClient().get(
+            ASYNC_FLIGHT_URL,
+            headers={"authorization": f"Bearer {AccessToken.for_user(self.user)}"},
+        )
+
+        timing = server_timing(res)
+        # The user lookup may be served by the authentication cache
+        self.assertRegex(timing["db"], r'desc="[23] queries"')
+        self.assertNotEqual(timing["serialize"], "dur=0.00")
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_requires_staff(self):
+        self.assertEqual(
+            self.client.get(METRICS_URL).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(user)
+        self.assertEqual(
+            self.client.get(METRICS_URL).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+    def test_staff_gets_prometheus_text(self):
+        admin = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn(b"# TYPE airport_request_duration_seconds histogram", res.content)
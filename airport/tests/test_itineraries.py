@@ -0,0 +1,137 @@
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from airport.itineraries import GRAPH_VERSION_KEY, route_graph
+from airport.models import Flight
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+)
+
+ITINERARY_URL = reverse("airport:itinerary-list")
+
+
+class ItineraryApiTests(TestCase):
+    def setUp(self):
+        route_graph.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.kyiv = sample_airport(name="KBP")
+        self.warsaw = sample_airport(name="WAW")
+        self.paris = sample_airport(name="CDG")
+        self.airplane = sample_airplane(sample_airplane_type())
+        self.day = timezone.make_aware(datetime(2030, 5, 1))
+
+        self.direct = self._flight(self.kyiv, self.paris, 9, 20)
+        self.first_leg = self._flight(self.kyiv, self.warsaw, 8, 10)
+        self.tight_leg = self._flight(self.warsaw, self.paris, 10.25, 12)
+        self.second_leg = self._flight(self.warsaw, self.paris, 11, 13)
+
+    def tearDown(self):
+        route_graph.reset()
+
+    def _flight(self, source, destination, departs, arrives):
+        route = sample_route(source, destination)
+        return sample_flight(
+            route,
+            self.airplane,
+            departure_time=self.day + timedelta(hours=departs),
+            arrival_time=self.day + timedelta(hours=arrives),
+        )
+
+    def _search(self, **params):
+        query = {
+            "source": self.kyiv.id,
+            "destination": self.paris.id,
+            "departure_after": self.day.isoformat(),
+        }
+        query.update(params)
+        return self.client.get(ITINERARY_URL, query)
+
+    def _legs(self, res):
+        return [[leg["id"] for leg in itinerary["legs"]] for itinerary in res.data]
+
+    def test_connection_ranked_by_arrival_with_min_connection_time(self):
+        res = self._search()
+
+        self.assertEqual(
+            self._legs(res),
+            [[self.first_leg.id, self.second_leg.id], [self.direct.id]],
+        )
+        self.assertEqual(res.data[0]["distance"], 200)
+
+    def test_max_legs(self):
+        res = self._search(max_legs=1)
+
+        self.assertEqual(self._legs(res), [[self.direct.id]])
+
+    def test_graph_patched_on_flight_changes_without_reload(self):
+        self._search()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.second_leg.delete()
+            faster = self._flight(self.kyiv, self.paris, 7, 9)
+
+        with self.assertNumQueries(0):
+            itineraries = route_graph.find(
+                self.kyiv.id,
+                self.paris.id,
+                self.day,
+                self.day + timedelta(days=1),
+            )
+
+        self.assertEqual(
+            [itinerary.flight_ids for itinerary in itineraries],
+            [(faster.id,), (self.direct.id,)],
+        )
+
+    def test_graph_reloaded_after_change_in_another_process(self):
+        self._search()
+
+        # Another worker moved the direct flight and bumped the version
+        Flight.objects.filter(pk=self.direct.id).update(
+            departure_time=self.day + timedelta(days=2),
+            arrival_time=self.day + timedelta(days=2, hours=11),
+        )
+        cache.incr(GRAPH_VERSION_KEY)
+        res = self._search()
+
+        self.assertEqual(self._legs(res), [[self.first_leg.id, self.second_leg.id]])
+
+    def test_graph_reloaded_after_ttl_without_shared_cache(self):
+        self._search()
+
+        # A write in another worker whose cache this process does not share
+        Flight.objects.filter(pk=self.direct.id).update(
+            departure_time=self.day + timedelta(days=2),
+            arrival_time=self.day + timedelta(days=2, hours=11),
+        )
+        later = time.time() + settings.ROUTE_GRAPH_TTL + 1
+        with mock.patch("time.time", return_value=later):
+            res = self._search()
+
+        self.assertEqual(self._legs(res), [[self.first_leg.id, self.second_leg.id]])
+
+    def test_departed_flight_dropped_on_patch(self):
+        self._search()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.direct.departure_time = timezone.now() - timedelta(hours=2)
+            self.direct.arrival_time = timezone.now() - timedelta(hours=1)
+            self.direct.save()
+
+        self.assertNotIn(self.direct.id, route_graph.flights)
+        self.assertEqual(route_graph.departures[self.direct.route_id], [])
@@ -0,0 +1,152 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Ticket
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def tickets_payload(flight, seats):
+    return {
+        "tickets": [
+            {"row": row, "seat": seat, "flight": flight.id} for row, seat in seats
+        ]
+    }
+
+
+class OrderCreateApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        route = sample_route(sample_airport(name="A"), sample_airport(name="B"))
+        self.airplane = sample_airplane(
+            sample_airplane_type(), rows=10, seats_in_row=10
+        )
+        self.flight = sample_flight(route, self.airplane)
+
+    def _post(self, seats, flight=None):
+        return self.client.post(
+            ORDER_URL, tickets_payload(flight or self.flight, seats), format="json"
+        )
+
+    def test_query_count_does_not_grow_with_tickets(self):
+        with CaptureQueriesContext(connection) as single:
+            res = self._post([(1, 1)])
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        other_flight = sample_flight(self.flight.route, self.airplane)
+        with CaptureQueriesContext(connection) as group:
+            res = self._post([(2, seat) for seat in range(1, 10)], other_flight)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(single), len(group))
+        self.assertEqual(Ticket.objects.filter(flight=other_flight).count(), 9)
+        other_flight.refresh_from_db()
+        self.assertEqual(other_flight.tickets_sold, 9)
+
+    def test_taken_seat_rejected(self):
+        sample_ticket(sample_order(self.user), self.flight, row=3, seat=3)
+
+        res = self._post([(3, 4), (3, 3)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertEqual(
+            res.data["tickets"][1]["non_field_errors"],
+            ["The fields flight, row, seat must make a unique set."],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_duplicate_seat_in_order_rejected(self):
+        res = self._post([(5, 5), (5, 5)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", res.data["tickets"][1])
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_seat_out_of_range_rejected(self):
+        res = self._post([(11, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("row", res.data["tickets"][0])
+
+    def test_unknown_flight_rejected(self):
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": 999}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("flight", res.data["tickets"][0])
+
+
+class OrderHistoryApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@test.com", "testpass")
+        self.other = get_user_model().objects.create_user("other@test.com", "testpass")
+        self.staff = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        route = sample_route(sample_airport(name="A"), sample_airport(name="B"))
+        self.flight = sample_flight(route, sample_airplane(sample_airplane_type()))
+        self.order = sample_order(self.user)
+        self.other_order = sample_order(self.other)
+
+    def _listed_ids(self, user, params=None):
+        self.client.force_authenticate(user)
+        res = self.client.get(ORDER_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [order["id"] for order in res.data["results"]]
+
+    def test_list_only_own_orders(self):
+        self.assertEqual(self._listed_ids(self.user), [self.order.id])
+        self.assertEqual(self._listed_ids(self.user, {"all": "true"}), [self.order.id])
+        self.assertEqual(self._listed_ids(self.staff), [])
+
+    def test_staff_list_all_orders(self):
+        self.assertEqual(
+            self._listed_ids(self.staff, {"all": "true"}),
+            [self.other_order.id, self.order.id],
+        )
+
+    def test_retrieve_other_customer_order(self):
+        self.client.force_authenticate(self.user)
+        url = reverse("airport:order-detail", args=[self.other_order.id])
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_reads_tickets_from_summaries(self):
+        for seat in range(1, 4):
+            sample_ticket(self.order, self.flight, row=1, seat=seat)
+        self.client.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ORDER_URL)
+
+        tickets = res.data["results"][0]["tickets"]
+        self.assertEqual([ticket["seat"] for ticket in tickets], [1, 2, 3])
+        self.assertEqual(
+            {ticket["flight"]["id"] for ticket in tickets}, {self.flight.id}
+        )
+        self.assertEqual(len(queries), 2)
+        self.assertIn('FROM "airport_orderticketsummary"', queries[1]["sql"])
+        self.assertNotIn("JOIN", queries[1]["sql"])
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import OrderTicketSummary
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_crew,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+class OrderTicketSummaryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.source = sample_airport(name="Boryspil")
+        self.route = sample_route(self.source, sample_airport(name="Orly"))
+        self.airplane = sample_airplane(sample_airplane_type(), name="UR-PSA")
+        self.crew = sample_crew(first_name="Ann", last_name="Brown")
+        self.flight = sample_flight(self.route, self.airplane, crew_list=[self.crew])
+        self.order = sample_order(self.user)
+        self.ticket = sample_ticket(self.order, self.flight, row=2, seat=3)
+
+    def summary(self):
+        return OrderTicketSummary.objects.get(ticket=self.ticket)
+
+    def test_ticket_save_writes_summary(self):
+        summary = self.summary()
+
+        self.assertEqual(summary.order_id, self.order.id)
+        self.assertEqual((summary.row, summary.seat), (2, 3))
+        self.assertEqual(summary.source_name, "Boryspil")
+        self.assertEqual(summary.destination_name, "Orly")
+        self.assertEqual(summary.airplane_name, "UR-PSA")
+        self.assertEqual(summary.crew_names, ["Ann Brown"])
+        self.assertEqual(summary.departure_time, self.flight.departure_time)
+
+    def test_order_create_writes_summaries(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": seat, "flight": self.flight.id} for seat in (1, 2)
+            ]
+        }
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            OrderTicketSummary.objects.filter(order_id=res.data["id"]).count(), 2
+        )
+
+    def test_flight_reschedule_and_crew_change(self):
+        self.flight.departure_time += timedelta(hours=1)
+        self.flight.save()
+        self.flight.crew.add(sample_crew(first_name="Zoe", last_name="Adams"))
+
+        summary = self.summary()
+        self.assertEqual(summary.departure_time, self.flight.departure_time)
+        self.assertEqual(summary.crew_names, ["Ann Brown", "Zoe Adams"])
+
+    def test_catalog_renames(self):
+        self.source.name = "Kyiv"
+        self.source.save()
+        self.route.distance = 2100
+        self.route.save()
+        self.airplane.name = "UR-PSB"
+        self.airplane.save()
+        self.crew.last_name = "Green"
+        self.crew.save()
+
+        summary = self.summary()
+        self.assertEqual(summary.source_name, "Kyiv")
+        self.assertEqual(summary.distance, 2100)
+        self.assertEqual(summary.airplane_name, "UR-PSB")
+        self.assertEqual(summary.crew_names, ["Ann Green"])
+
+        self.crew.delete()
+        self.assertEqual(self.summary().crew_names, [])
+
+    def test_ticket_delete_removes_summary(self):
+        self.ticket.delete()
+
+        self.assertFalse(OrderTicketSummary.objects.exists())
+
+    def test_rebuild_command_repairs_drift(self):
+        OrderTicketSummary.objects.update(airplane_name="stale")
+        sample_ticket(self.order, self.flight, row=5, seat=5).summary.delete()
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_order_summaries", "--check", stdout=StringIO())
+
+        call_command("rebuild_order_summaries", stdout=StringIO())
+        self.assertEqual(self.summary().airplane_name, "UR-PSA")
+        self.assertEqual(OrderTicketSummary.objects.count(), 2)
+        call_command("rebuild_order_summaries", "--check", stdout=StringIO())
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+)
+
+Flight_URL = reverse("airport:flight-list")
+AIRPORT_URL = reverse("airport:airport-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        route = sample_route(sample_airport(name="A"), sample_airport(name="B"))
+        airplane = sample_airplane(sample_airplane_type())
+        departure = timezone.now() + timedelta(days=1)
+        # Two flights share a departure time to exercise the id tie-breaker
+        self.flights = [
+            sample_flight(
+                route,
+                airplane,
+                departure_time=departure + timedelta(hours=hours),
+                arrival_time=departure + timedelta(hours=hours + 2),
+            )
+            for hours in (5, 1, 3, 1, 4)
+        ]
+
+    def test_flights_walk_in_departure_order(self):
+        expected = [
+            flight.id
+            for flight in sorted(
+                self.flights, key=lambda flight: (flight.departure_time, flight.id)
+            )
+        ]
+        seen = []
+        url = Flight_URL + "?page_size=2"
+        while url:
+            res = self.client.get(url)
+            seen.extend(flight["id"] for flight in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(seen, expected)
+
+    def test_no_count_query_unless_requested(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(AIRPORT_URL)
+
+        self.assertNotIn("count", res.data)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+    def test_approximate_count(self):
+        res = self.client.get(AIRPORT_URL, {"count": "approx"})
+
+        self.assertEqual(res.data["count"], 2)
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_order_count_is_the_customers(self):
+        other = get_user_model().objects.create_user("other@test.com", "testpass")
+        for user in (self.user, other, other):
+            sample_order(user)
+
+        res = self.client.get(ORDER_URL, {"count": "approx"})
+
+        self.assertEqual(res.data["count"], 1)
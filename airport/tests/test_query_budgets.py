@@ -0,0 +1,219 @@
+import json
+import re
+import time
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from airport.cache import response_cache
+from airport.models import Flight
+from airport.pagination import KeysetPagination
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_crew,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+
+
+class Measurement(list):
+    db_ms = 0.0
+
+
+BUDGETS = json.loads(Path(__file__).with_name("query_budgets.json").read_text())
+
+LIST_ENDPOINTS = (
+    "airport",
+    "route",
+    "crew",
+    "airplanetype",
+    "airplane",
+    "flight",
+    "order",
+)
+
+
+def repeated_sql(queries):
+    """Statements that ran more than once, with literals masked"""
+    statements = Counter(
+        re.sub(r"'[^']*'|\b\d+\b", "?", query["sql"]) for query in queries
+    )
+    return [f"{count}x {sql}" for sql, count in statements.most_common() if count > 1]
+
+
+class QueryBudgetTests(TestCase):
+    """Query counts and database time per endpoint, see ``query_budgets.json``.
+
+    List endpoints are measured on a small dataset and on several pages of
+    flights, each with its crew and tickets from several orders: their
+    query count must not depend on the number of rows returned, on any page.
+    ``db_ms`` budgets are loose ceilings that catch work growing with the
+    seeded data, not precise timings.
+    """
+
+    crew_per_flight = 4
+    orders_per_flight = 3
+    tickets_per_order = 2
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.seeded = 0
+        self._seed(2)
+
+    def _seed(self, count):
+        departure = timezone.now() + timedelta(days=1)
+        for index in range(self.seeded, self.seeded + count):
+            source = sample_airport(name=f"Source {index}")
+            destination = sample_airport(name=f"Destination {index}")
+            route = sample_route(source, destination)
+            airplane = sample_airplane(
+                sample_airplane_type(name=f"Type {index}"), name=f"Plane {index}"
+            )
+            crew = [
+                sample_crew(first_name=f"Crew {index}.{member}")
+                for member in range(self.crew_per_flight)
+            ]
+            flight = sample_flight(
+                route,
+                airplane,
+                crew,
+                departure_time=departure + timedelta(hours=index),
+                arrival_time=departure + timedelta(hours=index + 2),
+            )
+            for row in range(1, self.orders_per_flight + 1):
+                order = sample_order(self.user)
+                for seat in range(1, self.tickets_per_order + 1):
+                    sample_ticket(order, flight, row=row, seat=seat)
+        self.seeded += count
+
+    def _measure(self, method, url, data=None):
+        """The response and its queries, with their time in ``queries.db_ms``"""
+        db_time = [0.0]
+
+        def timer(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db_time[0] += time.perf_counter() - started
+
+        response_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            with connection.execute_wrapper(timer):
+                res = getattr(self.client, method)(url, data, format="json")
+        self.assertLess(res.status_code, 400, res.data)
+        # The query log is bounded, keep the queries past later seeding
+        queries = Measurement(queries.captured_queries)
+        queries.db_ms = db_time[0] * 1000
+        return res, queries
+
+    def _report(self, queries):
+        return "\n".join(
+            [f"{len(queries)} queries, {queries.db_ms:.1f}ms in the database"]
+            + repeated_sql(queries)
+        )
+
+    def _check_budget(self, key, queries):
+        self.assertLessEqual(
+            len(queries),
+            BUDGETS[key]["queries"],
+            f"{key} exceeds its query budget:\n{self._report(queries)}",
+        )
+        self.assertLessEqual(
+            queries.db_ms,
+            BUDGETS[key]["db_ms"],
+            f"{key} exceeds its database time budget:\n{self._report(queries)}",
+        )
+
+    def test_list_queries_do_not_grow_with_results(self):
+        small = {
+            name: self._measure("get", reverse(f"airport:{name}-list"))[1]
+            for name in LIST_ENDPOINTS
+        }
+        self._seed(3 * KeysetPagination.page_size)
+
+        for name in LIST_ENDPOINTS:
+            with self.subTest(endpoint=name):
+                url = reverse(f"airport:{name}-list")
+                for page in range(2):
+                    res, large = self._measure("get", url)
+                    self.assertEqual(
+                        len(large),
+                        len(small[name]),
+                        f"{name}-list queries grow with the result size:\n"
+                        f"{self._report(large)}",
+                    )
+                    self._check_budget(f"{name}-list", large)
+                    url = res.data["next"]
+                    self.assertIsNotNone(url, f"{name}-list has a single page")
+
+    def test_retrieve_within_budget(self):
+        flight = Flight.objects.first()
+        for name in LIST_ENDPOINTS:
+            with self.subTest(endpoint=name):
+                list_url = reverse(f"airport:{name}-list")
+                pk = self.client.get(list_url).data["results"][0]["id"]
+                _, queries = self._measure(
+                    "get", reverse(f"airport:{name}-detail", args=[pk])
+                )
+                self._check_budget(f"{name}-retrieve", queries)
+
+        _, queries = self._measure(
+            "get", reverse("airport:flight-seat-map", args=[flight.id])
+        )
+        self._check_budget("flight-seat-map", queries)
+
+    def test_create_within_budget(self):
+        flight = Flight.objects.first()
+        departure = timezone.now() + timedelta(days=2)
+        payloads = {
+            "airport": {"name": "New airport", "closest_big_city": "City"},
+            "route": {
+                "source": flight.route.source_id,
+                "destination": flight.route.destination_id,
+                "distance": 500,
+            },
+            "crew": {"first_name": "New", "last_name": "Crew"},
+            "airplanetype": {"name": "New type"},
+            "airplane": {
+                "name": "New plane",
+                "rows": 20,
+                "seats_in_row": 6,
+                "airplane_type": flight.airplane.airplane_type_id,
+            },
+            "flight": {
+                "route": flight.route_id,
+                "airplane": flight.airplane_id,
+                "crew": list(flight.crew.values_list("id", flat=True)),
+                "departure_time": departure,
+                "arrival_time": departure + timedelta(hours=2),
+            },
+            "order": {
+                "tickets": [
+                    {"row": 5, "seat": seat, "flight": flight.id}
+                    for seat in range(1, 4)
+                ]
+            },
+        }
+        for name, payload in payloads.items():
+            with self.subTest(endpoint=name):
+                _, queries = self._measure(
+                    "post", reverse(f"airport:{name}-list"), payload
+                )
+                self._check_budget(f"{name}-create", queries)
@@ -0,0 +1,97 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.cache import response_cache
+from airport.tests.test_utils import sample_airport, sample_crew, sample_route
+
+AIRPORT_URL = reverse("airport:airport-list")
+ROUTE_URL = reverse("airport:route-list")
+CREW_URL = reverse("airport:crew-list")
+
+
+class CatalogResponseCacheTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.kyiv = sample_airport(name="KBP")
+        self.lviv = sample_airport(name="LWO")
+        sample_route(self.kyiv, self.lviv)
+        sample_crew()
+
+    def _get(self, url, **headers):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(url, headers=headers)
+
+    def _write(self, func, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return func(*args, **kwargs)
+
+    def test_repeated_list_served_from_cache(self):
+        first = self._get(AIRPORT_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(response_cache.hits, 1)
+        self.assertEqual(response_cache.misses, 1)
+
+    def test_if_none_match_returns_304(self):
+        etag = self._get(AIRPORT_URL)["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AIRPORT_URL, headers={"If-None-Match": etag})
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_write_invalidates_dependent_endpoints_only(self):
+        airports = self._get(AIRPORT_URL)
+        routes = self._get(ROUTE_URL)
+        crews = self._get(CREW_URL)
+
+        self.kyiv.name = "Boryspil"
+        self._write(self.kyiv.save)
+
+        new_airports = self._get(AIRPORT_URL)
+        new_routes = self._get(ROUTE_URL)
+        self.assertNotEqual(new_airports["ETag"], airports["ETag"])
+        self.assertNotEqual(new_routes["ETag"], routes["ETag"])
+        self.assertEqual(new_routes.data["results"][0]["source"], "Boryspil")
+        self.assertEqual(self._get(CREW_URL)["ETag"], crews["ETag"])
+
+    def test_delete_invalidates_detail(self):
+        url = reverse("airport:airport-detail", args=[self.lviv.id])
+        self.assertEqual(self._get(url).status_code, status.HTTP_200_OK)
+
+        self._write(self.lviv.delete)
+
+        self.assertEqual(self._get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_entries_store_plain_data(self):
+        self._get(AIRPORT_URL)
+
+        (data, _), *_ = response_cache._data.values()
+        self.assertIs(type(data), dict)
+        self.assertIs(type(data["results"]), list)
+
+    def test_entries_and_versions_expire(self):
+        first = self._get(AIRPORT_URL)
+        ttl = settings.RESPONSE_CACHE_TTL + 1
+
+        with mock.patch("time.time", return_value=time.time() + ttl), mock.patch(
+            "time.monotonic", return_value=time.monotonic() + ttl
+        ):
+            res = self.client.get(AIRPORT_URL, headers={"If-None-Match": first["ETag"]})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], first["ETag"])
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from airport.models import Order
+from airport.row_serializers import FlightListRows, OrderListRows
+from airport.serializers import FlightListSerializer, OrderListSerializer
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_crew,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+from airport.views import FlightViewSet, OrderViewSet
+
+
+class RowSerializerGoldenTests(TestCase):
+    """The fast list path must render byte-identical JSON"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user("test@test.com", "testpass")
+        route = sample_route(
+            sample_airport(name="Boryspil"), sample_airport(name="Orly"), distance=2021
+        )
+        airplane = sample_airplane(sample_airplane_type(), name="UR-PSA")
+        crew = [
+            sample_crew(first_name="Zoe", last_name="Adams"),
+            sample_crew(first_name="Ann", last_name="Brown"),
+        ]
+        flights = [
+            sample_flight(route, airplane, crew_list=crew),
+            sample_flight(route, airplane, crew_list=crew[1:]),
+            sample_flight(None, None),
+        ]
+        flights[1].departure_time += timedelta(microseconds=123456)
+        flights[1].save()
+
+        order = sample_order(user)
+        sample_ticket(order, flights[0], row=2, seat=1)
+        sample_ticket(order, flights[0], row=1, seat=3)
+        sample_ticket(sample_order(user), flights[1], row=4, seat=4)
+        sample_order(user)
+
+    @staticmethod
+    def render(data):
+        return JSONRenderer().render(data)
+
+    def test_flight_list_matches_serializer(self):
+        queryset = FlightViewSet.queryset_for_fields()
+
+        expected = FlightListSerializer(queryset, many=True).data
+        reader = FlightListRows()
+        actual = reader.to_representation(reader.rows(queryset))
+
+        self.assertEqual(self.render(actual), self.render(expected))
+
+    def test_order_list_matches_serializer(self):
+        queryset = OrderViewSet.queryset_for_fields()
+        self.assertEqual(Order.objects.count(), 3)
+
+        expected = OrderListSerializer(queryset, many=True).data
+        reader = OrderListRows()
+        actual = reader.to_representation(reader.rows(queryset))
+
+        self.assertEqual(self.render(actual), self.render(expected))
@@ -0,0 +1,157 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+from airport_service.management.commands.rebuild_seat_counters import (
+    Command as RebuildSeatCounters,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+class FlightSeatCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        route = sample_route(sample_airport(name="A"), sample_airport(name="B"))
+        airplane = sample_airplane(sample_airplane_type(), rows=10, seats_in_row=4)
+        self.flight = sample_flight(route, airplane)
+
+    def test_order_create_increments_counter(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "flight": self.flight.id},
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+            ]
+        }
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 2)
+        self.assertEqual(self.flight.seats_available, 38)
+
+    def test_ticket_and_order_delete_decrement_counter(self):
+        order = sample_order(self.user)
+        ticket = sample_ticket(order, self.flight, row=1, seat=1)
+        sample_ticket(order, self.flight, row=1, seat=2)
+        sample_ticket(order, self.flight, row=1, seat=3)
+
+        ticket.delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 2)
+
+        order.delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 0)
+
+    def test_list_reads_counter(self):
+        order = sample_order(self.user)
+        sample_ticket(order, self.flight, row=2, seat=2)
+
+        res = self.client.get(reverse("airport:flight-list"))
+
+        self.assertEqual(res.data["results"][0]["tickets_available"], 39)
+
+    def test_rebuild_command_repairs_drift(self):
+        order = sample_order(self.user)
+        sample_ticket(order, self.flight, row=1, seat=1)
+        Flight.objects.filter(pk=self.flight.pk).update(tickets_sold=7)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_seat_counters", "--check", stdout=StringIO())
+
+        call_command("rebuild_seat_counters", stdout=StringIO())
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 1)
+        call_command("rebuild_seat_counters", "--check", stdout=StringIO())
+
+    def test_rebuild_keeps_tickets_sold_after_the_scan(self):
+        Flight.objects.filter(pk=self.flight.pk).update(tickets_sold=7)
+        scan = RebuildSeatCounters._mismatched
+
+        def scan_then_order(command, batch_size):
+            mismatched = scan(command, batch_size)
+            self._order(3, 3)
+            return mismatched
+
+        with mock.patch.object(RebuildSeatCounters, "_mismatched", scan_then_order):
+            call_command("rebuild_seat_counters", stdout=StringIO())
+
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 1)
+        self.assertEqual(list(self.flight.seat_map.taken_seats()), [(3, 3)])
+        call_command("rebuild_seat_counters", "--check", stdout=StringIO())
+
+    def _order(self, row, seat):
+        payload = {"tickets": [{"row": row, "seat": seat, "flight": self.flight.id}]}
+        return self.client.post(ORDER_URL, payload, format="json")
+
+    def test_moving_flight_repacks_seats(self):
+        self._order(2, 1)
+        wider = sample_airplane(sample_airplane_type(), rows=10, seats_in_row=6)
+
+        res = self.client.patch(
+            reverse("airport:flight-detail", args=[self.flight.id]),
+            {"airplane": wider.id},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        detail = self.client.get(
+            reverse("airport:flight-detail", args=[self.flight.id])
+        )
+        self.assertEqual(detail.data["taken_places"], [{"row": 2, "seat": 1}])
+        self.assertEqual(self._order(2, 1).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._order(1, 5).status_code, status.HTTP_201_CREATED)
+        call_command("rebuild_seat_counters", "--check", stdout=StringIO())
+
+    def test_airplane_geometry_change_repacks_seats(self):
+        self._order(2, 1)
+        airplane = self.flight.airplane
+
+        res = self.client.patch(
+            reverse("airport:airplane-detail", args=[airplane.id]),
+            {"seats_in_row": 6},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.flight.refresh_from_db()
+        self.assertEqual(list(self.flight.seat_map.taken_seats()), [(2, 1)])
+        call_command("rebuild_seat_counters", "--check", stdout=StringIO())
+
+    def test_geometry_change_must_fit_booked_seats(self):
+        self._order(1, 4)
+        narrow = sample_airplane(sample_airplane_type(), rows=10, seats_in_row=2)
+
+        moved = self.client.patch(
+            reverse("airport:flight-detail", args=[self.flight.id]),
+            {"airplane": narrow.id},
+        )
+        shrunk = self.client.patch(
+            reverse("airport:airplane-detail", args=[self.flight.airplane.id]),
+            {"seats_in_row": 3},
+        )
+
+        self.assertEqual(moved.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("airplane", moved.data)
+        self.assertEqual(shrunk.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,194 @@
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight, SeatHold, Ticket
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def hold_url(flight_id):
+    return reverse("airport:flight-hold", args=[flight_id])
+
+
+def sample_seat_flight():
+    route = sample_route(sample_airport(name="A"), sample_airport(name="B"))
+    airplane = sample_airplane(sample_airplane_type(), rows=5, seats_in_row=4)
+    return sample_flight(route, airplane)
+
+
+class SeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.other = get_user_model().objects.create_user(
+            "other@test.com", "testpass", is_staff=True
+        )
+        self.flight = sample_seat_flight()
+
+    def _hold(self, user, seats):
+        self.client.force_authenticate(user)
+        return self.client.post(
+            hold_url(self.flight.id),
+            {"seats": [{"row": row, "seat": seat} for row, seat in seats]},
+            format="json",
+        )
+
+    def _order(self, user, seats):
+        self.client.force_authenticate(user)
+        tickets = [
+            {"row": row, "seat": seat, "flight": self.flight.id} for row, seat in seats
+        ]
+        return self.client.post(ORDER_URL, {"tickets": tickets}, format="json")
+
+    def test_hold_turns_into_order(self):
+        res = self._hold(self.user, [(1, 1), (1, 2)])
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+
+        res = self._order(self.user, [(1, 1), (1, 2)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SeatHold.objects.exists())
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 2)
+        self.assertTrue(self.flight.seat_map.is_taken(1, 2))
+
+    def test_held_seats_lock_the_flight_last(self):
+        self._hold(self.user, [(1, 1)])
+        lock = Flight.lock_for_seat_change
+        locked_at = []
+
+        def record(flight_ids):
+            locked_at.append(len(queries.captured_queries))
+            return lock(flight_ids)
+
+        with CaptureQueriesContext(connection) as queries, mock.patch.object(
+            Flight, "lock_for_seat_change", side_effect=record
+        ):
+            res = self._order(self.user, [(1, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ticket_insert = next(
+            index
+            for index, query in enumerate(queries.captured_queries)
+            if query["sql"].startswith('INSERT INTO "airport_ticket"')
+        )
+        self.assertEqual(len(locked_at), 1)
+        self.assertGreater(locked_at[0], ticket_insert)
+
+    def test_held_seat_rejected_for_other_customer(self):
+        self._hold(self.user, [(2, 2)])
+
+        self.assertEqual(
+            self._hold(self.other, [(2, 2)]).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        res = self._order(self.other, [(2, 2)])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["tickets"][0]["non_field_errors"], [SeatHold.HELD_MESSAGE]
+        )
+
+    def test_taken_seat_cannot_be_held(self):
+        sample_ticket(sample_order(self.user), self.flight, row=3, seat=3)
+
+        res = self._hold(self.other, [(3, 3)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_hold_is_ignored_and_swept(self):
+        self._hold(self.user, [(4, 4)])
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        res = self._hold(self.other, [(4, 4)])
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        call_command("expire_seat_holds", stdout=StringIO())
+        self.assertFalse(SeatHold.objects.exists())
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class SeatHoldContentionTests(TransactionTestCase):
+    workers = 50
+
+    def test_parallel_checkouts_never_double_book(self):
+        flight = sample_seat_flight()
+        users = [
+            get_user_model().objects.create_user(f"user{i}@test.com", "testpass")
+            for i in range(self.workers)
+        ]
+        holds, orders, waits = [], [], []
+        barrier = threading.Barrier(self.workers)
+
+        def post(client, url, data):
+            started = time.monotonic()
+            res = client.post(url, data, format="json")
+            waits.append(time.monotonic() - started)
+            return res
+
+        def checkout(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                res = post(
+                    client, hold_url(flight.id), {"seats": [{"row": 1, "seat": 1}]}
+                )
+                holds.append(res.status_code)
+                if res.status_code == status.HTTP_201_CREATED:
+                    res = post(
+                        client,
+                        ORDER_URL,
+                        {"tickets": [{"row": 1, "seat": 1, "flight": flight.id}]},
+                    )
+                    orders.append(res.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout, args=(u,)) for u in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        flight.refresh_from_db()
+        self.assertEqual(len(holds), self.workers)
+        self.assertLessEqual(
+            set(holds),
+            {
+                status.HTTP_201_CREATED,
+                status.HTTP_400_BAD_REQUEST,
+                status.HTTP_409_CONFLICT,
+            },
+        )
+        self.assertEqual(orders, [status.HTTP_201_CREATED])
+        self.assertEqual(Ticket.objects.filter(flight=flight).count(), 1)
+        self.assertEqual(flight.tickets_sold, 1)
+        # Nobody waits much past the lock timeout, busy seats answer 409
+        self.assertLess(max(waits), settings.SEAT_LOCK_TIMEOUT_MS / 1000 + 3)
@@ -0,0 +1,77 @@
+import base64
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.seat_map import SeatMap
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+
+
+def seat_map_url(flight_id):
+    return reverse("airport:flight-seat-map", args=[flight_id])
+
+
+class SeatMapTests(TestCase):
+    def test_take_release_and_lookup(self):
+        seat_map = SeatMap(3, 3)
+        seat_map.take(1, 1)
+        seat_map.take(3, 3)
+
+        self.assertTrue(seat_map.is_taken(3, 3))
+        self.assertFalse(seat_map.is_taken(2, 2))
+        self.assertEqual(seat_map.count(), 2)
+        self.assertEqual(list(seat_map.taken_seats()), [(1, 1), (3, 3)])
+        self.assertEqual(seat_map.to_rle_rows(), [[0, 1, 2], [3], [2, 1]])
+
+        seat_map.release(1, 1)
+        self.assertEqual(list(seat_map.taken_seats()), [(3, 3)])
+
+    def test_out_of_range_seat(self):
+        with self.assertRaises(ValueError):
+            SeatMap(2, 2).take(3, 1)
+
+
+class FlightSeatMapApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        route = sample_route(sample_airport(name="A"), sample_airport(name="B"))
+        airplane = sample_airplane(sample_airplane_type(), rows=2, seats_in_row=4)
+        self.flight = sample_flight(route, airplane)
+        order = sample_order(self.user)
+        sample_ticket(order, self.flight, row=1, seat=2)
+        self.ticket = sample_ticket(order, self.flight, row=2, seat=4)
+
+    def test_seat_map_base64(self):
+        res = self.client.get(seat_map_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["tickets_sold"], 2)
+        self.assertEqual(base64.b64decode(res.data["seats"]), bytes([0b01000001]))
+
+    def test_seat_map_rle_follows_ticket_delete(self):
+        self.ticket.delete()
+
+        res = self.client.get(seat_map_url(self.flight.id), {"encoding": "rle"})
+
+        self.assertEqual(res.data["seats"], [[1, 1, 2], [4]])
+
+    def test_detail_taken_places_from_bitmap(self):
+        res = self.client.get(reverse("airport:flight-detail", args=[self.flight.id]))
+
+        self.assertEqual(
+            res.data["taken_places"],
+            [{"row": 1, "seat": 2}, {"row": 2, "seat": 4}],
+        )
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.cache import response_cache
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_crew,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+    sample_order,
+    sample_ticket,
+)
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+ROUTE_URL = reverse("airport:route-list")
+
+
+def detail_url(flight_id):
+    return reverse("airport:flight-detail", args=[flight_id])
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.route = sample_route(
+            sample_airport(name="Boryspil"), sample_airport(name="Orly"), distance=2021
+        )
+        airplane = sample_airplane(
+            sample_airplane_type(), name="UR-PSA", rows=2, seats_in_row=2
+        )
+        crew = [sample_crew(first_name="Ann", last_name="Brown")]
+        self.flights = [
+            sample_flight(self.route, airplane, crew_list=crew),
+            sample_flight(self.route, airplane, crew_list=crew),
+        ]
+        sample_ticket(sample_order(self.user), self.flights[0], row=2, seat=1)
+
+    def _get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, [query["sql"] for query in queries.captured_queries]
+
+    def test_minimal_flight_list(self):
+        full = self.client.get(FLIGHT_URL).data["results"]
+        res, queries = self._get(
+            FLIGHT_URL, {"fields": "route,id,departure_time", "page_size": 1}
+        )
+
+        self.assertEqual(
+            res.data["results"],
+            [
+                {
+                    "id": full[0]["id"],
+                    "route": full[0]["route"],
+                    "departure_time": full[0]["departure_time"],
+                }
+            ],
+        )
+        self.assertIsNotNone(res.data["next"])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("airport_airplane", queries[0])
+
+        following = self.client.get(res.data["next"]).data["results"]
+        self.assertEqual([flight["id"] for flight in following], [full[1]["id"]])
+
+    def test_min_seats_without_tickets_available(self):
+        res, _ = self._get(FLIGHT_URL, {"fields": "id", "min_seats": 4})
+
+        self.assertEqual(res.data["results"], [{"id": self.flights[1].id}])
+
+    def test_unknown_fields(self):
+        res = self.client.get(FLIGHT_URL, {"fields": "id,taken_places"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("taken_places", res.data["fields"])
+
+        res = self.client.get(FLIGHT_URL, {"expand": "departure_time"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expand_renders_detail_relations(self):
+        detail = self.client.get(detail_url(self.flights[0].id)).data
+        res, queries = self._get(
+            FLIGHT_URL, {"fields": "id,route,airplane,crew", "expand": "route,crew"}
+        )
+
+        flight = res.data["results"][0]
+        self.assertEqual(flight["route"], detail["route"])
+        self.assertEqual(flight["crew"], detail["crew"])
+        self.assertEqual(flight["airplane"], "UR-PSA")
+        self.assertEqual(len(queries), 2)
+
+    def test_sparse_retrieve(self):
+        res, queries = self._get(
+            detail_url(self.flights[0].id), {"fields": "id,taken_places"}
+        )
+
+        self.assertEqual(
+            res.data,
+            {"id": self.flights[0].id, "taken_places": [{"row": 2, "seat": 1}]},
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("airport_route", queries[0])
+
+    def test_order_list_without_tickets(self):
+        res, queries = self._get(ORDER_URL, {"fields": "id"})
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(list(res.data["results"][0]), ["id"])
+        self.assertEqual(len(queries), 1)
+
+    def test_catalog_list_skips_joins(self):
+        res, queries = self._get(ROUTE_URL, {"fields": "id,distance"})
+
+        self.assertEqual(res.data["results"], [{"id": self.route.id, "distance": 2021}])
+        self.assertNotIn("airport_airport", queries[0])
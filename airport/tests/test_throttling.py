@@ -0,0 +1,111 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.throttling import SimpleRateThrottle
+
+from airport.tests.test_utils import (
+    sample_airport,
+    sample_route,
+    sample_airplane_type,
+    sample_airplane,
+    sample_flight,
+)
+from airport_service.throttling import UserSlidingWindowThrottle
+
+ORDER_URL = reverse("airport:order-list")
+TOKEN_URL = reverse("customer:token_obtain_pair")
+
+
+def throttle_rates(**rates):
+    return mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, rates)
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = APIRequestFactory().get("/")
+        self.request.user = get_user_model().objects.create_user("test@test.com")
+        self.now = 600.0
+
+    def allow(self):
+        with throttle_rates(user="3/minute"):
+            throttle = UserSlidingWindowThrottle()
+        throttle.timer = lambda: self.now
+        return throttle.allow_request(self.request, None), throttle.wait()
+
+    def test_rate_within_window(self):
+        self.assertEqual([self.allow()[0] for _ in range(3)], [True] * 3)
+
+        allowed, wait = self.allow()
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 60 + 60 * (1 - 2 / 3))
+
+    def test_previous_window_slides_out(self):
+        for _ in range(3):
+            self.allow()
+        self.assertFalse(self.allow()[0])
+
+        # Half way into the next window the previous 3 count as 1.5, later as 0.75
+        self.now += 90
+        self.assertEqual(self.allow(), (True, None))
+        self.assertFalse(self.allow()[0])
+        self.now += 15
+        self.assertTrue(self.allow()[0])
+
+    def test_two_counters_per_client(self):
+        for _ in range(3):
+            self.allow()
+        self.now += 90
+        self.allow()
+
+        key = f"throttle_user_{self.request.user.pk}"
+        self.assertEqual(cache.get(f"{key}:10"), 3)
+        self.assertEqual(cache.get(f"{key}:11"), 1)
+        self.assertIsNone(cache.get(key))
+
+
+class ScopedThrottleApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+
+    def test_order_create_has_own_rate(self):
+        self.client.force_authenticate(self.user)
+        route = sample_route(sample_airport(name="A"), sample_airport(name="B"))
+        flight = sample_flight(route, sample_airplane(sample_airplane_type()))
+        payload = {"tickets": [{"row": 1, "seat": 1, "flight": flight.id}]}
+
+        with throttle_rates(order_create="1/minute", user="100/minute"):
+            first = self.client.post(ORDER_URL, payload, format="json")
+            payload["tickets"][0]["seat"] = 2
+            second = self.client.post(ORDER_URL, payload, format="json")
+            listed = self.client.get(ORDER_URL)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(listed.status_code, status.HTTP_200_OK)
+
+    def test_token_endpoint_has_own_rate(self):
+        credentials = {"email": "admin@test.com", "password": "testpass"}
+
+        with throttle_rates(token="2/minute", anon="100/minute"):
+            codes = [
+                self.client.post(TOKEN_URL, credentials).status_code for _ in range(3)
+            ]
+
+        self.assertEqual(
+            codes,
+            [
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
@@ -1,5 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
+
+from airport import async_views
 from airport.views import (
     AirportViewSet,
     RouteViewSet,
@@ -8,6 +10,7 @@ from airport.views import (
     AirplaneViewSet,
     FlightViewSet,
     OrderViewSet,
+    ItineraryViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -18,9 +21,21 @@ router.register("airplane_types", AirplaneTypeViewSet)
 router.register("airplanes", AirplaneViewSet)
 router.register("flights", FlightViewSet)
 router.register("orders", OrderViewSet)
+router.register("itineraries", ItineraryViewSet, basename="itinerary")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("async/flights/", async_views.flight_list, name="async-flight-list"),
+    path(
+        "async/flights/<int:pk>/",
+        async_views.flight_detail,
+        name="async-flight-detail",
+    ),
+    path(
+        "async/flights/<int:pk>/seat-map/",
+        async_views.flight_seat_map,
+        name="async-flight-seat-map",
+    ),
 ]
 
 app_name = "airport"
@@ -1,4 +1,15 @@
+import hashlib
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import OperationalError, transaction
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import viewsets, mixins, status
 from airport.serializers import (
     AirportSerializer,
@@ -10,21 +21,27 @@ from airport.serializers import (
     AirplaneTypeImageSerializer,
     AirplaneTypeDetail,
     AirplaneSerializer,
+    AirplaneListSerializer,
     FlightSerializer,
     FlightListSerializer,
     FlightDetailSerializer,
+    FlightSeatMapSerializer,
+    SeatHoldCreateSerializer,
+    SeatHoldSerializer,
     OrderSerializer,
     OrderListSerializer,
+    ItinerarySearchSerializer,
+    ItinerarySerializer,
 )
 
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
-from django.db.models import F, Count
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q
 from rest_framework.viewsets import GenericViewSet
 from drf_spectacular.utils import extend_schema
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from airport.models import (
     Airport,
@@ -35,25 +52,74 @@ from airport.models import (
     Flight,
     Order,
     Ticket,
+    SeatHold,
+    IdempotencyKey,
 )
+from airport.cache import CachedResponseMixin
+from airport.exports import ORDER_COLUMNS, OUTPUTS, TICKET_COLUMNS, streaming_export
+from airport.fieldsets import EXPAND_PARAMETER, FIELDS_PARAMETER, SparseFieldsMixin
+from airport.itineraries import route_graph
+from airport.row_serializers import FastListMixin, FlightListRows, OrderListRows
+from airport.pagination import CatalogPagination, FlightPagination, OrderPagination
 from airport.permissions import IsAdminOrIfAuthenticatedReadOnly
+from airport_service.metrics import TimedSerializerMixin
 
 # Create your views here.
 
+sparse_fields_schema = extend_schema_view(
+    list=extend_schema(parameters=[FIELDS_PARAMETER]),
+    retrieve=extend_schema(parameters=[FIELDS_PARAMETER]),
+)
 
-class AirportViewSet(viewsets.ModelViewSet):
+TICKETS_AVAILABLE = F("airplane__rows") * F("airplane__seats_in_row") - F(
+    "tickets_sold"
+)
+
+
+def param_to_datetime(name, value, end_of_day=False):
+    """Parses an ISO date or datetime, a bare date covers the whole day"""
+    try:
+        day = parse_date(value)
+        moment = parse_datetime(value) if day is None else None
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        if end_of_day:
+            day += timedelta(days=1)
+        moment = datetime.combine(day, time.min)
+    if moment is None:
+        raise ValidationError({name: "Expected an ISO date or datetime"})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+@sparse_fields_schema
+class AirportViewSet(
+    TimedSerializerMixin, CachedResponseMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
-
-
-class RouteViewSet(viewsets.ModelViewSet):
-    queryset = Route.objects.all().select_related("source", "destination")
+    pagination_class = CatalogPagination
+
+
+@sparse_fields_schema
+class RouteViewSet(
+    TimedSerializerMixin, CachedResponseMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
+    queryset = Route.objects.all()
+    field_queries = {
+        "source": {"select_related": ("source",)},
+        "destination": {"select_related": ("destination",)},
+    }
+    cache_models = (Route, Airport)
     serializer_class = RouteSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    pagination_class = CatalogPagination
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = super().get_queryset()
         if self.action == "list":
             queryset = queryset.order_by("id")
         return queryset
@@ -66,16 +132,25 @@ class RouteViewSet(viewsets.ModelViewSet):
         return RouteSerializer
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+@sparse_fields_schema
+class CrewViewSet(
+    TimedSerializerMixin, CachedResponseMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = Crew.objects.all()
+    field_queries = {"full_name": {"only": ("first_name", "last_name")}}
     serializer_class = CrewSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    pagination_class = CatalogPagination
 
 
-class AirplaneTypeViewSet(viewsets.ModelViewSet):
+@sparse_fields_schema
+class AirplaneTypeViewSet(
+    TimedSerializerMixin, CachedResponseMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    pagination_class = CatalogPagination
 
     def get_serializer_class(self):
         if self.action == "upload_image":
@@ -104,57 +179,166 @@ class AirplaneTypeViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class AirplaneViewSet(viewsets.ModelViewSet):
+@sparse_fields_schema
+class AirplaneViewSet(
+    TimedSerializerMixin, CachedResponseMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = Airplane.objects.all()
+    field_queries = {
+        "airplane_type": {"select_related": ("airplane_type",)},
+        "capacity": {"only": ("rows", "seats_in_row")},
+    }
+    cache_models = (Airplane, AirplaneType)
     serializer_class = AirplaneSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    pagination_class = CatalogPagination
 
-
-class FlightViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Flight.objects.select_related(
-            "route",
-            "route__source",
-            "route__destination",
-            "airplane",
-            "airplane__airplane_type",
-        )
-        .prefetch_related("crew")
-        .annotate(
-            tickets_available=(
-                F("airplane__rows") * F("airplane__seats_in_row") - Count("tickets")
+    def get_serializer_class(self):
+        if self.action in ("list", "retrieve"):
+            return AirplaneListSerializer
+        return AirplaneSerializer
+
+
+class SeatLockConflictMixin:
+    """Answer 409 when a seat or flight row stays locked too long"""
+
+    def handle_exception(self, exc):
+        # lock_not_available: SEAT_LOCK_TIMEOUT_MS elapsed on a seat lock
+        if (
+            isinstance(exc, OperationalError)
+            and getattr(exc.__cause__, "pgcode", None) == "55P03"
+        ):
+            return Response(
+                {"detail": "Flight is busy, please retry."},
+                status=status.HTTP_409_CONFLICT,
             )
-        )
-        .order_by("id")
-    )
+        return super().handle_exception(exc)
+
+
+@sparse_fields_schema
+class FlightViewSet(
+    TimedSerializerMixin,
+    SeatLockConflictMixin,
+    SparseFieldsMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Flight.objects.order_by("id")
+    field_queries = {
+        "route": {"select_related": ("route__source", "route__destination")},
+        "airplane": {"select_related": ("airplane__airplane_type",)},
+        "crew": {
+            "prefetch_related": (
+                Prefetch("crew", queryset=Crew.objects.order_by("id")),
+            )
+        },
+        "tickets_available": {"annotate": {"tickets_available": TICKETS_AVAILABLE}},
+        "taken_places": {
+            "select_related": ("airplane",),
+            "only": ("airplane", "seat_bitmap"),
+        },
+    }
+    # The FlightDetailSerializer representation, in lists
+    expandable_fields = {
+        "route": RouteDetailSerializer(read_only=True),
+        "airplane": AirplaneListSerializer(read_only=True),
+        "crew": CrewSerializer(many=True, read_only=True),
+    }
 
     serializer_class = FlightSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    pagination_class = FlightPagination
+    fast_list_class = FlightListRows
 
     @staticmethod
     def _params_to_ints(qs):
         """Converts a list of string IDs to a list of integers"""
         return [int(str_id) for str_id in qs.split(",")]
 
+    @staticmethod
+    def _airports_to_ids(value):
+        """Airport ids from "1,2", or a subquery by airport name / closest city"""
+        if all(part.strip().isdigit() for part in value.split(",")):
+            return [int(part) for part in value.split(",")]
+        return Airport.objects.filter(
+            Q(closest_big_city__iexact=value) | Q(name__iexact=value)
+        ).values("id")
+
     def get_queryset(self):
-        airplane_name = self.request.query_params.get("airplane_name")
-        crew = self.request.query_params.get("crew")
-        queryset = self.queryset
+        if self.action in ("seat_map", "hold"):
+            return Flight.objects.select_related("airplane").filter(
+                airplane__isnull=False
+            )
+
+        params = self.request.query_params
+        airplane_name = params.get("airplane_name")
+        crew = params.get("crew")
+        source = params.get("source")
+        destination = params.get("destination")
+        departure_after = params.get("departure_after")
+        departure_before = params.get("departure_before")
+        min_seats = params.get("min_seats")
+        queryset = super().get_queryset()
+
+        if source or destination:
+            routes = Route.objects.all()
+            if source:
+                routes = routes.filter(source_id__in=self._airports_to_ids(source))
+            if destination:
+                routes = routes.filter(
+                    destination_id__in=self._airports_to_ids(destination)
+                )
+            queryset = queryset.filter(route_id__in=routes.values("id"))
+
+        if departure_after:
+            queryset = queryset.filter(
+                departure_time__gte=param_to_datetime(
+                    "departure_after", departure_after
+                )
+            )
+
+        if departure_before:
+            queryset = queryset.filter(
+                departure_time__lt=param_to_datetime(
+                    "departure_before", departure_before, end_of_day=True
+                )
+            )
 
+        if min_seats:
+            if not min_seats.isdigit():
+                raise ValidationError({"min_seats": "Expected a positive integer"})
+            queryset = queryset.alias(seats_left=TICKETS_AVAILABLE).filter(
+                seats_left__gte=int(min_seats)
+            )
+
+        # Semi-joins rather than joins: a flight matching several crew
+        # members is still one row, so no DISTINCT is needed
         if airplane_name:
-            queryset = queryset.filter(airplane__name__icontains=airplane_name)
+            queryset = queryset.filter(
+                airplane_id__in=Airplane.objects.filter(
+                    name__icontains=airplane_name
+                ).values("id")
+            )
 
         if crew:
             crew_ids = self._params_to_ints(crew)
-            queryset = queryset.filter(crew__id__in=crew_ids)
+            queryset = queryset.filter(
+                id__in=Flight.crew.through.objects.filter(crew_id__in=crew_ids).values(
+                    "flight_id"
+                )
+            )
 
-        return queryset.distinct()
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
             return FlightListSerializer
         if self.action == "retrieve":
             return FlightDetailSerializer
+        if self.action == "seat_map":
+            return FlightSeatMapSerializer
+        if self.action == "hold":
+            return SeatHoldCreateSerializer
         return FlightSerializer
 
     @extend_schema(
@@ -170,32 +354,151 @@ class FlightViewSet(viewsets.ModelViewSet):
                 type={"type": "array", "items": {"type": "number"}},
                 description="Filter by crew id (ex. ?crew=1,2)",
             ),
+            OpenApiParameter(
+                "source",
+                type=str,
+                description="Source airport ids (ex. ?source=1,2) or city/name",
+                required=False,
+            ),
+            OpenApiParameter(
+                "destination",
+                type=str,
+                description="Destination airport ids or city/name",
+                required=False,
+            ),
+            OpenApiParameter(
+                "departure_after",
+                type=OpenApiTypes.DATETIME,
+                description="Departing at or after (ISO date or datetime)",
+                required=False,
+            ),
+            OpenApiParameter(
+                "departure_before",
+                type=OpenApiTypes.DATETIME,
+                description="Departing before (a bare date is inclusive)",
+                required=False,
+            ),
+            OpenApiParameter(
+                "min_seats",
+                type=int,
+                description="Minimum number of seats available",
+                required=False,
+            ),
+            EXPAND_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "encoding",
+                type=str,
+                enum=["base64", "rle"],
+                description="Seat map encoding (default base64 bitmap)",
+                required=False,
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=True, url_path="seat-map")
+    def seat_map(self, request, pk=None):
+        """Compact occupancy map of the flight seats"""
+        encoding = request.query_params.get("encoding", "base64")
+        if encoding not in ("base64", "rle"):
+            return Response(
+                {"encoding": "Must be one of: base64, rle"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        flight = self.get_object()
+        context = self.get_serializer_context()
+        context["encoding"] = encoding
+        serializer = self.get_serializer(flight, context=context)
+        return Response(serializer.data)
 
-class OrderPagination(PageNumberPagination):
-    page_size = 2
-    max_page_size = 100
+    @extend_schema(responses=SeatHoldSerializer(many=True))
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path="hold",
+        permission_classes=[IsAuthenticated],
+    )
+    def hold(self, request, pk=None):
+        """Hold seats for SEAT_HOLD_MINUTES so they can be ordered without racing"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        seats = [
+            (seat["row"], seat["seat"]) for seat in serializer.validated_data["seats"]
+        ]
+        flight = self.get_object()
+        try:
+            holds = SeatHold.place(flight.id, request.user, seats)
+        except DjangoValidationError as exc:
+            raise ValidationError({"seats": exc.messages})
+        return Response(
+            SeatHoldSerializer(holds, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
 
 
-class OrderViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Order.objects.select_related("customer")
-        .prefetch_related(
-            "tickets__flight__route__source",
-            "tickets__flight__route__destination",
-            "tickets__flight__airplane__airplane_type",
-            "tickets__flight__crew",
-        )
-        .order_by("-created_at")
-    )
+EXPORT_PARAMETERS = [
+    OpenApiParameter(
+        "output",
+        type=str,
+        enum=list(OUTPUTS),
+        description="Export format (default csv)",
+        required=False,
+    ),
+    OpenApiParameter(
+        "created_after",
+        type=OpenApiTypes.DATETIME,
+        description="Orders created at or after (ISO date or datetime)",
+        required=False,
+    ),
+    OpenApiParameter(
+        "created_before",
+        type=OpenApiTypes.DATETIME,
+        description="Orders created before (a bare date is inclusive)",
+        required=False,
+    ),
+    OpenApiParameter(
+        "flight",
+        type={"type": "array", "items": {"type": "number"}},
+        description="Only tickets on these flights, or orders having one (ex. ?flight=1,2)",
+        required=False,
+    ),
+]
+
+
+@sparse_fields_schema
+class OrderViewSet(
+    TimedSerializerMixin,
+    SeatLockConflictMixin,
+    SparseFieldsMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Order.objects.order_by("-created_at")
+    field_queries = {
+        # OrderSerializer renders ticket flights as pks; the list reads
+        # OrderTicketSummary instead (see OrderListRows)
+        "tickets": {"prefetch_related": ("tickets",)},
+    }
 
     serializer_class = OrderSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
     pagination_class = OrderPagination
+    fast_list_class = OrderListRows
+
+    def get_queryset(self):
+        """The user's own orders, or everyone's for staff asking ``?all=true``"""
+        queryset = super().get_queryset()
+        if getattr(self, "swagger_fake_view", False):
+            return queryset.none()
+        user = self.request.user
+        if user.is_staff and self.request.query_params.get("all") in ("1", "true"):
+            return queryset
+        return queryset.filter(customer=user)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -203,5 +506,184 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         return OrderSerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "all",
+                type=bool,
+                description="Orders of all customers (staff only, ex. ?all=true)",
+                required=False,
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def get_throttles(self):
+        if self.action == "create":
+            self.throttle_scope = "order_create"
+        return super().get_throttles()
+
     def perform_create(self, serializer):
         serializer.save(customer=self.request.user)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "Idempotency-Key",
+                type=str,
+                location=OpenApiParameter.HEADER,
+                description=(
+                    "Retries with the same key replay the first successful "
+                    f"response for {settings.IDEMPOTENCY_KEY_HOURS}h"
+                ),
+                required=False,
+            ),
+        ]
+    )
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if key is None:
+            return super().create(request, *args, **kwargs)
+        if not 0 < len(key) <= IdempotencyKey._meta.get_field("key").max_length:
+            raise ValidationError({"Idempotency-Key": "Expected 1 to 255 characters"})
+        fingerprint = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+        ).hexdigest()
+
+        # A failed create rolls the key back with it, only successes replay
+        with transaction.atomic():
+            record, created = IdempotencyKey.claim(request.user, key, fingerprint)
+            if not created:
+                if record.fingerprint != fingerprint:
+                    return Response(
+                        {"detail": IdempotencyKey.REUSED_MESSAGE},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                return Response(
+                    record.response,
+                    status=record.status_code,
+                    headers={"Idempotent-Replayed": "true"},
+                )
+            response = super().create(request, *args, **kwargs)
+            record.status_code = response.status_code
+            record.response = response.data
+            record.save(update_fields=["status_code", "response"])
+        return response
+
+    def _export_params(self, created_at):
+        """Output format plus the created_at and flight filters of an export"""
+        params = self.request.query_params
+        output = params.get("output", "csv")
+        if output not in OUTPUTS:
+            raise ValidationError({"output": f"Must be one of: {', '.join(OUTPUTS)}"})
+
+        filters = {}
+        if params.get("created_after"):
+            filters[f"{created_at}__gte"] = param_to_datetime(
+                "created_after", params["created_after"]
+            )
+        if params.get("created_before"):
+            filters[f"{created_at}__lt"] = param_to_datetime(
+                "created_before", params["created_before"], end_of_day=True
+            )
+
+        flights = params.get("flight")
+        if flights:
+            if not all(part.strip().isdigit() for part in flights.split(",")):
+                raise ValidationError(
+                    {"flight": "Expected flight ids (ex. ?flight=1,2)"}
+                )
+            flights = [int(part) for part in flights.split(",")]
+        return output, filters, flights
+
+    @extend_schema(
+        parameters=EXPORT_PARAMETERS,
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        """Stream all orders with their customer and ticket count (staff only)"""
+        output, filters, flights = self._export_params("created_at")
+        orders = (
+            Order.objects.filter(**filters)
+            .annotate(tickets_count=Count("tickets"))
+            .order_by("id")
+        )
+        if flights:
+            orders = orders.filter(
+                Exists(
+                    Ticket.objects.filter(order=OuterRef("pk"), flight_id__in=flights)
+                )
+            )
+        return streaming_export(orders, ORDER_COLUMNS, output, "orders")
+
+    @extend_schema(
+        parameters=EXPORT_PARAMETERS,
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export/tickets",
+        permission_classes=[IsAdminUser],
+    )
+    def export_tickets(self, request):
+        """Stream all tickets with their order, customer, flight and route (staff only)"""
+        output, filters, flights = self._export_params("order__created_at")
+        tickets = Ticket.objects.filter(**filters).order_by("id")
+        if flights:
+            tickets = tickets.filter(flight_id__in=flights)
+        return streaming_export(tickets, TICKET_COLUMNS, output, "tickets")
+
+
+class ItineraryViewSet(TimedSerializerMixin, viewsets.GenericViewSet):
+    """Connecting flights between two airports, found on the in-memory route graph"""
+
+    serializer_class = ItinerarySerializer
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+    @extend_schema(parameters=[ItinerarySearchSerializer])
+    def list(self, request, *args, **kwargs):
+        search = ItinerarySearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+        departure_after = params.get("departure_after") or timezone.now()
+        departure_before = params.get("departure_before") or (
+            departure_after + timedelta(days=1)
+        )
+
+        itineraries = route_graph.find(
+            params["source"],
+            params["destination"],
+            departure_after,
+            departure_before,
+            max_legs=params["max_legs"],
+            limit=params["limit"],
+            min_connection=timedelta(minutes=settings.ITINERARY_MIN_CONNECTION_MINUTES),
+            max_connection=timedelta(hours=settings.ITINERARY_MAX_CONNECTION_HOURS),
+        )
+        flights = FlightViewSet.queryset_for_fields().in_bulk(
+            {
+                flight_id
+                for itinerary in itineraries
+                for flight_id in itinerary.flight_ids
+            }
+        )
+        results = [
+            {
+                "legs": [flights[flight_id] for flight_id in itinerary.flight_ids],
+                "departure_time": itinerary.departure_time,
+                "arrival_time": itinerary.arrival_time,
+                "duration": itinerary.duration,
+                "distance": itinerary.distance,
+            }
+            for itinerary in itineraries
+            if all(flight_id in flights for flight_id in itinerary.flight_ids)
+        ]
+        return Response(self.get_serializer(results, many=True).data)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class AirportServiceConfig(AppConfig):
+    name = "airport_service"
+
+    def ready(self):
+        from airport_service.metrics import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
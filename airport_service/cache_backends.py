@@ -0,0 +1,321 @@
+"""Cache backend shared by every worker process on a host.
+
+``MmapCache`` keeps entries in fixed-size slots of a memory-mapped file
+(``LOCATION``), so all processes that map it see one cache. A key hashes
+to a set of ``WAYS`` slots; a new entry takes a free or expired slot of
+its set, or else evicts the least recently used one.
+
+Writes lock only their set, with a thread lock stripe plus an ``fcntl``
+record lock on the set's byte range. Reads take no lock: each slot has
+a sequence number that writers make odd while they change the slot, and
+a reader retries until it sees the same even number before and after
+copying the slot. Values larger than a slot are not cached.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "airport_service.cache_backends.MmapCache",
+            "LOCATION": "/dev/shm/airport-service.cache",
+            "OPTIONS": {"SLOTS": 16384, "SLOT_SIZE": 2048, "WAYS": 8},
+        }
+    }
+"""
+
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+MAGIC = b"AIRPORT-MMAP-CACHE-1"
+# magic, slots, slot size, ways
+FILE_HEADER = struct.Struct("<20sIII")
+HEADER_SIZE = 64
+# sequence, key hash, expires at (inf: never), last used, key length, value length
+SLOT_HEADER = struct.Struct("<IQddHI")
+SEQUENCE = struct.Struct("<I")
+LAST_USED = struct.Struct("<d")
+LAST_USED_OFFSET = 4 + 8 + 8
+EMPTY_HASH = 0
+READ_RETRIES = 100
+THREAD_LOCK_STRIPES = 64
+
+
+def key_hash(key):
+    """Stable across processes, unlike ``hash()``; never ``EMPTY_HASH``"""
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def _next_sequence(mapping, offset):
+    """Odd while a writer changes the slot, even again once it is done"""
+    sequence = (SEQUENCE.unpack_from(mapping, offset)[0] + 1) & 0xFFFFFFFF
+    SEQUENCE.pack_into(mapping, offset, sequence)
+    return sequence
+
+
+class MmapCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.path = location
+        self.ways = int(options.get("WAYS", 8))
+        self.slots = -(-int(options.get("SLOTS", 16384)) // self.ways) * self.ways
+        self.slot_size = int(options.get("SLOT_SIZE", 2048))
+        self.sets = self.slots // self.ways
+        self._map = None
+        self._fd = None
+        self._open_lock = threading.Lock()
+        self._thread_locks = [threading.Lock() for _ in range(THREAD_LOCK_STRIPES)]
+
+    # File
+
+    def _mapping(self):
+        if self._map is None:
+            with self._open_lock:
+                if self._map is None:
+                    self._open()
+        return self._map
+
+    def _open(self):
+        size = HEADER_SIZE + self.slots * self.slot_size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(fd, fcntl.LOCK_EX, HEADER_SIZE, 0)
+        try:
+            header = os.pread(fd, FILE_HEADER.size, 0)
+            expected = FILE_HEADER.pack(MAGIC, self.slots, self.slot_size, self.ways)
+            if header != expected or os.fstat(fd).st_size != size:
+                # New file, or one laid out differently: start empty
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, expected, 0)
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN, HEADER_SIZE, 0)
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+
+    def close(self, **kwargs):
+        # Kept open for the life of the process, like LocMemCache's dict
+        pass
+
+    # Slots
+
+    def _set_of(self, hashed):
+        return hashed % self.sets
+
+    def _offset(self, set_index, way):
+        return HEADER_SIZE + (set_index * self.ways + way) * self.slot_size
+
+    def _lock(self, set_index):
+        thread_lock = self._thread_locks[set_index % THREAD_LOCK_STRIPES]
+        return _SetLock(self, thread_lock, set_index)
+
+    def _read_slot(self, mapping, offset):
+        """(key hash, expires, key, pickled value) as one consistent snapshot"""
+        for _ in range(READ_RETRIES):
+            (sequence,) = SEQUENCE.unpack_from(mapping, offset)
+            if sequence & 1:
+                continue
+            _, hashed, expires, _, key_length, value_length = SLOT_HEADER.unpack_from(
+                mapping, offset
+            )
+            start = offset + SLOT_HEADER.size
+            if key_length + value_length > self.slot_size - SLOT_HEADER.size:
+                data = b""
+            else:
+                data = mapping[start : start + key_length + value_length]
+            if SEQUENCE.unpack_from(mapping, offset)[0] == sequence:
+                return hashed, expires, data[:key_length], data[key_length:]
+        return None
+
+    def _find(self, mapping, key, hashed, now):
+        """Way and pickled value of the live entry for ``key``, if any"""
+        set_index = self._set_of(hashed)
+        for way in range(self.ways):
+            offset = self._offset(set_index, way)
+            if SLOT_HEADER.unpack_from(mapping, offset)[1] != hashed:
+                continue
+            snapshot = self._read_slot(mapping, offset)
+            if snapshot is None:
+                continue
+            slot_hash, expires, slot_key, value = snapshot
+            if slot_hash == hashed and slot_key == key and expires > now:
+                return way, value
+        return None, None
+
+    def _write_slot(self, mapping, offset, hashed, expires, now, key, value):
+        writing = _next_sequence(mapping, offset)
+        SLOT_HEADER.pack_into(
+            mapping, offset, writing, hashed, expires, now, len(key), len(value)
+        )
+        start = offset + SLOT_HEADER.size
+        mapping[start : start + len(key) + len(value)] = key + value
+        _next_sequence(mapping, offset)
+
+    def _clear_slot(self, mapping, offset):
+        writing = _next_sequence(mapping, offset)
+        SLOT_HEADER.pack_into(mapping, offset, writing, EMPTY_HASH, 0, 0, 0, 0)
+        _next_sequence(mapping, offset)
+
+    def _victim(self, mapping, set_index, now):
+        """A free or expired way of the set, or else its least recently used"""
+        oldest_way, oldest_used = 0, math.inf
+        for way in range(self.ways):
+            offset = self._offset(set_index, way)
+            _, hashed, expires, used, _, _ = SLOT_HEADER.unpack_from(mapping, offset)
+            if hashed == EMPTY_HASH or expires <= now:
+                return way
+            if used < oldest_used:
+                oldest_way, oldest_used = way, used
+        return oldest_way
+
+    def _store(self, key, value, timeout, only_if_missing=False):
+        key = key.encode()
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        if len(key) + len(pickled) > self.slot_size - SLOT_HEADER.size:
+            # Too large to cache; an older value must not be served instead
+            if not only_if_missing:
+                self._discard(key)
+            return False
+        hashed = key_hash(key)
+        expires = self.get_backend_timeout(timeout)
+        expires = math.inf if expires is None else expires
+        mapping = self._mapping()
+        set_index = self._set_of(hashed)
+        now = time.time()
+        with self._lock(set_index):
+            way, _ = self._find(mapping, key, hashed, now)
+            if way is not None and only_if_missing:
+                return False
+            if way is None:
+                way = self._victim(mapping, set_index, now)
+            offset = self._offset(set_index, way)
+            self._write_slot(mapping, offset, hashed, expires, now, key, pickled)
+        return True
+
+    # Cache API
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._store(key, value, timeout, only_if_missing=True)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store(key, value, timeout)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version).encode()
+        hashed = key_hash(key)
+        mapping = self._mapping()
+        now = time.time()
+        way, pickled = self._find(mapping, key, hashed, now)
+        if way is None:
+            return default
+        try:
+            value = pickle.loads(pickled)
+        except Exception:
+            return default
+        # Unlocked and unchecked: a lost update only makes eviction less exact
+        offset = self._offset(self._set_of(hashed), way)
+        LAST_USED.pack_into(mapping, offset + LAST_USED_OFFSET, now)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version).encode()
+        hashed = key_hash(key)
+        mapping = self._mapping()
+        set_index = self._set_of(hashed)
+        now = time.time()
+        with self._lock(set_index):
+            way, pickled = self._find(mapping, key, hashed, now)
+            if way is None:
+                return False
+            expires = self.get_backend_timeout(timeout)
+            expires = math.inf if expires is None else expires
+            offset = self._offset(set_index, way)
+            self._write_slot(mapping, offset, hashed, expires, now, key, pickled)
+        return True
+
+    def delete(self, key, version=None):
+        return self._discard(self.make_and_validate_key(key, version=version).encode())
+
+    def _discard(self, key):
+        hashed = key_hash(key)
+        mapping = self._mapping()
+        set_index = self._set_of(hashed)
+        with self._lock(set_index):
+            way, _ = self._find(mapping, key, hashed, time.time())
+            if way is None:
+                return False
+            self._clear_slot(mapping, self._offset(set_index, way))
+        return True
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version).encode()
+        way, _ = self._find(self._mapping(), key, key_hash(key), time.time())
+        return way is not None
+
+    def incr(self, key, delta=1, version=None):
+        """Atomic across processes: read and write happen under the set lock"""
+        key = self.make_and_validate_key(key, version=version).encode()
+        hashed = key_hash(key)
+        mapping = self._mapping()
+        set_index = self._set_of(hashed)
+        now = time.time()
+        with self._lock(set_index):
+            way, pickled = self._find(mapping, key, hashed, now)
+            if way is None:
+                raise ValueError("Key '%s' not found" % key.decode())
+            value = pickle.loads(pickled) + delta
+            offset = self._offset(set_index, way)
+            expires = SLOT_HEADER.unpack_from(mapping, offset)[2]
+            self._write_slot(
+                mapping,
+                offset,
+                hashed,
+                expires,
+                now,
+                key,
+                pickle.dumps(value, self.pickle_protocol),
+            )
+        return value
+
+    def clear(self):
+        mapping = self._mapping()
+        for set_index in range(self.sets):
+            with self._lock(set_index):
+                for way in range(self.ways):
+                    offset = self._offset(set_index, way)
+                    if SLOT_HEADER.unpack_from(mapping, offset)[1] != EMPTY_HASH:
+                        self._clear_slot(mapping, offset)
+
+
+class _SetLock:
+    """Excludes other threads (stripe lock) and processes (fcntl) from a set"""
+
+    def __init__(self, cache, thread_lock, set_index):
+        self.cache = cache
+        self.thread_lock = thread_lock
+        self.start = cache._offset(set_index, 0)
+        self.length = cache.ways * cache.slot_size
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        try:
+            fcntl.lockf(self.cache._fd, fcntl.LOCK_EX, self.length, self.start)
+        except BaseException:
+            self.thread_lock.release()
+            raise
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.lockf(self.cache._fd, fcntl.LOCK_UN, self.length, self.start)
+        finally:
+            self.thread_lock.release()
@@ -0,0 +1,201 @@
+import asyncio
+import io
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import Flight
+
+HOST = "127.0.0.1"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the sync (WSGI) and async (ASGI) flight read "
+        "endpoints on the current database. The Django WSGI/ASGI handlers "
+        "are driven in-process: a thread pool plays a threaded WSGI server "
+        "and one event loop plays an ASGI worker. Runs with DEBUG off (no "
+        "query log, no debug toolbar) and throttling disabled. "
+        "Run generate_scale_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+
+    def _targets(self):
+        flight = Flight.objects.exclude(airplane=None).order_by("id").first()
+        if flight is None:
+            raise CommandError("No flights, run generate_scale_data first")
+        return {
+            "list": (
+                reverse("airport:flight-list"),
+                reverse("airport:async-flight-list"),
+            ),
+            "detail": (
+                reverse("airport:flight-detail", args=[flight.id]),
+                reverse("airport:async-flight-detail", args=[flight.id]),
+            ),
+            "seat_map": (
+                reverse("airport:flight-seat-map", args=[flight.id]),
+                reverse("airport:async-flight-seat-map", args=[flight.id]),
+            ),
+        }
+
+    @staticmethod
+    def _wsgi_call(application, url, token):
+        parts = urlsplit(url)
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": parts.path,
+            "QUERY_STRING": parts.query,
+            "SERVER_NAME": HOST,
+            "SERVER_PORT": "80",
+            "HTTP_HOST": HOST,
+            "REMOTE_ADDR": HOST,
+            "HTTP_AUTHORIZATION": f"Bearer {token}",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.url_scheme": "http",
+        }
+        statuses = []
+        started = time.perf_counter()
+        response = application(environ, lambda status, headers: statuses.append(status))
+        b"".join(response)
+        response.close()
+        elapsed = time.perf_counter() - started
+        if not statuses[0].startswith("200"):
+            raise CommandError(f"GET {url}: {statuses[0]}")
+        return elapsed
+
+    @staticmethod
+    async def _asgi_call(application, url, token):
+        parts = urlsplit(url)
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": parts.query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", HOST.encode()),
+                (b"authorization", f"Bearer {token}".encode()),
+            ],
+            "client": (HOST, 50000),
+            "server": (HOST, 80),
+        }
+        messages = []
+        request = [{"type": "http.request", "body": b"", "more_body": False}]
+        disconnected = asyncio.Event()
+
+        async def receive():
+            if request:
+                return request.pop()
+            # The client never disconnects; Django cancels this wait
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        elapsed = time.perf_counter() - started
+        if messages[0]["status"] != 200:
+            raise CommandError(f"GET {url}: {messages[0]['status']}")
+        return elapsed
+
+    def _run_wsgi(self, url, token, requests, concurrency):
+        application = WSGIHandler()
+
+        def worker(count):
+            try:
+                return [self._wsgi_call(application, url, token) for _ in range(count)]
+            finally:
+                connections.close_all()
+
+        shares = [requests // concurrency] * concurrency
+        with ThreadPoolExecutor(concurrency) as pool:
+            started = time.perf_counter()
+            latencies = [
+                latency for result in pool.map(worker, shares) for latency in result
+            ]
+            return latencies, time.perf_counter() - started
+
+    def _run_asgi(self, url, token, requests, concurrency):
+        application = ASGIHandler()
+
+        async def worker(count):
+            return [
+                await self._asgi_call(application, url, token) for _ in range(count)
+            ]
+
+        async def main():
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                *(worker(requests // concurrency) for _ in range(concurrency))
+            )
+            return (
+                [latency for result in results for latency in result],
+                time.perf_counter() - started,
+            )
+
+        return asyncio.run(main())
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(is_active=True).first()
+        if user is None:
+            raise CommandError("No users, run generate_scale_data first")
+        token = str(AccessToken.for_user(user))
+        targets = self._targets()
+
+        results = []
+        with override_settings(DEBUG=False), mock.patch.object(
+            APIView, "get_throttles", lambda view: []
+        ), mock.patch("airport.async_views.get_throttles", lambda: []):
+            for name, (sync_url, async_url) in targets.items():
+                for concurrency in options["concurrency"]:
+                    for mode, run, url in (
+                        ("wsgi", self._run_wsgi, sync_url),
+                        ("asgi", self._run_asgi, async_url),
+                    ):
+                        latencies, elapsed = run(
+                            url, token, options["requests"], concurrency
+                        )
+                        latencies.sort()
+                        results.append(
+                            {
+                                "endpoint": name,
+                                "mode": mode,
+                                "concurrency": concurrency,
+                                "requests": len(latencies),
+                                "requests_per_s": round(len(latencies) / elapsed, 1),
+                                "p50_ms": round(statistics.median(latencies) * 1000, 2),
+                                "p95_ms": round(
+                                    latencies[int(len(latencies) * 0.95) - 1] * 1000,
+                                    2,
+                                ),
+                            }
+                        )
+                        self.stderr.write(
+                            f"{name} {mode} x{concurrency}: "
+                            f"{results[-1]['requests_per_s']} req/s"
+                        )
+
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,142 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from airport.importer import ScheduleImporter
+from airport.models import Flight
+
+CREW_PER_FLIGHT = 4
+TAG = "bench-bookings"
+
+
+def schedule_records(flights, airplanes):
+    """``flights`` flights round-robin over ``airplanes``, none double booked"""
+    for suffix in "AB":
+        yield {
+            "model": "airport.airport",
+            "fields": {"name": f"{TAG}-{suffix}", "closest_big_city": TAG},
+        }
+    yield {"model": "airport.airplanetype", "fields": {"name": TAG}}
+    yield {
+        "model": "airport.route",
+        "fields": {
+            "source": f"{TAG}-A",
+            "destination": f"{TAG}-B",
+            "distance": 900,
+        },
+    }
+    for airplane in range(airplanes):
+        yield {
+            "model": "airport.airplane",
+            "fields": {
+                "name": f"{TAG}-{airplane}",
+                "rows": 30,
+                "seats_in_row": 6,
+                "airplane_type": TAG,
+            },
+        }
+        for member in range(CREW_PER_FLIGHT):
+            yield {
+                "model": "airport.crew",
+                "fields": {"first_name": TAG, "last_name": f"{airplane}-{member}"},
+            }
+    departure = datetime(2031, 1, 1, tzinfo=timezone.utc)
+    for index in range(flights):
+        airplane = index % airplanes
+        # Every airplane (and its crew) flies 2h out of each 3h slot
+        start = departure + timedelta(hours=3 * (index // airplanes))
+        yield {
+            "model": "airport.flight",
+            "fields": {
+                "route": [f"{TAG}-A", f"{TAG}-B"],
+                "airplane": f"{TAG}-{airplane}",
+                "crew": [
+                    [TAG, f"{airplane}-{member}"] for member in range(CREW_PER_FLIGHT)
+                ],
+                "departure_time": start.isoformat(),
+                "arrival_time": (start + timedelta(hours=2)).isoformat(),
+            },
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time double-booking validation of a --flights schedule loaded with "
+        "ScheduleImporter: the importer's sweep over the whole schedule against "
+        "checking flight by flight, with the check API writes use and with "
+        "plain overlap queries (timed on --sample flights and scaled up). Runs "
+        "in a rolled back transaction and prints JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flights", type=int, default=10_000)
+        parser.add_argument("--airplanes", type=int, default=50)
+        parser.add_argument("--sample", type=int, default=500)
+
+    def _per_flight(self, flights, sample, check):
+        started = time.perf_counter()
+        for flight in flights[:sample]:
+            check(flight)
+        elapsed = time.perf_counter() - started
+        return round(elapsed / min(sample, len(flights)) * len(flights), 2)
+
+    def handle(self, *args, **options):
+        report = {"database": connection.vendor, "flights": options["flights"]}
+        with transaction.atomic():
+            started = time.perf_counter()
+            importer = ScheduleImporter().run(
+                schedule_records(options["flights"], options["airplanes"])
+            )
+            report["import_seconds"] = round(time.perf_counter() - started, 2)
+
+            started = time.perf_counter()
+            importer._check_bookings()
+            report["sweep_seconds"] = round(time.perf_counter() - started, 2)
+            if importer.errors:
+                raise RuntimeError(importer.errors[0])
+
+            flights = list(
+                Flight.objects.filter(airplane__name__startswith=TAG)
+                .order_by("?")
+                .values("pk", "airplane_id", "departure_time", "arrival_time")
+            )
+            crew = {}
+            for flight_id, crew_id in Flight.crew.through.objects.filter(
+                flight__airplane__name__startswith=TAG
+            ).values_list("flight_id", "crew_id"):
+                crew.setdefault(flight_id, []).append(crew_id)
+
+            def api_check(flight):
+                if Flight.booking_conflicts(
+                    flight["departure_time"],
+                    flight["arrival_time"],
+                    flight["airplane_id"],
+                    crew[flight["pk"]],
+                    exclude=flight["pk"],
+                ):
+                    raise RuntimeError(f"flight {flight['pk']} is double booked")
+
+            def overlap_query(flight):
+                Flight.objects.filter(
+                    airplane_id=flight["airplane_id"],
+                    departure_time__lt=flight["arrival_time"],
+                    arrival_time__gt=flight["departure_time"],
+                ).exclude(pk=flight["pk"]).exists()
+                Flight.objects.filter(
+                    crew__in=crew[flight["pk"]],
+                    departure_time__lt=flight["arrival_time"],
+                    arrival_time__gt=flight["departure_time"],
+                ).exclude(pk=flight["pk"]).exists()
+
+            report["per_flight_api_check_seconds"] = self._per_flight(
+                flights, options["sample"], api_check
+            )
+            report["per_flight_overlap_query_seconds"] = self._per_flight(
+                flights, options["sample"], overlap_query
+            )
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,117 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from airport_service.cache_backends import MmapCache
+
+VALUE = {"detail": "x" * 200, "count": 1}
+
+
+def make_cache(name, directory):
+    params = {"TIMEOUT": 300, "OPTIONS": {"MAX_ENTRIES": 100_000}}
+    if name == "locmem":
+        return LocMemCache(f"bench-{os.getpid()}", params)
+    if name == "filebased":
+        return FileBasedCache(os.path.join(directory, "filebased"), params)
+    return MmapCache(os.path.join(directory, "mmap"), params)
+
+
+def worker(name, directory, worker_index, workers, keys, operations, results):
+    """Sets the keys this worker owns, then reads keys of every worker"""
+    cache = make_cache(name, directory)
+    for key in range(worker_index, keys, workers):
+        cache.set(f"key-{key}", VALUE)
+    hits = 0
+    started = time.perf_counter()
+    for index in range(operations):
+        key = f"key-{(index * 7919) % keys}"
+        if index % 10 == 0:
+            cache.set(key, VALUE)
+        elif cache.get(key) is not None:
+            hits += 1
+    results.put((operations, time.perf_counter() - started, hits))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare LocMemCache, FileBasedCache and MmapCache: microseconds per "
+        "get/set/incr in one process, and throughput and hit rate of worker "
+        "processes sharing a key space (90% get, 10% set). Printed as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--operations", type=int, default=20_000)
+        parser.add_argument("--keys", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--backends", default="locmem,filebased,mmap", help="Comma-separated"
+        )
+
+    def _single_process(self, cache, operations, keys):
+        timings = {}
+        for operation in ("set", "get", "incr"):
+            if operation == "incr":
+                for key in range(keys):
+                    cache.set(f"counter-{key}", 0)
+            started = time.perf_counter()
+            for index in range(operations):
+                key = index % keys
+                if operation == "set":
+                    cache.set(f"key-{key}", VALUE)
+                elif operation == "get":
+                    cache.get(f"key-{key}")
+                else:
+                    cache.incr(f"counter-{key}")
+            elapsed = time.perf_counter() - started
+            timings[f"{operation}_us"] = round(elapsed / operations * 1e6, 2)
+        return timings
+
+    def _multi_process(self, name, directory, options):
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=worker,
+                args=(
+                    name,
+                    directory,
+                    index,
+                    options["workers"],
+                    options["keys"],
+                    options["operations"],
+                    results,
+                ),
+            )
+            for index in range(options["workers"])
+        ]
+        for process in processes:
+            process.start()
+        reports = [results.get(timeout=600) for _ in processes]
+        for process in processes:
+            process.join()
+        operations = sum(report[0] for report in reports)
+        gets = operations * 9 // 10
+        return {
+            "workers": options["workers"],
+            "ops_per_s": round(sum(report[0] / report[1] for report in reports)),
+            "hit_rate": round(sum(report[2] for report in reports) / gets, 3),
+        }
+
+    def handle(self, *args, **options):
+        report = {}
+        for name in options["backends"].split(","):
+            with tempfile.TemporaryDirectory() as directory:
+                cache = make_cache(name, directory)
+                report[name] = self._single_process(
+                    cache, options["operations"], options["keys"]
+                )
+                cache.clear()
+                report[name].update(self._multi_process(name, directory, options))
+            self.stderr.write(f"{name}: {report[name]}")
+        self.stdout.write(json.dumps(report, indent=2))
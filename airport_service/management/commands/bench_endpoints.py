@@ -0,0 +1,205 @@
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.models import Flight, Order
+from airport.urls import router
+
+PASSWORD = "bench-endpoints-password"
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every airport router endpoint and the customer endpoints "
+        "in-process and print p50/p95/p99 latency, query count and peak "
+        "memory per endpoint as JSON. Runs inside a rolled back transaction "
+        "with DEBUG and throttling disabled; run generate_scale_data first for "
+        "realistic numbers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument(
+            "--only", default="", help="Only endpoints whose name contains this"
+        )
+        parser.add_argument("--output", help="Also write the JSON report here")
+
+    def _user(self):
+        """The customer of the latest order, promoted to staff for the run"""
+        order = Order.objects.select_related("customer").order_by("-id").first()
+        if order is not None:
+            user = order.customer
+        else:
+            user = get_user_model().objects.create_user("bench-endpoints@example.com")
+        user.is_staff = True
+        user.set_password(PASSWORD)
+        user.save()
+        return user
+
+    def _endpoints(self, user):
+        """(name, method, url, data) for every endpoint"""
+        endpoints = []
+        for prefix, viewset, basename in router.registry:
+            basename = basename or router.get_default_basename(viewset)
+            params = ""
+            if basename == "itinerary":
+                flight = (
+                    Flight.objects.filter(departure_time__gte=timezone.now())
+                    .exclude(route=None)
+                    .order_by("departure_time")
+                    .values("route__source_id", "route__destination_id")
+                    .first()
+                )
+                if flight is not None:
+                    params = (
+                        f"?source={flight['route__source_id']}"
+                        f"&destination={flight['route__destination_id']}"
+                    )
+            endpoints.append(
+                (f"{prefix}-list", "get", reverse(f"airport:{basename}-list") + params)
+            )
+
+            queryset = getattr(viewset, "queryset", None)
+            pk = None if queryset is None else queryset.values_list("pk").first()
+            if pk is None:
+                continue
+            endpoints.append(
+                (
+                    f"{prefix}-detail",
+                    "get",
+                    reverse(f"airport:{basename}-detail", args=pk),
+                )
+            )
+            for action in viewset.get_extra_actions():
+                if action.detail and "get" in action.mapping:
+                    endpoints.append(
+                        (
+                            f"{prefix}-{action.url_path}",
+                            "get",
+                            reverse(f"airport:{basename}-{action.url_name}", args=pk),
+                        )
+                    )
+
+        endpoints += [
+            ("customer-manage", "get", reverse("customer:manage")),
+            (
+                "customer-token",
+                "post",
+                reverse("customer:token_obtain_pair"),
+                {"email": user.email, "password": PASSWORD},
+            ),
+            (
+                "customer-token-refresh",
+                "post",
+                reverse("customer:token_refresh"),
+                {"refresh": str(RefreshToken.for_user(user))},
+            ),
+        ]
+        return [endpoint + (None,) * (4 - len(endpoint)) for endpoint in endpoints]
+
+    @staticmethod
+    def _request(client, method, url, data):
+        response = getattr(client, method)(url, data, format="json")
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method.upper()} {url}: {response.status_code}")
+        return response
+
+    def _bench(self, client, method, url, data, requests, warmup):
+        started = time.perf_counter()
+        self._request(client, method, url, data)
+        cold_ms = (time.perf_counter() - started) * 1000
+        for _ in range(warmup):
+            self._request(client, method, url, data)
+
+        latencies, queries = [], []
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = self._request(client, method, url, data)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+
+        tracemalloc.start()
+        try:
+            self._request(client, method, url, data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "status": response.status_code,
+            "bytes": len(response.content),
+            "cold_ms": round(cold_ms, 2),
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "queries": max(queries),
+            "peak_kib": round(peak / 1024, 1),
+        }
+
+    def handle(self, *args, **options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        report = {
+            "commit": commit,
+            "started_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "requests": options["requests"],
+            "endpoints": {},
+        }
+        client = APIClient(HTTP_HOST="127.0.0.1")
+        # DEBUG off keeps the debug toolbar out of the measurements
+        with override_settings(DEBUG=False), transaction.atomic(), mock.patch.object(
+            APIView, "get_throttles", lambda view: []
+        ):
+            user = self._user()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}"
+            )
+            for name, method, url, data in self._endpoints(user):
+                if options["only"] not in name:
+                    continue
+                result = self._bench(
+                    client, method, url, data, options["requests"], options["warmup"]
+                )
+                report["endpoints"][name] = {"method": method.upper(), "url": url}
+                report["endpoints"][name].update(result)
+                self.stderr.write(
+                    f"{name}: p50 {result['p50_ms']}ms, {result['queries']} queries"
+                )
+            transaction.set_rollback(True)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output + "\n")
+        self.stdout.write(output)
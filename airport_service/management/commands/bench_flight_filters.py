@@ -0,0 +1,93 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from airport.models import Airplane, Crew
+from airport.row_serializers import FlightListRows
+from airport.views import FlightViewSet
+
+
+def view_queryset(params):
+    request = Request(APIRequestFactory().get("/", params))
+    return FlightViewSet(request=request, action="list", kwargs={}).get_queryset()
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the crew and airplane filters of GET /flights/ as joins with "
+        "DISTINCT (the old queryset) and as the semi-joins the view uses, on "
+        "the busiest crew members and airplane of the current database, and "
+        "print the median milliseconds for the first page and for all "
+        "matching ids as JSON. Run generate_scale_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--crew", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def _median_ms(self, function, repeat):
+        function()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return round(statistics.median(timings) * 1000, 2)
+
+    def handle(self, *args, **options):
+        crew_ids = list(
+            Crew.objects.annotate(flights=Count("flight"))
+            .order_by("-flights")
+            .values_list("id", flat=True)[: options["crew"]]
+        )
+        airplane = (
+            Airplane.objects.annotate(flights=Count("flight"))
+            .order_by("-flights")
+            .values_list("name", flat=True)
+            .first()
+        )
+        crew = ",".join(map(str, crew_ids))
+        scenarios = {
+            "crew": ({"crew": crew}, {"crew__id__in": crew_ids}),
+            "crew_and_airplane": (
+                {"crew": crew, "airplane_name": airplane},
+                {"crew__id__in": crew_ids, "airplane__name__icontains": airplane},
+            ),
+        }
+        rows = FlightListRows().rows
+
+        report = {"database": connection.vendor}
+        for scenario, (params, lookups) in scenarios.items():
+            report[scenario] = {"params": params}
+            querysets = {
+                "join_distinct": FlightViewSet.queryset_for_fields()
+                .filter(**lookups)
+                .distinct(),
+                "semi_join": view_queryset(params),
+            }
+            for name, queryset in querysets.items():
+                queryset = queryset.order_by("departure_time", "id")
+                report[scenario][name] = {
+                    "flights": queryset.count(),
+                    "first_page_ms": self._median_ms(
+                        lambda: list(rows(queryset)[:21]), options["repeat"]
+                    ),
+                    "all_ids_ms": self._median_ms(
+                        lambda: list(queryset.values_list("id", flat=True)),
+                        options["repeat"],
+                    ),
+                }
+            counts = {
+                result["flights"]
+                for result in report[scenario].values()
+                if "flights" in result
+            }
+            if len(counts) != 1:
+                raise RuntimeError(f"{scenario}: the querysets match different flights")
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,112 @@
+import json
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from airport.models import Airport, AirplaneType, Airplane, Flight, Route
+from airport.views import OrderViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Time a client retry of POST /orders/: without an Idempotency-Key "
+        "(the whole create runs again and fails on the taken seats) and with "
+        "one (the stored response is replayed). Runs in a rolled back "
+        "transaction and prints JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=4)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def _post(self, view, customer, payload, key=None):
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        request = APIRequestFactory().post(
+            "/api/airport/orders/",
+            payload,
+            format="json",
+            HTTP_HOST="127.0.0.1",
+            **headers,
+        )
+        force_authenticate(request, customer)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            elapsed = time.perf_counter() - started
+        return response.status_code, len(queries), elapsed * 1000
+
+    def handle(self, *args, **options):
+        view = OrderViewSet.as_view({"post": "create"})
+        timings = {"first": [], "retry_without_key": [], "retry_with_key": []}
+        statuses = {name: set() for name in timings}
+        queries = {name: 0 for name in timings}
+
+        with override_settings(DEBUG=False), mock.patch.object(
+            APIView, "get_throttles", lambda view: []
+        ), transaction.atomic():
+            customer = get_user_model().objects.create_user(
+                "bench-idempotency@example.com", is_staff=True
+            )
+            route = Route.objects.create(
+                source=Airport.objects.create(name="Bench A", closest_big_city="A"),
+                destination=Airport.objects.create(
+                    name="Bench B", closest_big_city="B"
+                ),
+                distance=1000,
+            )
+            airplane = Airplane.objects.create(
+                name="Bench plane",
+                rows=options["tickets"],
+                seats_in_row=1,
+                airplane_type=AirplaneType.objects.create(name="Bench type"),
+            )
+            departure = timezone.now() + timedelta(days=1)
+
+            for index in range(options["repeat"]):
+                flight = Flight.objects.create(
+                    route=route,
+                    airplane=airplane,
+                    departure_time=departure + timedelta(hours=3 * index),
+                    arrival_time=departure + timedelta(hours=3 * index + 2),
+                )
+                payload = {
+                    "tickets": [
+                        {"row": row, "seat": 1, "flight": flight.id}
+                        for row in range(1, options["tickets"] + 1)
+                    ]
+                }
+                key = str(uuid.uuid4())
+                for name, retry_key in (
+                    ("first", key),
+                    ("retry_without_key", None),
+                    ("retry_with_key", key),
+                ):
+                    status, count, elapsed = self._post(
+                        view, customer, payload, retry_key
+                    )
+                    statuses[name].add(status)
+                    queries[name] = max(queries[name], count)
+                    timings[name].append(elapsed)
+            transaction.set_rollback(True)
+
+        report = {
+            name: {
+                "status": sorted(statuses[name]),
+                "queries": queries[name],
+                "median_ms": round(statistics.median(timings[name]), 2),
+            }
+            for name in timings
+        }
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,198 @@
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+
+from airport.models import Airport, Airplane, AirplaneType, Flight, Order, Route, Ticket
+
+ROWS = 40
+SEATS_IN_ROW = 10
+
+
+def next_pk(model, offset):
+    return (model.objects.aggregate(top=Max("pk"))["top"] or 0) + offset + 1
+
+
+def fixture_records(tickets, tickets_per_order, offset, tag):
+    """Fixture records for ``tickets`` tickets on fully booked flights"""
+    airport, airplane_type, airplane, route, flight, user, order = (
+        next_pk(model, offset)
+        for model in (
+            Airport,
+            AirplaneType,
+            Airplane,
+            Route,
+            Flight,
+            get_user_model(),
+            Order,
+        )
+    )
+    for index, suffix in enumerate("AB"):
+        yield {
+            "model": "airport.airport",
+            "pk": airport + index,
+            "fields": {"name": f"{tag}-{suffix}", "closest_big_city": tag},
+        }
+    yield {
+        "model": "airport.airplanetype",
+        "pk": airplane_type,
+        "fields": {"name": tag, "image": ""},
+    }
+    yield {
+        "model": "airport.route",
+        "pk": route,
+        "fields": {"source": airport, "destination": airport + 1, "distance": 900},
+    }
+    capacity = ROWS * SEATS_IN_ROW
+    flights = -(-tickets // capacity)
+    yield {
+        "model": "airport.airplane",
+        "pk": airplane,
+        "fields": {
+            "name": tag,
+            "rows": ROWS,
+            "seats_in_row": SEATS_IN_ROW,
+            "airplane_type": airplane_type,
+        },
+    }
+    departure = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    for index in range(flights):
+        yield {
+            "model": "airport.flight",
+            "pk": flight + index,
+            "fields": {
+                "route": route,
+                "airplane": airplane,
+                "departure_time": (departure + timedelta(hours=4 * index)).isoformat(),
+                "arrival_time": (
+                    departure + timedelta(hours=4 * index + 2)
+                ).isoformat(),
+                "crew": [],
+            },
+        }
+
+    orders = -(-tickets // tickets_per_order)
+    customers = max(1, orders // 20)
+    for index in range(customers):
+        yield {
+            "model": "customer.user",
+            "pk": user + index,
+            "fields": {
+                "email": f"{tag}-{index}@example.com",
+                "password": "!",
+                "is_active": True,
+            },
+        }
+    created = datetime(2029, 6, 1, tzinfo=timezone.utc)
+    for index in range(orders):
+        yield {
+            "model": "airport.order",
+            "pk": order + index,
+            "fields": {
+                "customer": user + index % customers,
+                "created_at": (created + timedelta(seconds=index)).isoformat(),
+            },
+        }
+    for index in range(tickets):
+        seat_index = index % capacity
+        yield {
+            "model": "airport.ticket",
+            "pk": None,
+            "fields": {
+                "flight": flight + index // capacity,
+                "order": order + index // tickets_per_order,
+                "row": seat_index // SEATS_IN_ROW + 1,
+                "seat": seat_index % SEATS_IN_ROW + 1,
+            },
+        }
+
+
+def write_fixture(path, records):
+    count = 0
+    with open(path, "w") as fixture:
+        fixture.write("[\n")
+        for record in records:
+            fixture.write(("," if count else "") + json.dumps(record) + "\n")
+            count += 1
+        fixture.write("]\n")
+    return count
+
+
+class Command(BaseCommand):
+    help = (
+        "Time import_schedule on a synthetic fixture with --tickets tickets and "
+        "compare it with loaddata on a --sample sized fixture. Everything runs "
+        "in a rolled back transaction and is printed as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=1_000_000)
+        parser.add_argument("--sample", type=int, default=10_000)
+        parser.add_argument("--tickets-per-order", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--copy", action="store_true")
+
+    def _timed(self, name, *args, **options):
+        started = time.perf_counter()
+        call_command(name, *args, stdout=StringIO(), **options)
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        report = {"database": connection.vendor}
+        with tempfile.TemporaryDirectory() as directory:
+            sample_path = os.path.join(directory, "sample.json")
+            full_path = os.path.join(directory, "full.json")
+            sample_records = write_fixture(
+                sample_path,
+                fixture_records(
+                    options["sample"], options["tickets_per_order"], 0, "bench-sample"
+                ),
+            )
+            # Far enough above the sample that the pks never overlap
+            full_records = write_fixture(
+                full_path,
+                fixture_records(
+                    options["tickets"],
+                    options["tickets_per_order"],
+                    sample_records,
+                    "bench-full",
+                ),
+            )
+            importer_options = {"batch_size": options["batch_size"]}
+            if options["copy"]:
+                importer_options["copy"] = True
+
+            with transaction.atomic():
+                for name in ("loaddata", "import_schedule"):
+                    with transaction.atomic():
+                        if name == "loaddata":
+                            elapsed = self._timed(name, sample_path, verbosity=0)
+                        else:
+                            elapsed = self._timed(name, sample_path, **importer_options)
+                        report[f"sample_{name}"] = {
+                            "records": sample_records,
+                            "seconds": round(elapsed, 2),
+                            "records_per_s": round(sample_records / elapsed),
+                        }
+                        transaction.set_rollback(True)
+
+                elapsed = self._timed("import_schedule", full_path, **importer_options)
+                report["full_import_schedule"] = {
+                    "records": full_records,
+                    "tickets": Ticket.objects.filter(
+                        flight__airplane__name="bench-full"
+                    ).count(),
+                    "seconds": round(elapsed, 2),
+                    "records_per_s": round(full_records / elapsed),
+                }
+                transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,142 @@
+import json
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from airport.models import (
+    Airport,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    Order,
+    OrderTicketSummary,
+    Route,
+    Ticket,
+)
+from airport.row_serializers import FlightListRows, OrderListRows
+from airport.serializers import FlightListSerializer, OrderListSerializer
+from airport.views import FlightViewSet, OrderViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare serializer and row-based rendering of the flight and order "
+        "lists. Runs inside a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, nargs="+", default=[1000, 10000], metavar="N"
+        )
+
+    def _seed(self, size):
+        airports = Airport.objects.bulk_create(
+            Airport(name=f"Bench airport {i}", closest_big_city=f"City {i}")
+            for i in range(10)
+        )
+        routes = Route.objects.bulk_create(
+            Route(source=airports[i], destination=airports[(i + 1) % 10], distance=500)
+            for i in range(10)
+        )
+        airplane = Airplane.objects.create(
+            name="Bench plane",
+            rows=size // 100 + 1,
+            seats_in_row=100,
+            airplane_type=AirplaneType.objects.create(name="Bench type"),
+        )
+        crew = Crew.objects.bulk_create(
+            Crew(first_name=f"First {i}", last_name=f"Last {i}") for i in range(4)
+        )
+        departure = timezone.now() + timedelta(days=1)
+        flights = Flight.objects.bulk_create(
+            Flight(
+                route=routes[i % 10],
+                airplane=airplane,
+                departure_time=departure + timedelta(minutes=i),
+                arrival_time=departure + timedelta(minutes=i + 90),
+            )
+            for i in range(size)
+        )
+        Flight.crew.through.objects.bulk_create(
+            Flight.crew.through(flight=flight, crew=member)
+            for flight in flights
+            for member in crew[:2]
+        )
+        customer = get_user_model().objects.create_user("bench-lists@example.com")
+        orders = Order.objects.bulk_create(
+            Order(customer=customer) for _ in range(size)
+        )
+        tickets = Ticket.objects.bulk_create(
+            Ticket(
+                order=order,
+                flight=flights[0],
+                row=index // 100 + 1,
+                seat=index % 100 + 1,
+            )
+            for index, order in enumerate(orders)
+        )
+        OrderTicketSummary.create_for_tickets(tickets)
+
+    @staticmethod
+    def _measure(render):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            body = render()
+            elapsed = time.perf_counter() - started
+        return {
+            "ms": round(elapsed * 1000, 1),
+            "queries": len(queries),
+            "bytes": len(body),
+        }
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        cases = (
+            (
+                "flights",
+                FlightViewSet.queryset_for_fields(),
+                FlightListSerializer,
+                FlightListRows,
+            ),
+            (
+                "orders",
+                OrderViewSet.queryset_for_fields(),
+                OrderListSerializer,
+                OrderListRows,
+            ),
+        )
+        results = []
+        for size in options["rows"]:
+            with transaction.atomic():
+                self._seed(size)
+                for name, queryset, serializer_class, rows_class in cases:
+                    queryset = queryset.all()[:size]
+
+                    def fast():
+                        reader = rows_class()
+                        return renderer.render(
+                            reader.to_representation(reader.rows(queryset))
+                        )
+
+                    results.append(
+                        {
+                            "list": name,
+                            "rows": size,
+                            "serializer": self._measure(
+                                lambda: renderer.render(
+                                    serializer_class(queryset, many=True).data
+                                )
+                            ),
+                            "fast": self._measure(fast),
+                        }
+                    )
+                transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(results, indent=2))
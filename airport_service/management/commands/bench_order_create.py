@@ -0,0 +1,111 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from airport.models import Airport, AirplaneType, Airplane, Flight, Order, Route, Ticket
+from airport.serializers import OrderSerializer, TicketSerializer
+
+
+class PerTicketOrderSerializer(OrderSerializer):
+    """The previous write path: one validated Ticket.objects.create per ticket"""
+
+    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            tickets_data = validated_data.pop("tickets")
+            order = Order.objects.create(**validated_data)
+            for ticket_data in tickets_data:
+                Ticket.objects.create(order=order, **ticket_data)
+            return order
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare query counts and latency of per-ticket and bulk order "
+        "creation. Runs inside a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1, 10, 100], metavar="N"
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def _measure(self, serializer_class, flight, size, customer):
+        seats_in_row = flight.airplane.seats_in_row
+        payload = {
+            "tickets": [
+                {
+                    "row": index // seats_in_row + 1,
+                    "seat": index % seats_in_row + 1,
+                    "flight": flight.id,
+                }
+                for index in range(size)
+            ]
+        }
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            serializer = serializer_class(data=payload)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(customer=customer)
+            elapsed = time.perf_counter() - started
+        return len(queries), elapsed * 1000
+
+    def handle(self, *args, **options):
+        results = []
+        with transaction.atomic():
+            customer = get_user_model().objects.create_user(
+                "bench-order-create@example.com"
+            )
+            route = Route.objects.create(
+                source=Airport.objects.create(name="Bench A", closest_big_city="A"),
+                destination=Airport.objects.create(
+                    name="Bench B", closest_big_city="B"
+                ),
+                distance=1000,
+            )
+            airplane = Airplane.objects.create(
+                name="Bench plane",
+                rows=max(options["sizes"]) // 10 + 1,
+                seats_in_row=10,
+                airplane_type=AirplaneType.objects.create(name="Bench type"),
+            )
+            departure = timezone.now() + timedelta(days=1)
+
+            for size in options["sizes"]:
+                for name, serializer_class in (
+                    ("per_ticket", PerTicketOrderSerializer),
+                    ("bulk", OrderSerializer),
+                ):
+                    queries, latencies = [], []
+                    for _ in range(options["repeat"]):
+                        flight = Flight.objects.create(
+                            route=route,
+                            airplane=airplane,
+                            departure_time=departure,
+                            arrival_time=departure + timedelta(hours=2),
+                        )
+                        count, elapsed = self._measure(
+                            serializer_class, flight, size, customer
+                        )
+                        queries.append(count)
+                        latencies.append(elapsed)
+                    results.append(
+                        {
+                            "path": name,
+                            "tickets": size,
+                            "queries": max(queries),
+                            "median_ms": round(statistics.median(latencies), 2),
+                        }
+                    )
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(results, indent=2))
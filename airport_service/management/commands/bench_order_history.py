@@ -0,0 +1,136 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Crew,
+    Flight,
+    Order,
+    OrderTicketSummary,
+    Ticket,
+)
+from airport.views import OrderViewSet
+
+INDEX = "order_customer_created_idx"
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the first page of GET /orders/ for a customer with --history "
+        "orders while other customers' orders grow to each --orders total, "
+        "with the (customer, created_at, id) index and with only the plain "
+        "customer_id index, which has to sort the whole history for each "
+        "page. Runs in a rolled back transaction and prints JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--orders", type=int, nargs="+", default=[10_000, 100_000], metavar="N"
+        )
+        parser.add_argument("--history", type=int, default=2000)
+        parser.add_argument("--customers", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def _seed_history(self, customer, size):
+        airplane = Airplane.objects.create(
+            name="Bench history plane",
+            rows=size,
+            seats_in_row=2,
+            airplane_type=AirplaneType.objects.create(name="Bench history type"),
+        )
+        departure = timezone.now() + timedelta(days=1)
+        flights = Flight.objects.bulk_create(
+            Flight(
+                airplane=airplane,
+                departure_time=departure + timedelta(hours=3 * i),
+                arrival_time=departure + timedelta(hours=3 * i + 2),
+            )
+            for i in range(5)
+        )
+        crew = Crew.objects.create(first_name="Bench", last_name="History")
+        Flight.crew.through.objects.bulk_create(
+            Flight.crew.through(flight=flight, crew=crew) for flight in flights
+        )
+        orders = Order.objects.bulk_create(
+            Order(customer=customer) for _ in range(size)
+        )
+        # Two seats per order, on the same flight
+        tickets = Ticket.objects.bulk_create(
+            Ticket(order=order, flight=flights[index % 5], row=index + 1, seat=seat)
+            for index, order in enumerate(orders)
+            for seat in (1, 2)
+        )
+        OrderTicketSummary.create_for_tickets(tickets)
+
+    def _page(self, view, customer):
+        request = APIRequestFactory().get("/api/airport/orders/", HTTP_HOST="127.0.0.1")
+        force_authenticate(request, customer)
+        response = view(request)
+        response.render()
+        return response
+
+    def _measure(self, view, customer, repeat):
+        with CaptureQueriesContext(connection) as queries:
+            response = self._page(view, customer)
+        if len(response.data["results"]) == 0:
+            raise RuntimeError("the customer has no orders")
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            self._page(view, customer)
+            timings.append(time.perf_counter() - started)
+        return {
+            "ms": round(statistics.median(timings) * 1000, 2),
+            "queries": len(queries),
+        }
+
+    def handle(self, *args, **options):
+        view = OrderViewSet.as_view({"get": "list"})
+        report = {"database": connection.vendor, "results": []}
+        with override_settings(DEBUG=False), mock.patch.object(
+            APIView, "get_throttles", lambda view: []
+        ), transaction.atomic():
+            users = get_user_model().objects
+            customer = users.create_user("bench-history@example.com")
+            others = users.bulk_create(
+                users.model(email=f"bench-history-{i}@example.com")
+                for i in range(options["customers"])
+            )
+            self._seed_history(customer, options["history"])
+
+            for total in sorted(options["orders"]):
+                missing = total - Order.objects.count()
+                Order.objects.bulk_create(
+                    (Order(customer=others[i % len(others)]) for i in range(missing)),
+                    batch_size=5000,
+                )
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ANALYZE {Order._meta.db_table}")
+                result = {"orders": Order.objects.count()}
+
+                result["indexed"] = self._measure(view, customer, options["repeat"])
+                sid = transaction.savepoint()
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(INDEX)}")
+                    cursor.execute(f"ANALYZE {Order._meta.db_table}")
+                result["without_index"] = self._measure(
+                    view, customer, options["repeat"]
+                )
+                transaction.savepoint_rollback(sid)
+                report["results"].append(result)
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,147 @@
+import json
+import statistics
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from airport.models import Flight, Order, Ticket
+from airport.row_serializers import FlightRows, OrderListRows
+from airport.serializers import OrderListSerializer
+from airport.views import OrderViewSet
+
+
+def ticket_rows(page):
+    """The previous fast path: the page's tickets, their flights, then crew"""
+    datetime = FlightRows().datetime
+    tickets = list(
+        Ticket.objects.filter(order_id__in=[row["id"] for row in page])
+        .order_by("row", "seat")
+        .values_list("id", "row", "seat", "flight_id", "order_id")
+    )
+    flight_ids = {ticket[3] for ticket in tickets}
+    crew_names = FlightRows.crew_names(flight_ids)
+    flights = {}
+    for (
+        flight_id,
+        route_id,
+        source,
+        destination,
+        distance,
+        airplane,
+        departure_time,
+        arrival_time,
+    ) in (
+        Flight.objects.filter(id__in=flight_ids)
+        .order_by()
+        .values_list(*FlightRows.fields)
+    ):
+        flights[flight_id] = {
+            "id": flight_id,
+            "route": (
+                None
+                if route_id is None
+                else {
+                    "id": route_id,
+                    "source": source,
+                    "destination": destination,
+                    "distance": distance,
+                }
+            ),
+            "airplane": airplane,
+            "crew": crew_names.get(flight_id, []),
+            "departure_time": datetime(departure_time),
+            "arrival_time": datetime(arrival_time),
+        }
+    tickets_by_order = defaultdict(list)
+    for ticket_id, row, seat, flight_id, order_id in tickets:
+        tickets_by_order[order_id].append(
+            {
+                "id": ticket_id,
+                "row": row,
+                "seat": seat,
+                "flight": flights.get(flight_id),
+                "order": order_id,
+            }
+        )
+    return [
+        {
+            "id": row["id"],
+            "tickets": tickets_by_order[row["id"]],
+            "created_at": datetime(row["created_at"]),
+        }
+        for row in page
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Render pages of the busiest customer's GET /orders/ three ways: the "
+        "nested serializers over the prefetch queryset, the previous row path "
+        "(tickets, then flights, then crew) and the OrderTicketSummary read "
+        "model the view uses. Prints median milliseconds, queries and whether "
+        "the output matches as JSON. Run generate_scale_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-size", type=int, nargs="+", default=[20, 100], metavar="N"
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def _measure(self, render, repeat):
+        with CaptureQueriesContext(connection) as queries:
+            body = render()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render()
+            timings.append(time.perf_counter() - started)
+        return body, {
+            "ms": round(statistics.median(timings) * 1000, 2),
+            "queries": len(queries),
+        }
+
+    def handle(self, *args, **options):
+        customer_id = (
+            Order.objects.values("customer_id")
+            .annotate(orders=Count("id"))
+            .order_by("-orders")
+            .values_list("customer_id", flat=True)
+            .first()
+        )
+        renderer = JSONRenderer()
+        queryset = (
+            OrderViewSet.queryset_for_fields()
+            .filter(customer_id=customer_id)
+            .order_by("-created_at", "-id")
+        )
+        reader = OrderListRows()
+
+        report = {"database": connection.vendor, "results": []}
+        for size in options["page_size"]:
+            page = queryset[:size]
+            renders = {
+                "prefetch_serializer": lambda: renderer.render(
+                    OrderListSerializer(page, many=True).data
+                ),
+                "ticket_rows": lambda: renderer.render(
+                    ticket_rows(list(reader.rows(page)))
+                ),
+                "summaries": lambda: renderer.render(
+                    reader.to_representation(reader.rows(page))
+                ),
+            }
+            result = {"page_size": size}
+            bodies = set()
+            for name, render in renders.items():
+                body, result[name] = self._measure(render, options["repeat"])
+                bodies.add(body)
+            result["identical"] = len(bodies) == 1
+            report["results"].append(result)
+
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,140 @@
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+from airport.models import (
+    Airport,
+    AirplaneType,
+    Airplane,
+    Flight,
+    Order,
+    Route,
+    SeatHold,
+    Ticket,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run parallel hold + checkout attempts against one flight and report "
+        "throughput, latency and double bookings. Creates and removes its "
+        "own data, so run it against a disposable database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=200)
+        parser.add_argument("--threads", type=int, default=32)
+        parser.add_argument(
+            "--seats", type=int, default=50, help="Size of the contended seat pool"
+        )
+        parser.add_argument("--seed", type=int, default=1)
+
+    def _checkout(self, flight_id, user, seat):
+        started = time.perf_counter()
+        try:
+            SeatHold.place(flight_id, user, [seat])
+            with transaction.atomic():
+                order = Order.objects.create(customer=user)
+                Ticket.bulk_create_for_flights(
+                    [
+                        Ticket(
+                            order=order, flight_id=flight_id, row=seat[0], seat=seat[1]
+                        )
+                    ]
+                )
+            outcome = "booked"
+        except ValidationError:
+            outcome = "rejected"
+        except OperationalError:
+            outcome = "lock_timeout"
+        finally:
+            close_old_connections()
+        return outcome, (time.perf_counter() - started) * 1000
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        seats_in_row = 10
+        rows = options["seats"] // seats_in_row + 1
+        airplane_type = AirplaneType.objects.create(name="Bench hold type")
+        route = Route.objects.create(
+            source=Airport.objects.create(name="Hold A", closest_big_city="A"),
+            destination=Airport.objects.create(name="Hold B", closest_big_city="B"),
+            distance=500,
+        )
+        departure = timezone.now() + timedelta(days=1)
+        flight = Flight.objects.create(
+            route=route,
+            airplane=Airplane.objects.create(
+                name="Bench hold plane",
+                rows=rows,
+                seats_in_row=seats_in_row,
+                airplane_type=airplane_type,
+            ),
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=1),
+        )
+        get_user_model().objects.filter(email__startswith="bench-hold-").delete()
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"bench-hold-{i}@example.com")
+            for i in range(options["workers"])
+        )
+        attempts = [
+            (
+                user,
+                divmod(rng.randrange(options["seats"]), seats_in_row),
+            )
+            for user in users
+        ]
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+                results = list(
+                    pool.map(
+                        lambda attempt: self._checkout(
+                            flight.id,
+                            attempt[0],
+                            (attempt[1][0] + 1, attempt[1][1] + 1),
+                        ),
+                        attempts,
+                    )
+                )
+            elapsed = time.perf_counter() - started
+
+            flight.refresh_from_db()
+            seats = list(
+                Ticket.objects.filter(flight=flight).values_list("row", "seat")
+            )
+            latencies = sorted(latency for _, latency in results)
+            outcomes = [outcome for outcome, _ in results]
+            report = {
+                "attempts": len(results),
+                "booked": outcomes.count("booked"),
+                "rejected": outcomes.count("rejected"),
+                "lock_timeouts": outcomes.count("lock_timeout"),
+                "double_booked": len(seats) - len(set(seats)),
+                "counter_matches": flight.tickets_sold == len(seats)
+                and flight.seat_map.count() == len(seats),
+                "checkouts_per_second": round(len(results) / elapsed, 1),
+                "latency_ms": {
+                    "p50": round(statistics.median(latencies), 2),
+                    "p95": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+                    "max": round(latencies[-1], 2),
+                },
+            }
+        finally:
+            airplane_type.delete()
+            route.source.delete()
+            route.destination.delete()
+            get_user_model().objects.filter(email__startswith="bench-hold-").delete()
+
+        self.stdout.write(json.dumps(report, indent=2))
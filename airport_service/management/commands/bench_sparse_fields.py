@@ -0,0 +1,107 @@
+import json
+import statistics
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from airport.models import Flight
+from airport.views import FlightViewSet
+
+MINIMAL_FIELDS = "id,departure_time,route"
+
+
+class Command(BaseCommand):
+    help = (
+        "Time GET /flights/ pages and GET /flights/<id>/ with every field and "
+        f"with ?fields={MINIMAL_FIELDS}, the columns a list screen needs. "
+        "Prints median milliseconds, queries, joins and response bytes as "
+        "JSON. Run generate_scale_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-size", type=int, nargs="+", default=[20, 100], metavar="N"
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def _get(self, view, user, path, params, **kwargs):
+        request = APIRequestFactory().get(path, params, HTTP_HOST="127.0.0.1")
+        force_authenticate(request, user)
+        response = view(request, **kwargs)
+        response.render()
+        return response
+
+    def _measure(self, view, user, path, params, repeat, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = self._get(view, user, path, params, **kwargs)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            self._get(view, user, path, params, **kwargs)
+            timings.append(time.perf_counter() - started)
+        return {
+            "ms": round(statistics.median(timings) * 1000, 2),
+            "queries": len(queries),
+            "joins": sum(query["sql"].count(" JOIN ") for query in queries),
+            "bytes": len(response.content),
+        }
+
+    def handle(self, *args, **options):
+        list_view = FlightViewSet.as_view({"get": "list"})
+        detail_view = FlightViewSet.as_view({"get": "retrieve"})
+        report = {"database": connection.vendor, "results": []}
+
+        with override_settings(DEBUG=False), mock.patch.object(
+            APIView, "get_throttles", lambda view: []
+        ), transaction.atomic():
+            user = get_user_model().objects.create_user("bench-fields@example.com")
+            flight_id = (
+                Flight.objects.filter(crew__isnull=False)
+                .values_list("id", flat=True)
+                .first()
+            )
+
+            cases = [
+                (
+                    f"list page_size={size}",
+                    list_view,
+                    "/api/airport/flights/",
+                    {"page_size": size},
+                    {},
+                )
+                for size in options["page_size"]
+            ]
+            cases.append(
+                (
+                    "retrieve",
+                    detail_view,
+                    f"/api/airport/flights/{flight_id}/",
+                    {},
+                    {"pk": flight_id},
+                )
+            )
+            for name, view, path, params, kwargs in cases:
+                result = {"request": name}
+                for label, extra in (
+                    ("all_fields", {}),
+                    ("minimal_fields", {"fields": MINIMAL_FIELDS}),
+                ):
+                    result[label] = self._measure(
+                        view,
+                        user,
+                        path,
+                        {**params, **extra},
+                        options["repeat"],
+                        **kwargs,
+                    )
+                report["results"].append(result)
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(report, indent=2))
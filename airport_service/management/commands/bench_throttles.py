@@ -0,0 +1,81 @@
+import itertools
+import json
+import pickle
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import SimpleRateThrottle, UserRateThrottle
+
+from airport_service.throttling import UserSlidingWindowThrottle
+
+THROTTLES = {
+    "drf_user": UserRateThrottle,
+    "sliding_window_user": UserSlidingWindowThrottle,
+}
+client_ids = itertools.count(time.time_ns())
+
+
+class Command(BaseCommand):
+    help = (
+        "Time allow_request() of DRF's UserRateThrottle and the sliding-window "
+        "user throttle for one client requesting just under its rate, against "
+        "the configured default cache, and print the cost per request and the "
+        "cached bytes per client as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rates", default="30,300,3000", help="Requests per minute to try"
+        )
+        parser.add_argument("--requests", type=int, default=5000)
+
+    def _bench(self, throttle_class, rate, requests):
+        request = APIRequestFactory().get("/")
+        request.user = SimpleNamespace(pk=next(client_ids), is_authenticated=True)
+        clock = SimpleNamespace(now=time.time())
+        # 5% under the rate: the window estimate counts the new request too
+        step = 60 / rate * 1.05
+
+        with mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, user=f"{rate}/min"):
+            # Fill the window first, so DRF's history is at its steady size
+            for _ in range(rate):
+                throttle = throttle_class()
+                throttle.timer = lambda: clock.now
+                throttle.allow_request(request, None)
+                clock.now += step
+
+            elapsed = 0.0
+            for _ in range(requests):
+                throttle = throttle_class()
+                throttle.timer = lambda: clock.now
+                started = time.perf_counter()
+                allowed = throttle.allow_request(request, None)
+                elapsed += time.perf_counter() - started
+                clock.now += step
+                if not allowed:
+                    raise RuntimeError(f"{throttle_class.__name__} refused a request")
+
+        key = throttle.get_cache_key(request, None)
+        window = int(clock.now // 60)
+        values = [
+            throttle.cache.get(cache_key)
+            for cache_key in (key, f"{key}:{window}", f"{key}:{window - 1}")
+        ]
+        return {
+            "us_per_request": round(elapsed / requests * 1e6, 2),
+            "bytes_per_client": sum(
+                len(pickle.dumps(value)) for value in values if value is not None
+            ),
+        }
+
+    def handle(self, *args, **options):
+        report = {}
+        for rate in map(int, options["rates"].split(",")):
+            report[f"{rate}/min"] = {
+                name: self._bench(throttle_class, rate, options["requests"])
+                for name, throttle_class in THROTTLES.items()
+            }
+        self.stdout.write(json.dumps(report, indent=2))
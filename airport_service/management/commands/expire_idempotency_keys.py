@@ -0,0 +1,8 @@
+from airport.models import IdempotencyKey
+from airport_service.management.expiry import ExpireCommand
+
+
+class Command(ExpireCommand):
+    help = "Delete expired order idempotency keys in small batches"
+    model = IdempotencyKey
+    label = "idempotency key(s)"
@@ -0,0 +1,8 @@
+from airport.models import SeatHold
+from airport_service.management.expiry import ExpireCommand
+
+
+class Command(ExpireCommand):
+    help = "Delete expired seat holds in small batches"
+    model = SeatHold
+    label = "seat hold(s)"
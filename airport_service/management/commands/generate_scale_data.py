@@ -0,0 +1,197 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from airport.cache import bump_model_version
+from airport.itineraries import route_graph
+from airport.models import (
+    Airport,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    Order,
+    OrderTicketSummary,
+    Route,
+    Ticket,
+)
+from airport.seat_map import SeatMap
+
+
+class Command(BaseCommand):
+    help = (
+        "Append a deterministic synthetic dataset (airports, routes, airplanes, "
+        "crew, flights, customers, orders, tickets) using batched bulk_create"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=int, default=200)
+        parser.add_argument("--routes", type=int, default=2000)
+        parser.add_argument("--airplanes", type=int, default=100)
+        parser.add_argument("--crew", type=int, default=500)
+        parser.add_argument("--flights", type=int, default=50000)
+        parser.add_argument("--customers", type=int, default=10000)
+        parser.add_argument("--orders", type=int, default=500000)
+        parser.add_argument(
+            "--max-tickets-per-order",
+            type=int,
+            default=4,
+            help="Each order gets 1..N tickets (average N/2 + 0.5)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def _bulk(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.stdout.write(f"  {model.__name__}: {len(created)}")
+        return created
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        started = time.perf_counter()
+        prefix = f"s{options['seed']}"
+
+        with transaction.atomic():
+            airports = self._bulk(
+                Airport,
+                [
+                    Airport(
+                        name=f"{prefix} Airport {i}",
+                        closest_big_city=f"{prefix} City {i % 150}",
+                    )
+                    for i in range(options["airports"])
+                ],
+            )
+            routes = self._bulk(
+                Route,
+                [
+                    Route(
+                        source=source,
+                        destination=destination,
+                        distance=rng.randint(200, 9000),
+                    )
+                    for source, destination in (
+                        rng.sample(airports, 2) for _ in range(options["routes"])
+                    )
+                ],
+            )
+            airplane_types = self._bulk(
+                AirplaneType,
+                [AirplaneType(name=f"{prefix} Type {i}") for i in range(10)],
+            )
+            airplanes = self._bulk(
+                Airplane,
+                [
+                    Airplane(
+                        name=f"{prefix} UR-{i:04d}",
+                        rows=rng.randint(20, 60),
+                        seats_in_row=rng.choice((4, 6, 9)),
+                        airplane_type=rng.choice(airplane_types),
+                    )
+                    for i in range(options["airplanes"])
+                ],
+            )
+            crew = self._bulk(
+                Crew,
+                [
+                    Crew(first_name=f"{prefix} First {i}", last_name=f"Last {i}")
+                    for i in range(options["crew"])
+                ],
+            )
+
+            start = timezone.now().replace(minute=0, second=0, microsecond=0)
+            flights = []
+            for _ in range(options["flights"]):
+                departure = start + timedelta(minutes=15 * rng.randrange(96 * 180))
+                flights.append(
+                    Flight(
+                        route=rng.choice(routes),
+                        airplane=rng.choice(airplanes),
+                        departure_time=departure,
+                        arrival_time=departure
+                        + timedelta(minutes=rng.randint(45, 720)),
+                    )
+                )
+            flights = self._bulk(Flight, flights)
+            self._bulk(
+                Flight.crew.through,
+                [
+                    Flight.crew.through(flight_id=flight.id, crew_id=member.id)
+                    for flight in flights
+                    for member in rng.sample(crew, rng.randint(2, 4))
+                ],
+            )
+
+            customers = self._bulk(
+                get_user_model(),
+                [
+                    get_user_model()(
+                        email=f"{prefix}-customer-{i}@example.com",
+                        password=make_password(None),
+                    )
+                    for i in range(options["customers"])
+                ],
+            )
+
+            seat_maps = {}
+            tickets_total = 0
+            for offset in range(0, options["orders"], self.batch_size):
+                count = min(self.batch_size, options["orders"] - offset)
+                orders = Order.objects.bulk_create(
+                    Order(customer=rng.choice(customers)) for _ in range(count)
+                )
+                tickets = []
+                for order in orders:
+                    flight = rng.choice(flights)
+                    seat_map = seat_maps.get(flight.id)
+                    if seat_map is None:
+                        seat_map = seat_maps[flight.id] = SeatMap(
+                            flight.airplane.rows, flight.airplane.seats_in_row
+                        )
+                    for _ in range(rng.randint(1, options["max_tickets_per_order"])):
+                        if seat_map.count() >= seat_map.capacity:
+                            break
+                        row = rng.randint(1, seat_map.rows)
+                        seat = rng.randint(1, seat_map.seats_in_row)
+                        if seat_map.is_taken(row, seat):
+                            continue
+                        seat_map.take(row, seat)
+                        tickets.append(
+                            Ticket(order=order, flight=flight, row=row, seat=seat)
+                        )
+                Ticket.objects.bulk_create(tickets, batch_size=self.batch_size)
+                OrderTicketSummary.create_for_tickets(
+                    tickets, batch_size=self.batch_size
+                )
+                tickets_total += len(tickets)
+            self.stdout.write(f"  Order: {options['orders']}")
+            self.stdout.write(f"  Ticket: {tickets_total}")
+
+            for flight in flights:
+                seat_map = seat_maps.get(flight.id)
+                if seat_map is not None:
+                    flight.seat_bitmap = seat_map.to_bytes()
+                    flight.tickets_sold = seat_map.count()
+            Flight.objects.bulk_update(
+                [flight for flight in flights if flight.id in seat_maps],
+                ["seat_bitmap", "tickets_sold"],
+                batch_size=self.batch_size,
+            )
+
+            # bulk_create skips the signals that keep caches in step with the DB
+            transaction.on_commit(route_graph.reset)
+            for model in (Airport, Route, AirplaneType, Airplane, Crew):
+                transaction.on_commit(lambda model=model: bump_model_version(model))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated dataset in {time.perf_counter() - started:.1f}s"
+            )
+        )
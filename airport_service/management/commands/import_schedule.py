@@ -0,0 +1,98 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from airport.importer import (
+    NATURAL_KEYS,
+    ImportFailed,
+    RecordError,
+    ScheduleImporter,
+    read_records,
+)
+
+FORMATS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Import airports, routes, airplanes, crew, flights (with crew), orders "
+        "and tickets from a fixture-style JSON array, NDJSON or CSV file in one "
+        "transaction, using batched bulk writes. Use - to read stdin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=sorted(set(FORMATS.values())))
+        parser.add_argument(
+            "--model",
+            choices=list(NATURAL_KEYS),
+            help="Model of the rows of a CSV file",
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Update rows whose pk or natural key already exists",
+        )
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Insert tickets with COPY on Postgres (not with --upsert)",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--max-errors", type=int, default=50)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or FORMATS.get(Path(path).suffix.lower())
+        if input_format is None:
+            raise CommandError("Unknown file type, pass --format")
+        if input_format == "csv" and not options["model"]:
+            raise CommandError("CSV input needs --model")
+        if options["copy"] and options["upsert"]:
+            raise CommandError("--copy cannot be combined with --upsert")
+
+        importer = ScheduleImporter(
+            upsert=options["upsert"],
+            batch_size=options["batch_size"],
+            use_copy=options["copy"],
+            max_errors=options["max_errors"],
+        )
+        stream = (
+            sys.stdin
+            if path == "-"
+            else open(
+                path, encoding="utf-8", newline="" if input_format == "csv" else None
+            )
+        )
+        started = time.perf_counter()
+        try:
+            importer.run(read_records(stream, input_format, options["model"]))
+        except ImportFailed as exc:
+            for error in exc.errors:
+                self.stderr.write(error)
+            raise CommandError(f"Nothing imported: {exc}")
+        except (RecordError, FieldDoesNotExist, IntegrityError, ValueError) as exc:
+            raise CommandError(f"Nothing imported: {exc}")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - started
+
+        total = 0
+        for label in NATURAL_KEYS:
+            created, updated = importer.created[label], importer.updated[label]
+            if created or updated:
+                total += created + updated
+                self.stdout.write(f"  {label}: {created} created, {updated} updated")
+        for label, count in sorted(importer.skipped.items()):
+            self.stdout.write(f"  {label or '?'}: {count} skipped")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {total} records in {elapsed:.1f}s "
+                f"({total / max(elapsed, 1e-9):,.0f} records/s)"
+            )
+        )
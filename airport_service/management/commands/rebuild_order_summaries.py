@@ -0,0 +1,77 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from airport.models import OrderTicketSummary, Ticket
+
+TICKET_FIELDS = ("order_id", "row", "seat", "flight_id")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare OrderTicketSummary rows with the tickets, flights, routes, "
+        "airports, airplanes and crew they copy, and rewrite missing or stale "
+        "ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report mismatched tickets, exit with an error if any",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def _stale(self, tickets):
+        """Tickets of the batch whose summary is missing or differs"""
+        flights = OrderTicketSummary.flight_columns(
+            {ticket.flight_id for ticket in tickets if ticket.flight_id is not None}
+        )
+        fields = (
+            TICKET_FIELDS + tuple(OrderTicketSummary.FLIGHT_FIELDS) + ("crew_names",)
+        )
+        stored = {
+            summary["ticket_id"]: summary
+            for summary in OrderTicketSummary.objects.filter(
+                ticket_id__in=[ticket.pk for ticket in tickets]
+            ).values("ticket_id", *fields)
+        }
+        empty = dict.fromkeys(OrderTicketSummary.FLIGHT_FIELDS, None)
+        empty["crew_names"] = []
+        stale = []
+        for ticket in tickets:
+            expected = {
+                "ticket_id": ticket.pk,
+                **{field: getattr(ticket, field) for field in TICKET_FIELDS},
+                **flights.get(ticket.flight_id, empty),
+            }
+            if stored.get(ticket.pk) != expected:
+                stale.append(ticket)
+        return stale
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        mismatched = 0
+
+        with transaction.atomic():
+            tickets = (
+                Ticket.objects.only("id", *TICKET_FIELDS)
+                .order_by("id")
+                .iterator(chunk_size=batch_size)
+            )
+            while batch := list(islice(tickets, batch_size)):
+                stale = self._stale(batch)
+                for ticket in stale:
+                    self.stdout.write(f"Ticket {ticket.pk}: summary out of date")
+                mismatched += len(stale)
+                if stale and not options["check"]:
+                    OrderTicketSummary.refresh_tickets(stale)
+
+            if options["check"]:
+                if mismatched:
+                    raise CommandError(f"{mismatched} order summaries out of sync")
+                self.stdout.write(self.style.SUCCESS("All order summaries match"))
+                return
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {mismatched} order summaries"))
@@ -0,0 +1,92 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from airport.models import Flight, Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount Flight.tickets_sold and Flight.seat_bitmap from Ticket rows "
+        "and repair any drift"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report mismatched flights, exit with an error if any",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def _expected_seats(self):
+        """Stream (flight_id, tickets_count, seats) grouped by flight"""
+        tickets = (
+            Ticket.objects.filter(flight__isnull=False)
+            .order_by("flight_id")
+            .values_list("flight_id", "row", "seat")
+            .iterator(chunk_size=5000)
+        )
+        for flight_id, group in groupby(tickets, key=lambda ticket: ticket[0]):
+            seats = [(row, seat) for _, row, seat in group]
+            yield flight_id, seats
+
+    def _mismatched(self, batch_size):
+        """Flights whose counter or bitmap differ from their tickets.
+
+        Read without locks, so a flight ordered from meanwhile may show up;
+        ``Flight.rebuild_seats`` recounts it under the seat lock.
+        """
+        mismatched = []
+        with transaction.atomic():
+            flights = (
+                Flight.objects.select_related("airplane")
+                .only(
+                    "id",
+                    "tickets_sold",
+                    "seat_bitmap",
+                    "airplane__rows",
+                    "airplane__seats_in_row",
+                )
+                .order_by("id")
+                .iterator(chunk_size=batch_size)
+            )
+            expected = self._expected_seats()
+            next_expected = next(expected, None)
+
+            for flight in flights:
+                seats = []
+                while next_expected is not None and next_expected[0] <= flight.id:
+                    if next_expected[0] == flight.id:
+                        seats = next_expected[1]
+                    next_expected = next(expected, None)
+
+                bitmap = Flight.pack_seats(flight.airplane, seats)
+                if (
+                    flight.tickets_sold != len(seats)
+                    or bytes(flight.seat_bitmap) != bitmap
+                ):
+                    self.stdout.write(
+                        f"Flight {flight.id}: tickets_sold={flight.tickets_sold}, "
+                        f"tickets={len(seats)}"
+                    )
+                    mismatched.append(flight.id)
+        return mismatched
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        mismatched = self._mismatched(batch_size)
+
+        if options["check"]:
+            if mismatched:
+                raise CommandError(f"{len(mismatched)} flight(s) out of sync")
+            self.stdout.write(self.style.SUCCESS("All flight seat data match"))
+            return
+
+        for offset in range(0, len(mismatched), batch_size):
+            Flight.rebuild_seats(mismatched[offset : offset + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt seat data of {len(mismatched)} flight(s)")
+        )
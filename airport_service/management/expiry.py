@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class ExpireCommand(BaseCommand):
+    """Deletes the expired rows of ``model`` in small batches.
+
+    Rows are picked with ``expires_at`` and ``SKIP LOCKED``: rows being
+    renewed or consumed right now are left to the next run.
+    """
+
+    model = None
+    label = "row(s)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep sweeping every INTERVAL seconds instead of exiting",
+        )
+
+    def sweep(self, batch_size):
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    self.model.objects.filter(expires_at__lte=timezone.now())
+                    .select_for_update(skip_locked=True)
+                    .values_list("id", flat=True)[:batch_size]
+                )
+                if batch:
+                    self.model.objects.filter(id__in=batch).delete()
+            deleted += len(batch)
+            if len(batch) < batch_size:
+                return deleted
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.sweep(options["batch_size"])
+            self.stdout.write(f"Expired {deleted} {self.label}")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
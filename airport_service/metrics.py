@@ -0,0 +1,239 @@
+"""Per-request timings and the histograms behind ``/metrics``.
+
+``PerformanceMiddleware`` puts a ``RequestStats`` in ``current`` for the
+requests it samples; ``record_query`` (installed on every database
+connection) and ``timed()`` add to it. Metrics live in the process that
+served the request, so each worker exposes its own.
+"""
+
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+current = contextvars.ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    __slots__ = ("started", "queries", "db", "phases")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.phases = {}
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting queries of sampled requests"""
+    stats = current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    # Reconnecting keeps the wrapper list, so only add it once
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed(phase):
+    """Adds the time spent in the block to ``phase`` of a sampled request"""
+    stats = current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add(phase, time.perf_counter() - started)
+
+
+@functools.cache
+def timed_serializer_class(serializer_class):
+    """Subclass of ``serializer_class`` adding ``.data`` to ``serialize``"""
+    data = serializer_class.data.fget
+
+    def timed_data(serializer):
+        with timed("serialize"):
+            return data(serializer)
+
+    return type(
+        serializer_class.__name__,
+        (serializer_class,),
+        {"__module__": serializer_class.__module__, "data": property(timed_data)},
+    )
+
+
+class TimedSerializerMixin:
+    """Adds the ``.data`` of the view's serializer to the ``serialize`` phase.
+
+    Only serializers of sampled requests are timed, and only the outermost
+    one: nested serializers render through its ``to_representation``.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if current.get() is not None:
+            serializer.__class__ = timed_serializer_class(type(serializer))
+        return serializer
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; memory grows only with the label values"""
+
+    def __init__(self, name, help_text, buckets, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        # labels -> [count per bucket (last one: +Inf), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        with self._lock:
+            values = sorted(
+                (labels, list(counts)) for labels, counts in self._values.items()
+            )
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = _labels(self.labels, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {counts[-1]}")
+            lines.append(
+                f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+            )
+        return lines
+
+
+REQUEST_LABELS = ("view", "method")
+
+requests_total = Counter(
+    "airport_requests_total",
+    "Sampled requests by view, method and status code.",
+    REQUEST_LABELS + ("status",),
+)
+request_duration = Histogram(
+    "airport_request_duration_seconds",
+    "Time from the first middleware to the response.",
+    DURATION_BUCKETS,
+    REQUEST_LABELS,
+)
+db_queries = Histogram(
+    "airport_db_queries",
+    "SQL queries per request.",
+    QUERY_BUCKETS,
+    REQUEST_LABELS,
+)
+db_duration = Histogram(
+    "airport_db_duration_seconds",
+    "Time spent executing SQL per request.",
+    DURATION_BUCKETS,
+    REQUEST_LABELS,
+)
+serialize_duration = Histogram(
+    "airport_serialize_duration_seconds",
+    "Time spent rendering response data per request.",
+    DURATION_BUCKETS,
+    REQUEST_LABELS,
+)
+response_size = Histogram(
+    "airport_response_size_bytes",
+    "Response body size of non-streaming responses.",
+    SIZE_BUCKETS,
+    REQUEST_LABELS,
+)
+METRICS = (
+    requests_total,
+    request_duration,
+    db_queries,
+    db_duration,
+    serialize_duration,
+    response_size,
+)
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def clear_metrics():
+    for metric in METRICS:
+        metric.clear()
@@ -0,0 +1,87 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from airport_service import metrics
+
+
+class PerformanceMiddleware:
+    """Times a sample of requests and reports them in ``Server-Timing``.
+
+    ``PERFORMANCE_SAMPLE_RATE`` is the fraction of requests measured; the
+    rest only pay for one ``random()`` call. A sampled response gets
+    ``app`` (total), ``db`` (SQL time and query count), ``serialize``
+    (serializer ``.data`` of ``TimedSerializerMixin`` views and the fast
+    list readers, then rendering the response) and ``size`` entries, and the same values are added to the
+    histograms of ``airport_service.metrics``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if random.random() >= settings.PERFORMANCE_SAMPLE_RATE:
+            return self.get_response(request)
+        stats = metrics.RequestStats()
+        token = metrics.current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.PERFORMANCE_SAMPLE_RATE:
+            return await self.get_response(request)
+        stats = metrics.RequestStats()
+        token = metrics.current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, stats)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        stats = metrics.current.get()
+        if stats is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: stats.add("serialize", time.perf_counter() - started)
+            )
+        return response
+
+    def finish(self, request, response, stats):
+        duration = time.perf_counter() - stats.started
+        serialize = stats.phases.get("serialize", 0.0)
+        size = None if response.streaming else len(response.content)
+
+        match = request.resolver_match
+        labels = (match.view_name if match else "unmatched", request.method)
+        metrics.requests_total.inc(labels + (str(response.status_code),))
+        metrics.request_duration.observe(labels, duration)
+        metrics.db_queries.observe(labels, stats.queries)
+        metrics.db_duration.observe(labels, stats.db)
+        metrics.serialize_duration.observe(labels, serialize)
+        if size is not None:
+            metrics.response_size.observe(labels, size)
+
+        timings = [
+            f"app;dur={duration * 1000:.2f}",
+            f'db;dur={stats.db * 1000:.2f};desc="{stats.queries} queries"',
+            f"serialize;dur={serialize * 1000:.2f}",
+        ]
+        if size is not None:
+            timings.append(f'size;desc="{size} bytes"')
+        response["Server-Timing"] = ", ".join(timings)
+        return response
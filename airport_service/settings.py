@@ -48,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "airport_service.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -143,15 +144,59 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "customer.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "airport_service.throttling.AnonSlidingWindowThrottle",
+        "airport_service.throttling.UserSlidingWindowThrottle",
+        "airport_service.throttling.ScopedSlidingWindowThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/minute", "user": "30/minute"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "10/minute",
+        "user": "30/minute",
+        "order_create": "10/minute",
+        "token": "5/minute",
+    },
 }
 
+# Throttling is off in tests, see airport_service.test_runner
+TEST_RUNNER = "airport_service.test_runner.TestRunner"
+
+SEAT_HOLD_MINUTES = 10
+SEAT_LOCK_TIMEOUT_MS = 2000
+# How long an order Idempotency-Key replays its first response
+IDEMPOTENCY_KEY_HOURS = 24
+# Longest flight accepted; bounds the double booking lookups
+MAX_FLIGHT_HOURS = 24
+ITINERARY_MIN_CONNECTION_MINUTES = 45
+ITINERARY_MAX_CONNECTION_HOURS = 24
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+# Without SHARED_CACHE_PATH each worker only sees its own writes: its cached
+# catalog responses and route graph are stale for at most these seconds
+RESPONSE_CACHE_TTL = 60
+ROUTE_GRAPH_TTL = 300
+IMAGE_VARIANT_WORKERS = 2
+# Render image variants inline on commit instead of in the process pool
+IMAGE_VARIANTS_SYNC = False
+IMAGE_MAX_PIXELS = 40_000_000
+AUTH_USER_CACHE_TTL = 60
+AUTH_USER_CACHE_MAX_ENTRIES = 10_000
+# Fraction of requests timed into Server-Timing headers and /metrics
+PERFORMANCE_SAMPLE_RATE = float(os.environ.get("PERFORMANCE_SAMPLE_RATE", 1.0))
+
+# One cache for all worker processes on the host, e.g. /dev/shm/airport.cache
+if os.environ.get("SHARED_CACHE_PATH"):
+    CACHES = {
+        "default": {
+            "BACKEND": "airport_service.cache_backends.MmapCache",
+            "LOCATION": os.environ["SHARED_CACHE_PATH"],
+            "OPTIONS": {
+                "SLOTS": int(os.environ.get("SHARED_CACHE_SLOTS", 16384)),
+                "SLOT_SIZE": int(os.environ.get("SHARED_CACHE_SLOT_SIZE", 2048)),
+            },
+        }
+    }
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=120),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -0,0 +1,26 @@
+from unittest import mock
+
+from django.test.runner import DiscoverRunner
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the tests with every throttle rate off.
+
+    Throttle counters live in the cache, which outlives each test, and
+    SQLite reuses user ids after a rollback: a test could be throttled
+    by the requests of earlier ones. Tests of the throttles set their
+    rates with ``mock.patch.dict`` on ``SimpleRateThrottle.THROTTLE_RATES``.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._throttle_rates = mock.patch.dict(
+            SimpleRateThrottle.THROTTLE_RATES,
+            {scope: None for scope in SimpleRateThrottle.THROTTLE_RATES},
+        )
+        self._throttle_rates.start()
+
+    def teardown_test_environment(self, **kwargs):
+        self._throttle_rates.stop()
+        super().teardown_test_environment(**kwargs)
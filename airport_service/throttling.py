@@ -0,0 +1,81 @@
+"""Sliding-window counter throttles.
+
+DRF's ``SimpleRateThrottle`` keeps the timestamp of every request in the
+window under one cache key and rewrites the whole list on each request,
+so a client costs O(rate) memory and work. These throttles keep two
+integers per client instead: the request count of the current and of the
+previous fixed window. The rate is checked against the previous count
+weighted by how much of it still overlaps the sliding window, plus the
+current count, which is updated with the cache's atomic ``incr``.
+
+Rates, scopes and cache keys are the same as DRF's ``anon``/``user``/
+scoped throttles, so ``DEFAULT_THROTTLE_RATES`` is shared.
+"""
+
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    ScopedRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle,
+)
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    def _increment(self, key):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Two windows: the count is still read as "previous" in the next one
+            if self.cache.add(key, 1, timeout=2 * self.duration):
+                return 1
+            return self.cache.incr(key)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        current_key = f"{self.key}:{int(window)}"
+        previous = self.cache.get(f"{self.key}:{int(window) - 1}", 0)
+        count = self._increment(current_key)
+        overlap = 1 - elapsed / self.duration
+        if previous * overlap + count <= self.num_requests:
+            return True
+
+        # A refused request does not use up the allowance
+        try:
+            self.cache.decr(current_key)
+        except ValueError:
+            pass
+        self._wait = self._wait_for(previous, count - 1, elapsed)
+        return self.throttle_failure()
+
+    def _wait_for(self, previous, current, elapsed):
+        """Seconds until ``previous * overlap + current + 1`` fits the rate"""
+        allowance = self.num_requests - current - 1
+        if allowance >= 0:
+            # Wait for enough of the previous window to slide out
+            overlap = allowance / previous if previous else 1
+            return max(0.0, self.duration * (1 - overlap) - elapsed)
+        # Full already: the current count becomes the previous window's
+        overlap = (self.num_requests - 1) / current if current else 1
+        return self.duration - elapsed + self.duration * max(0.0, 1 - overlap)
+
+    def wait(self):
+        return getattr(self, "_wait", None)
+
+
+class AnonSlidingWindowThrottle(AnonRateThrottle, SlidingWindowThrottle):
+    pass
+
+
+class UserSlidingWindowThrottle(UserRateThrottle, SlidingWindowThrottle):
+    pass
+
+
+class ScopedSlidingWindowThrottle(ScopedRateThrottle, SlidingWindowThrottle):
+    """Applies the rate of the view's ``throttle_scope``, if it sets one"""
@@ -21,10 +21,12 @@ from django.contrib import admin
 from django.urls import path, include
 
 from airport.views import AirportViewSet
+from airport_service.views import MetricsView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/airport/", include("airport.urls", namespace="airport")),
     path("api/customer/", include("customer.urls", namespace="customer")),
+    path("metrics", MetricsView.as_view(), name="metrics"),
     path("__debug__/", include("debug_toolbar.urls")),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,18 @@
+from django.http import HttpResponse
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from airport_service.metrics import render_metrics
+
+
+class MetricsView(APIView):
+    """Prometheus scrape endpoint for this worker's request metrics"""
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(exclude=True)
+    def get(self, request):
+        return HttpResponse(
+            render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "customer"
+
+    def ready(self):
+        import customer.signals  # noqa: F401
@@ -0,0 +1,127 @@
+"""JWT authentication that serves users from an in-process cache.
+
+Entries are keyed by user id and the user's version in the Django cache,
+which ``customer.signals`` bumps whenever a user is saved or deleted, so
+a change is seen on the next request in this process. ``AUTH_USER_CACHE_TTL``
+bounds how stale a process with a separate cache backend can be.
+
+Cached users are rebuilt with ``Model.from_db`` from the identity and
+permission flags only; any other field is deferred and loaded on access.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from airport_service.cache import LRUCache
+
+user_cache = LRUCache(
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_USER_CACHE_TTL,
+)
+
+CACHED_USER_FIELDS = ("id", "email", "is_active", "is_staff", "is_superuser")
+
+
+def _version_key(user_id):
+    return f"user-version:{user_id}"
+
+
+def user_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # A fresh timestamp never repeats a version lost to eviction
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_user(user_id):
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` without the user ``SELECT`` on cache hits"""
+
+    def _cached_fields(self):
+        """Cached attnames, in the model field order ``from_db`` expects"""
+        names = set(CACHED_USER_FIELDS)
+        if api_settings.CHECK_REVOKE_TOKEN:
+            names.add("password")
+        return [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in names
+        ]
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def _cache_key(self, user_id):
+        return (user_id, user_version(user_id))
+
+    def _remember(self, key, user):
+        user_cache.set(
+            key, tuple(getattr(user, name) for name in self._cached_fields())
+        )
+
+    def _cached_user(self, key, validated_token):
+        values = user_cache.get(key)
+        if values is None:
+            return None
+        user = self.user_model.from_db(
+            router.db_for_read(self.user_model), self._cached_fields(), values
+        )
+        self._check(user, validated_token)
+        return user
+
+    def _check(self, user, validated_token):
+        """The checks ``JWTAuthentication.get_user`` runs on a loaded user"""
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+
+    def get_user(self, validated_token):
+        key = self._cache_key(self._user_id(validated_token))
+        user = self._cached_user(key, validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            self._remember(key, user)
+        return user
+
+    async def aget_user(self, validated_token):
+        """``get_user`` for async views, reading a missing user with ``aget()``"""
+        user_id = self._user_id(validated_token)
+        key = self._cache_key(user_id)
+        user = self._cached_user(key, validated_token)
+        if user is not None:
+            return user
+        try:
+            user = await self.user_model.objects.aget(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        self._check(user, validated_token)
+        self._remember(key, user)
+        return user
@@ -0,0 +1,23 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from customer.authentication import invalidate_user
+
+# Saved on every login, but not part of the cached authentication data
+UNCACHED_FIELDS = frozenset(("last_login",))
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_saved_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields and UNCACHED_FIELDS.issuperset(update_fields):
+        return
+    transaction.on_commit(partial(invalidate_user, instance.pk))
+
+
+@receiver(post_delete, sender=get_user_model())
+def invalidate_deleted_user(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_user, instance.pk))
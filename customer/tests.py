@@ -1,3 +1,98 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.cache import response_cache
+from airport_service.cache import LRUCache
+from customer.authentication import user_cache
+
+AIRPORT_URL = reverse("airport:airport-list")
+MANAGE_URL = reverse("customer:manage")
+
+
+class LRUCacheTtlTests(SimpleTestCase):
+    def test_entries_expire_after_ttl(self):
+        lru = LRUCache(max_entries=2, ttl=30)
+        with mock.patch("airport_service.cache.time.monotonic", return_value=100):
+            lru.set("a", 1)
+        with mock.patch("airport_service.cache.time.monotonic", return_value=129):
+            self.assertEqual(lru.get("a"), 1)
+        with mock.patch("airport_service.cache.time.monotonic", return_value=130):
+            self.assertIsNone(lru.get("a"))
+        self.assertEqual(len(lru), 0)
+        self.assertEqual((lru.hits, lru.misses), (1, 1))
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        response_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass", first_name="Ann"
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        )
+
+    def _save(self, user, **fields):
+        for name, value in fields.items():
+            setattr(user, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+    def test_cached_user_needs_no_query(self):
+        self.client.get(AIRPORT_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_cache.hits, 1)
+
+    def test_staff_change_invalidates_cache(self):
+        self.assertEqual(
+            self.client.post(AIRPORT_URL, {}).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+        self._save(self.user, is_staff=True)
+        res = self.client.post(AIRPORT_URL, {"name": "KBP", "closest_big_city": "Kyiv"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_deactivated_and_deleted_users_rejected(self):
+        self.client.get(AIRPORT_URL)
+
+        self._save(self.user, is_active=False)
+        self.assertEqual(
+            self.client.get(AIRPORT_URL).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(
+            self.client.get(AIRPORT_URL).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_manage_user_reads_fresh_profile(self):
+        self.client.get(AIRPORT_URL)
+        get_user_model().objects.filter(pk=self.user.pk).update(email="new@test.com")
+
+        res = self.client.get(MANAGE_URL)
+
+        self.assertEqual(res.data["email"], "new@test.com")
+
+    def test_manage_user_update_keeps_password(self):
+        self.client.get(AIRPORT_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(MANAGE_URL, {"email": "other@test.com"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Ann")
+        self.assertTrue(self.user.check_password("testpass"))
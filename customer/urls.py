@@ -1,15 +1,17 @@
 from django.urls import path
-from customer.views import CreateUserView, CreateTokenView, ManageUserView
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
+from customer.views import (
+    CreateUserView,
+    CreateTokenView,
+    ManageUserView,
+    ObtainTokenPairView,
+    RefreshTokenView,
 )
 
 app_name = "customer"
 
 urlpatterns = [
     path("register/", CreateUserView.as_view(), name="create"),
-    path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("token/", ObtainTokenPairView.as_view(), name="token_obtain_pair"),
+    path("token/refresh/", RefreshTokenView.as_view(), name="token_refresh"),
     path("me/", ManageUserView.as_view(), name="manage"),
 ]
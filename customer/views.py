@@ -1,3 +1,4 @@
+from django.contrib.auth import get_user_model
 from django.shortcuts import render
 
 # Create your views here.
@@ -6,11 +7,13 @@ from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from airport_service.metrics import TimedSerializerMixin
 from customer.serializers import UserSerializer, AuthTokenSerializer
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(TimedSerializerMixin, generics.CreateAPIView):
     serializer_class = UserSerializer
     authentication_classes = ()
     permission_classes = (AllowAny,)
@@ -21,9 +24,19 @@ class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(TimedSerializerMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        # request.user may come from the authentication cache with most
+        # fields deferred, so the profile is always read fresh
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+
+class ObtainTokenPairView(TokenObtainPairView):
+    throttle_scope = "token"
+
+
+class RefreshTokenView(TokenRefreshView):
+    throttle_scope = "token"